@@ -0,0 +1,86 @@
+"""
+Compare the BeautifulSoup row loop previously used by scrape_full_data.py with calendar_parser.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_calendar_parser.py "snapshots/*.html" --repeat 5
+
+Without any path a synthetic month page is generated.
+"""
+import argparse
+import time
+from glob import glob
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from calendar_parser import parse_calendar_html
+from synthetic import make_month_html
+
+
+def parse_calendar_html_bs4(html):
+    """The original html.parser implementation, kept as the baseline."""
+    soup = BeautifulSoup(html, "html.parser")
+    previous_date = ""
+    dictionary = {
+        'event_id': [], 'Date': [], 'Time': [], 'Currency': [], 'Impact': [],
+        'Description': [], 'Actual': [], 'Forecast': [], 'Previous': []}
+    for row in soup.find_all("tr"):
+        if "calendar__row" in row.get("class", []):
+            date_cell = row.find("td", {"class": "calendar__date"})
+            if date_cell is not None and date_cell.text.strip() != "":
+                date = date_cell.text.strip()
+                dictionary['Date'].append(date)
+                previous_date = date
+            else:
+                dictionary['Date'].append(previous_date)
+            for column, class_name in [
+                    ('Time', "calendar__time"), ('Currency', "calendar__currency"),
+                    ('Actual', "calendar__actual"), ('Forecast', "calendar__forecast"),
+                    ('Previous', "calendar__previous"), ('Description', "calendar__event")]:
+                cell = row.find("td", {"class": class_name})
+                dictionary[column].append(cell.text.strip() if cell is not None else "")
+            dictionary['event_id'].append(row.get("data-event-id", ""))
+            impact_cell = row.find("td", {"class": "calendar__impact"})
+            impact = impact_cell.find('span', {'title': True}) if impact_cell is not None else None
+            dictionary['Impact'].append(impact['title'] if impact is not None else "")
+
+    data = pd.DataFrame.from_dict(dictionary)
+    return data[data['Currency'] != '']
+
+
+def time_parser(parser, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parser(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", help="Glob patterns of saved month HTML files")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = []
+    for pattern in args.paths:
+        for path in sorted(glob(pattern)):
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+    if not pages:
+        pages = [make_month_html(seed=seed) for seed in range(12)]
+
+    expected = parse_calendar_html_bs4(pages[0]).reset_index(drop=True)
+    actual = parse_calendar_html(pages[0]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(expected, actual)
+
+    rows = sum(len(parse_calendar_html(html)) for html in pages)
+    baseline = time_parser(parse_calendar_html_bs4, pages, args.repeat)
+    optimized = time_parser(parse_calendar_html, pages, args.repeat)
+
+    print(f"{len(pages)} pages, {rows} rows")
+    print(f"bs4/html.parser: {baseline:.3f}s ({rows / baseline:,.0f} rows/s)")
+    print(f"calendar_parser: {optimized:.3f}s ({rows / optimized:,.0f} rows/s)")
+    print(f"speedup: {baseline / optimized:.1f}x")
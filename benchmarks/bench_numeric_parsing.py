@@ -0,0 +1,35 @@
+"""
+Compare the row-by-row convert_to_float with the vectorized parse_numeric_series.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_numeric_parsing.py --years 10
+"""
+import argparse
+import time
+
+from utils import convert_to_float, parse_numeric_series
+from synthetic import ROWS_PER_YEAR, make_values
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    values = make_values(args.years * ROWS_PER_YEAR)
+    baseline = best_time(lambda: values.apply(convert_to_float), args.repeat)
+    optimized = best_time(lambda: parse_numeric_series(values), args.repeat)
+
+    print(f"{len(values)} values ({args.years} years)")
+    print(f"convert_to_float (.apply): {baseline:.3f}s")
+    print(f"parse_numeric_series:      {optimized:.3f}s")
+    print(f"speedup: {baseline / optimized:.1f}x")
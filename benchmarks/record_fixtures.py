@@ -0,0 +1,80 @@
+"""
+Record calendar pages from the snapshot cache as benchmark fixtures.
+
+Only the calendar__table of every month page is kept, so the fixtures are small
+enough to commit and parse exactly like the live pages.
+
+Usage:
+    PYTHONPATH=. python benchmarks/record_fixtures.py --snapshots snapshots --months 12
+"""
+import os
+import argparse
+
+import lxml.html
+
+from config import SNAPSHOT_FOLDER_NAME
+from snapshot_cache import SnapshotCache
+
+FIXTURE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(year, month, folder=FIXTURE_FOLDER):
+    return os.path.join(folder, f"{year}_{month:02d}.html")
+
+
+def extract_calendar_table(html):
+    """
+    Cut the calendar__table out of a month page.
+
+    Args:
+        html (str): Page source of the calendar page.
+
+    Returns:
+        str: A page holding only the table, or None if the page has no calendar.
+    """
+    tables = lxml.html.fromstring(html).find_class("calendar__table")
+    if not tables:
+        return None
+    table = lxml.html.tostring(tables[0], encoding="unicode")
+    return f"<html><body>{table}</body></html>"
+
+
+def record_fixtures(snapshots, months=None, folder=FIXTURE_FOLDER):
+    """
+    Write the cached month pages to the fixture folder.
+
+    Args:
+        snapshots (SnapshotCache): The cache the pages are read from.
+        months (int): Only record the latest months (optional, default all).
+        folder (str): The fixture folder.
+
+    Returns:
+        list: Paths of the written fixtures.
+    """
+    os.makedirs(folder, exist_ok=True)
+    cached_months = snapshots.months()
+    if months is not None:
+        cached_months = cached_months[-months:]
+
+    paths = []
+    for year, month in cached_months:
+        html = extract_calendar_table(snapshots.get_month(year, month))
+        if html is None:
+            print(f"{year}-{month:02d}: no calendar table, skipped")
+            continue
+        path = fixture_path(year, month, folder)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshots", default=SNAPSHOT_FOLDER_NAME, help="Folder of the snapshot cache")
+    parser.add_argument("--months", type=int, help="Only record the latest N months")
+    parser.add_argument("--output", default=FIXTURE_FOLDER, help="Fixture folder")
+    args = parser.parse_args()
+
+    paths = record_fixtures(SnapshotCache(args.snapshots), args.months, args.output)
+    print(f"{len(paths)} fixtures written to {args.output}")
@@ -0,0 +1,354 @@
+"""
+Benchmark suite of the hot paths, with machine-readable results to compare commits.
+
+Cases:
+    parse_calendar_html          table parsing of scrape_full_data.py
+    extract_calendar_rows_html   table parsing of scraper.py
+    reformat_scraped_data        rows of scraper.py streamed into their news/ month files
+    convert_to_float             row-by-row value parsing, and parse_numeric_series
+    convert_to_datetime          row-by-row datetime parsing, and convert_to_datetime_series
+    prepare_news                 news preparation of merge_price_w_news.py
+    match_prices                 as-of merge of the news with the price bars
+    grouped_evaluation           per-bar and per-currency aggregation of evaluate_dataset.py
+
+Calendar pages are read from benchmarks/fixtures/ (see record_fixtures.py); without
+fixtures, a synthetic year of pages is generated. Values, news and price bars are
+synthetic and scale with --years.
+
+Usage:
+    PYTHONPATH=. python benchmarks/run_benchmarks.py --years 10 --period PERIOD_M1
+    PYTHONPATH=. python benchmarks/run_benchmarks.py --compare benchmarks/results/<old commit>.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import shutil
+import platform
+import statistics
+import subprocess
+import tempfile
+from glob import glob
+from datetime import datetime, timezone
+
+import lxml
+import numpy as np
+import pandas as pd
+
+import merge_price_w_news
+from calendar_parser import parse_calendar_html, extract_calendar_rows_html
+from utils import convert_to_float, parse_numeric_series, convert_to_datetime, convert_to_datetime_series, \
+    reformat_scraped_data
+from evaluation_engine import BarGroups, split_by_currency
+from record_fixtures import FIXTURE_FOLDER
+from synthetic import ROWS_PER_YEAR, CURRENCIES, make_month_html, make_values, make_dates_times, \
+    make_news_frame, make_price_series
+
+RESULT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# The row-by-row baselines take seconds per year of data, so they run on at most this many rows
+BASELINE_MAX_ROWS = ROWS_PER_YEAR
+
+
+def git_commit():
+    """Short hash of HEAD, with "-dirty" when the tree has changes, or "unknown" outside git."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if status else commit
+
+
+def load_pages(folder):
+    """
+    Read the recorded month pages, or generate a year of synthetic ones.
+
+    Returns:
+        list: (year, month, html) tuples.
+    """
+    pages = []
+    for path in sorted(glob(os.path.join(folder, "*_*.html"))):
+        year, month = os.path.splitext(os.path.basename(path))[0].split("_")
+        with open(path, encoding="utf-8") as f:
+            pages.append((int(year), int(month), f.read()))
+    if not pages:
+        print(f"WARNING: no recorded pages in {folder}, the parsing cases time synthetic pages. "
+              "Their results are not comparable with runs on recorded pages; "
+              "run benchmarks/record_fixtures.py first.", file=sys.stderr)
+        pages = [(2025, month, make_month_html(days=28, seed=month, month=month)) for month in range(1, 13)]
+    return pages
+
+
+def time_case(func, repeat):
+    """
+    Run a case repeatedly.
+
+    Returns:
+        tuple: (best, median) wall time in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+class BenchmarkData:
+    def __init__(self, args):
+        """
+        Inputs of the cases, generated once on first use and shared by the cases.
+
+        :param args: The parsed command line arguments.
+        """
+        self.args = args
+        self.cache = {}
+
+    def get(self, name, build):
+        if name not in self.cache:
+            self.cache[name] = build()
+        return self.cache[name]
+
+    def close(self):
+        """Remove the temporary folder, if a case created it."""
+        if "temp_folder" in self.cache:
+            shutil.rmtree(self.cache["temp_folder"], ignore_errors=True)
+
+    @property
+    def temp_folder(self):
+        return self.get("temp_folder", lambda: tempfile.mkdtemp(prefix="bench_"))
+
+    @property
+    def pages(self):
+        return self.get("pages", lambda: load_pages(self.args.fixtures))
+
+    @property
+    def scraped_rows(self):
+        return self.get("scraped_rows", lambda: [
+            (year, month, extract_calendar_rows_html(html)) for year, month, html in self.pages])
+
+    @property
+    def values(self):
+        return self.get("values", lambda: make_values(self.args.years * ROWS_PER_YEAR))
+
+    @property
+    def dates_times(self):
+        return self.get("dates_times", lambda: make_dates_times(self.args.years * ROWS_PER_YEAR))
+
+    @property
+    def news(self):
+        return self.get("news", lambda: make_news_frame(self.args.years))
+
+    @property
+    def prepared_news(self):
+        return self.get("prepared_news", lambda: merge_price_w_news.prepare_news(self.news.copy()))
+
+    @property
+    def prices(self):
+        return self.get("prices", lambda: make_price_series(self.args.years, self.args.period))
+
+    @property
+    def price_news(self):
+        def build():
+            price_news_df = merge_price_w_news.match_prices(self.prepared_news, self.prices, self.args.period)
+            price_news_df = price_news_df[price_news_df['pctChg'].notna()]
+            # evaluation.utils.get_direction_value is not part of the repository;
+            # the sign of the change stands in for it
+            price_news_df["price_direction"] = -np.sign(price_news_df["pctChg"]).astype(int)
+            return price_news_df
+        return self.get("price_news", build)
+
+
+def calendar_rows(data):
+    return sum(len(rows) for _, _, rows in data.scraped_rows)
+
+
+def case_parse_calendar_html(data):
+    pages = [html for _, _, html in data.pages]
+    return {"": lambda: [parse_calendar_html(html) for html in pages]}, calendar_rows(data)
+
+
+def case_extract_calendar_rows_html(data):
+    pages = [html for _, _, html in data.pages]
+    return {"": lambda: [extract_calendar_rows_html(html) for html in pages]}, calendar_rows(data)
+
+
+def case_reformat_scraped_data(data):
+    scraped_rows = data.scraped_rows
+    folder = data.temp_folder
+
+    def run():
+        # The month files are written under news/ in the working directory
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            for year, month, rows in scraped_rows:
+                reformat_scraped_data(rows, month, year)
+        finally:
+            os.chdir(cwd)
+    return {"": run}, calendar_rows(data)
+
+
+def case_convert_to_float(data):
+    values = data.values
+    baseline = values[:BASELINE_MAX_ROWS]
+    return {
+        "": lambda: baseline.apply(convert_to_float),
+        "parse_numeric_series": lambda: parse_numeric_series(values),
+    }, {"": len(baseline), "parse_numeric_series": len(values)}
+
+
+def case_convert_to_datetime(data):
+    dates, times = data.dates_times
+    baseline = list(zip(dates[:BASELINE_MAX_ROWS], times[:BASELINE_MAX_ROWS]))
+    return {
+        "": lambda: [convert_to_datetime(date, time_text, 2025) for date, time_text in baseline],
+        "convert_to_datetime_series": lambda: convert_to_datetime_series(dates, times, 2025),
+    }, {"": len(baseline), "convert_to_datetime_series": len(dates)}
+
+
+def case_prepare_news(data):
+    news = data.news
+    return {"": lambda: merge_price_w_news.prepare_news(news.copy())}, len(news)
+
+
+def case_match_prices(data):
+    news, prices, period = data.prepared_news, data.prices, data.args.period
+    return {"": lambda: merge_price_w_news.match_prices(news, prices, period)}, len(news)
+
+
+def case_grouped_evaluation(data):
+    price_news_df = data.price_news
+
+    def run():
+        bar_groups = BarGroups(price_news_df)
+        split_by_currency(price_news_df)
+        bar_groups.aggregate()
+        for currency in CURRENCIES:
+            bar_groups.aggregate([currency])
+    return {"": run}, len(price_news_df)
+
+
+CASES = {
+    "parse_calendar_html": case_parse_calendar_html,
+    "extract_calendar_rows_html": case_extract_calendar_rows_html,
+    "reformat_scraped_data": case_reformat_scraped_data,
+    "convert_to_float": case_convert_to_float,
+    "convert_to_datetime": case_convert_to_datetime,
+    "prepare_news": case_prepare_news,
+    "match_prices": case_match_prices,
+    "grouped_evaluation": case_grouped_evaluation,
+}
+
+
+def run_benchmarks(args):
+    """
+    Run the selected cases.
+
+    Returns:
+        dict: Result name -> {"seconds", "median_seconds", "rows", "rows_per_second"}.
+        Variants of a case are named "<case>/<variant>".
+    """
+    data = BenchmarkData(args)
+    results = {}
+    try:
+        for case_name in args.only or CASES:
+            variants, rows = CASES[case_name](data)
+            for variant, func in variants.items():
+                name = f"{case_name}/{variant}" if variant else case_name
+                variant_rows = rows[variant] if isinstance(rows, dict) else rows
+                best, median = time_case(func, args.repeat)
+                results[name] = {
+                    "seconds": best,
+                    "median_seconds": median,
+                    "rows": variant_rows,
+                    "rows_per_second": variant_rows / best if best > 0 else None,
+                }
+                print(f"{name:<50} {best:9.4f}s  {variant_rows:>10,} rows  {variant_rows / best:>14,.0f} rows/s")
+    finally:
+        data.close()
+    return results
+
+
+def compare_results(old, new, threshold):
+    """
+    Compare two result files case by case.
+
+    Args:
+        old (dict): The reference results, as written by --output.
+        new (dict): The current results.
+        threshold (float): Relative slowdown reported as a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        list: Names of the regressed cases.
+    """
+    if old["metadata"]["params"] != new["metadata"]["params"]:
+        print(f"warning: parameters differ: {old['metadata']['params']} vs {new['metadata']['params']}")
+
+    regressions = []
+    print(f"\n{'case':<50} {old['metadata']['commit']:>12} {new['metadata']['commit']:>12}   change")
+    for name, result in new["results"].items():
+        if name not in old["results"]:
+            continue
+        before, after = old["results"][name]["seconds"], result["seconds"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<50} {before:11.4f}s {after:11.4f}s {change:+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10, help="Years of synthetic values, news and price bars")
+    parser.add_argument("--period", default="PERIOD_M1", help="Period of the synthetic price bars")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best one is kept")
+    parser.add_argument("--only", nargs="+", choices=list(CASES), help="Only run these cases")
+    parser.add_argument("--fixtures", default=FIXTURE_FOLDER, help="Folder of the recorded calendar pages")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Result file of another commit to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Slowdown reported as a regression by --compare (default: 0.1, i.e. 10%%)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = run_benchmarks(args)
+    report = {
+        "metadata": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "lxml": lxml.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "params": {
+                "years": args.years,
+                "period": args.period,
+                "repeat": args.repeat,
+                "pages": len(glob(os.path.join(args.fixtures, "*_*.html"))) or "synthetic",
+            },
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULT_FOLDER, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_results(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions above {args.threshold:.0%}")
+            sys.exit(1)
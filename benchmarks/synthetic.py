@@ -0,0 +1,172 @@
+"""
+Synthetic calendar pages, events and price bars for the benchmarks, at any scale.
+
+Every generator is seeded, so two runs (or two commits) measure the same data.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceSeries, PERIOD_LENGTHS
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+CURRENCIES = ["USD", "EUR", "GBP", "CAD", "NZD", "JPY", "AUD", "CHF", "CNY"]
+HIGH_IMPACT = "High Impact Expected"
+
+# About this many calendar rows per year carry an Actual or Forecast value
+ROWS_PER_YEAR = 25000
+
+
+def make_month_html(days=31, events_per_day=15, seed=0, month=10, year=2025):
+    """Build a calendar page with the same row and cell structure as Forex Factory."""
+    rng = random.Random(seed)
+    impacts = [("yel", "Low Impact Expected"), ("ora", "Medium Impact Expected"),
+               ("red", HIGH_IMPACT), ("gra", "Non-Economic")]
+    month_name = MONTH_NAMES[month - 1]
+    rows = []
+    event_id = 100000 + seed * 10000
+    for day in range(1, days + 1):
+        weekday = WEEKDAYS[pd.Timestamp(year=year, month=month, day=min(day, 28)).weekday()] \
+            if day <= 28 else "Mon"
+        rows.append(
+            '<tr class="calendar__row calendar__row--day-breaker">'
+            f'<td class="calendar__cell" colspan="10"><span>{weekday} <span>{month_name} {day}</span></span></td></tr>')
+        for index in range(events_per_day):
+            event_id += 1
+            color, title = rng.choice(impacts)
+            date = f'<span class="date">{weekday} <span>{month_name} {day}</span></span>' if index == 0 else ""
+            rows.append(
+                f'<tr class="calendar__row" data-event-id="{event_id}">'
+                f'<td class="calendar__cell calendar__date">{date}</td>'
+                f'<td class="calendar__cell calendar__time"><div>{rng.randint(1, 12)}:30am</div></td>'
+                f'<td class="calendar__cell calendar__currency"><span>{rng.choice(CURRENCIES)}</span></td>'
+                f'<td class="calendar__cell calendar__impact"><span title="{title}" '
+                f'class="icon icon--ff-impact-{color}"></span></td>'
+                f'<td class="calendar__cell calendar__event event"><div><span>Event {index}</span></div></td>'
+                '<td class="calendar__cell calendar__detail"><a></a></td>'
+                f'<td class="calendar__cell calendar__actual"><span>{rng.uniform(-5, 5):.1f}%</span></td>'
+                f'<td class="calendar__cell calendar__forecast"><span>{rng.uniform(-5, 5):.1f}%</span></td>'
+                f'<td class="calendar__cell calendar__previous"><span>{rng.uniform(-5, 5):.1f}%</span></td>'
+                '<td class="calendar__cell calendar__graph"><a></a></td>'
+                '</tr>')
+    return ('<html><body><table class="calendar__table"><tbody>'
+            + "".join(rows) + '</tbody></table></body></html>')
+
+
+def make_values(rows, seed=0):
+    """Build a column of calendar-style values: percentages, magnitudes, markers and blanks."""
+    rng = np.random.default_rng(seed)
+    numbers = rng.normal(0, 50, rows).round(1)
+    formats = rng.integers(0, 6, rows)
+    values = []
+    for number, kind in zip(numbers, formats):
+        if kind == 0:
+            values.append(f"{number}%")
+        elif kind == 1:
+            values.append(f"{number}K")
+        elif kind == 2:
+            values.append(f"{abs(number) * 100:,.1f}M")
+        elif kind == 3:
+            values.append(f"<{abs(number) / 100:.1f}%")
+        elif kind == 4:
+            values.append(f"{number}B")
+        else:
+            values.append("")
+    return pd.Series(values)
+
+
+def make_dates_times(rows, seed=0):
+    """
+    Build calendar Date and Time columns: dates without year, clock times in am/pm,
+    and a few "All Day" and "Tentative" times.
+
+    Returns:
+        tuple: (dates, times) pd.Series of strings.
+    """
+    rng = np.random.default_rng(seed)
+    months = rng.integers(1, 13, rows)
+    days = rng.integers(1, 29, rows)
+    dates = pd.Series([f"{MONTH_NAMES[month - 1]} {day}" for month, day in zip(months, days)])
+    hours = rng.integers(1, 13, rows)
+    minutes = rng.choice(["00", "15", "30", "45"], rows)
+    kinds = rng.random(rows)
+    times = pd.Series([
+        "All Day" if kind < 0.02 else "Tentative" if kind < 0.03 else f"{hour}:{minute}{'am' if kind < 0.5 else 'pm'}"
+        for hour, minute, kind in zip(hours, minutes, kinds)
+    ])
+    return dates, times
+
+
+def make_news_frame(years, events_per_day=6, start_year=2015, seed=0):
+    """
+    Build typed high impact news, as event_store.read_events returns high_impact_news/.
+
+    Args:
+        years (int): Number of years.
+        events_per_day (int): High impact events per day.
+        start_year (int): The first year.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: One row per event, with criteria and the typed datetime and value columns.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(year=start_year, month=1, day=1, tz='UTC')
+    days = (pd.Timestamp(year=start_year + years, month=1, day=1, tz='UTC') - start).days
+    rows = days * events_per_day
+
+    # Releases fall on the quarter hour
+    minutes = np.sort(rng.integers(0, days * 24 * 4, rows)) * 15
+    datetimes = start + pd.to_timedelta(minutes, unit='m')
+    actual = rng.normal(0, 2, rows).round(1)
+    forecast = rng.normal(0, 2, rows).round(1)
+    previous = rng.normal(0, 2, rows).round(1)
+
+    return pd.DataFrame({
+        'event_id': np.arange(rows) + 100000,
+        'Date': datetimes.strftime('%a %b %-d'),
+        'Time': datetimes.strftime('%-I:%M%p').str.lower(),
+        'Currency': rng.choice(CURRENCIES, rows),
+        'Impact': HIGH_IMPACT,
+        'Description': [f"Event {index}" for index in rng.integers(0, 200, rows)],
+        'Actual': [f"{value}%" for value in actual],
+        'Forecast': [f"{value}%" for value in forecast],
+        'Previous': [f"{value}%" for value in previous],
+        'raw_criteria': "",
+        'criteria': rng.choice([-1, 0, 1], rows, p=[0.3, 0.1, 0.6]),
+        'datetime': datetimes,
+        'actual_value': actual,
+        'forecast_value': forecast,
+        'previous_value': previous,
+    })
+
+
+def make_price_series(years, period="PERIOD_M1", start_year=2015, seed=0):
+    """
+    Build price bars as price_store.PriceStore.load returns them, with a random walk close.
+
+    Args:
+        years (int): Number of years.
+        period (str): The MetaTrader period, e.g. "PERIOD_M1" (about 526,000 bars a year).
+        start_year (int): The first year.
+        seed (int): Random seed.
+
+    Returns:
+        PriceSeries: The bars, with open, high, low and close columns.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(year=start_year, month=1, day=1, tz='UTC').value
+    end = pd.Timestamp(year=start_year + years, month=1, day=1, tz='UTC').value
+    times = np.arange(start, end, PERIOD_LENGTHS[period].value, dtype=np.int64)
+
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, len(times)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0001, len(times)))
+    return PriceSeries(times, {
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+    })
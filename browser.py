@@ -0,0 +1,232 @@
+import os
+import csv
+import time
+import queue
+import threading
+from datetime import datetime
+
+try:
+    import undetected_chromedriver as uc
+    from selenium_stealth import stealth
+except ImportError:
+    # Only the "http" fetcher can be used without a browser
+    print("AF: No Chrome webdriver installed")
+
+from config import ALLOWED_ELEMENT_TYPES, ICON_COLOR_MAP, NUM_WORKERS, SCROLL_INITIAL_DELAY, SCROLL_MAX_DELAY, SCROLL_STABLE_CHECKS, SCROLL_TIMEOUT
+
+# Scrolls to the bottom and reports how much of the calendar is rendered
+SCROLL_STATE_SCRIPT = """
+window.scrollTo(0, document.body.scrollHeight);
+var table = document.querySelector('.calendar__table');
+var rows = table ? table.getElementsByTagName('tr').length : 0;
+return [rows, document.body.scrollHeight];
+"""
+
+# Serializes the calendar in one call, with the same rules as the old per-element loop:
+# keep the text of allowed cells, or the impact color when the impact cell has no text
+EXTRACT_TABLE_SCRIPT = """
+var allowedTypes = arguments[0];
+var iconColors = arguments[1];
+var table = document.querySelector('.calendar__table');
+var data = [];
+if (!table) {
+    return data;
+}
+var rows = table.getElementsByTagName('tr');
+for (var i = 0; i < rows.length; i++) {
+    var rowData = [];
+    var cells = rows[i].getElementsByTagName('td');
+    for (var j = 0; j < cells.length; j++) {
+        var className = cells[j].getAttribute('class');
+        if (!(className in allowedTypes)) {
+            continue;
+        }
+        // Whitespace runs, including the line breaks between block elements, become one
+        // space, like calendar_parser.extract_calendar_rows_html does for reparsed pages
+        var text = cells[j].innerText.replace(/\\s+/g, ' ').trim();
+        if (text) {
+            rowData.push(text);
+        } else if (className.indexOf('calendar__impact') !== -1) {
+            var color = null;
+            var spans = cells[j].getElementsByTagName('span');
+            for (var k = 0; k < spans.length; k++) {
+                color = iconColors[spans[k].getAttribute('class')] || color;
+            }
+            rowData.push(color || 'impact');
+        }
+    }
+    if (rowData.length) {
+        data.push(rowData);
+    }
+}
+return data;
+"""
+
+timing_lock = threading.Lock()
+
+
+def generate_driver():
+    try:
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.6167.140 Safari/537.36"
+        chrome_options = uc.ChromeOptions()
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument("--start-maximized")
+        chrome_options.add_argument("user-agent={}".format(user_agent))
+        driver = uc.Chrome(options=chrome_options)
+        stealth(driver,
+                languages=["en-US", "en"],
+                vendor="Google Inc.",
+                platform="Win32",
+                webgl_vendor="Intel Inc.",
+                renderer="Intel Iris OpenGL Engine",
+                fix_hairline=True
+                )
+        driver.implicitly_wait(20)
+        return driver
+    except Exception as e:
+        print("Error in Driver: ", e)
+
+
+def scroll_to_end(
+        browser,
+        initial_delay=SCROLL_INITIAL_DELAY,
+        max_delay=SCROLL_MAX_DELAY,
+        stable_checks=SCROLL_STABLE_CHECKS,
+        timeout=SCROLL_TIMEOUT
+):
+    """
+    Scroll to the end of the calendar and return as soon as it stops growing.
+
+    The page is polled for its calendar__table row count and scroll height. The
+    wait between polls starts at initial_delay and doubles (up to max_delay) while
+    nothing changes; any change resets it.
+
+    :param browser: The webdriver with the calendar page loaded.
+    :param initial_delay: First wait between polls, in seconds.
+    :param max_delay: Upper bound for the wait between polls, in seconds.
+    :param stable_checks: Number of unchanged polls in a row that ends the wait.
+    :param timeout: Give up waiting after this many seconds.
+    :return: Tuple of (row count, seconds spent).
+    """
+    start = time.perf_counter()
+    delay = initial_delay
+    previous_state = None
+    stable = 0
+
+    while time.perf_counter() - start < timeout:
+        state = browser.execute_script(SCROLL_STATE_SCRIPT)
+        if state == previous_state:
+            stable += 1
+            if stable >= stable_checks:
+                break
+            delay = min(delay * 2, max_delay)
+        else:
+            stable = 0
+            delay = initial_delay
+        previous_state = state
+        time.sleep(delay)
+
+    row_count = previous_state[0] if previous_state else 0
+    return row_count, time.perf_counter() - start
+
+
+def extract_calendar_rows(browser):
+    """
+    Collect the calendar rows of the loaded page in a single WebDriver call.
+
+    :param browser: The webdriver with the calendar page loaded and scrolled to the end.
+    :return: List of rows, each a list of cell texts as expected by reformat_scraped_data.
+    """
+    return browser.execute_script(
+        EXTRACT_TABLE_SCRIPT, ALLOWED_ELEMENT_TYPES, ICON_COLOR_MAP)
+
+
+def log_page_timing(file_path, url, row_count, seconds):
+    """
+    Append the load time of one page to a CSV file, so a full backfill can be compared between runs.
+
+    :param file_path: Path of the timings CSV file.
+    :param url: The page that was loaded.
+    :param row_count: Number of calendar rows found on the page, empty if unknown.
+    :param seconds: Time spent waiting for the page to finish loading.
+    """
+    rows = f" ({row_count} rows)" if row_count != "" else ""
+    print(f"Loaded {url} in {seconds:.2f}s{rows}")
+    with timing_lock:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        write_header = not os.path.exists(file_path)
+        with open(file_path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(["timestamp", "url", "rows", "seconds"])
+            writer.writerow([
+                datetime.now().isoformat(timespec="seconds"), url, row_count, round(seconds, 3)])
+
+
+class DriverPool:
+    def __init__(self, num_workers=NUM_WORKERS, driver_factory=generate_driver):
+        """
+        A fixed set of worker threads, each owning one long-lived browser.
+
+        :param num_workers: Number of browsers to run in parallel.
+        :param driver_factory: Callable returning a ready-to-use driver or fetcher (or None on failure).
+        """
+        self.num_workers = num_workers
+        self.driver_factory = driver_factory
+
+    def _close(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print("Error closing Driver: ", e)
+
+    def _work(self, func, tasks, results):
+        driver = self.driver_factory()
+        if driver is None:
+            return
+
+        while True:
+            try:
+                index, item = tasks.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                results[index] = func(driver, item)
+            except Exception as e:
+                print(f"Error scraping {item}: ", e)
+                # The browser may be in a broken state, start a fresh one
+                self._close(driver)
+                driver = self.driver_factory()
+                if driver is None:
+                    return
+
+        self._close(driver)
+
+    def map(self, func, items):
+        """
+        Runs func(driver, item) for every item, spreading them over the pool's browsers.
+
+        :param func: Callable taking a driver and one item.
+        :param items: Iterable of work items (e.g. calendar URLs or (year, month) tuples).
+        :return: The results in the same order as items, None for failed items.
+        """
+        items = list(items)
+        tasks = queue.Queue()
+        for index, item in enumerate(items):
+            tasks.put((index, item))
+
+        results = [None] * len(items)
+        workers = [
+            threading.Thread(target=self._work, args=(func, tasks, results))
+            for _ in range(min(self.num_workers, len(items)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if not tasks.empty():
+            print(f"No browser available, {tasks.qsize()} items were not scraped")
+
+        return results
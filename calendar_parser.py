@@ -0,0 +1,153 @@
+from io import BytesIO
+
+import lxml.etree
+import lxml.html
+import pandas as pd
+
+from config import ALLOWED_ELEMENT_TYPES, ICON_COLOR_MAP
+
+CALENDAR_COLUMNS = [
+    'event_id', 'Date', 'Time', 'Currency', 'Impact',
+    'Description', 'Actual', 'Forecast', 'Previous']
+
+# Cell class -> column it fills
+CELL_CLASS_TO_COLUMN = {
+    "calendar__date": "Date",
+    "calendar__time": "Time",
+    "calendar__currency": "Currency",
+    "calendar__impact": "Impact",
+    "calendar__event": "Description",
+    "calendar__actual": "Actual",
+    "calendar__forecast": "Forecast",
+    "calendar__previous": "Previous",
+}
+
+
+def parse_calendar_row(row):
+    """
+    Read the cells of one calendar__row in a single pass.
+
+    Args:
+        row (lxml.etree._Element): The tr element.
+
+    Returns:
+        dict: Column name -> cell value for the cells found in the row.
+    """
+    values = {}
+    for cell in row.iter("td"):
+        for class_name in cell.get("class", "").split():
+            column = CELL_CLASS_TO_COLUMN.get(class_name)
+            # Like find(), the first matching cell wins
+            if column is None or column in values:
+                continue
+
+            if column == "Impact":
+                value = ""
+                for span in cell.iter("span"):
+                    if span.get("title") is not None:
+                        value = span.get("title")
+                        break
+            else:
+                value = "".join(cell.itertext()).strip()
+            values[column] = value
+            break
+
+    return values
+
+
+def iter_calendar_rows(html):
+    """
+    Parse the calendar rows of a Forex Factory month page one at a time.
+
+    The page is read incrementally and every row is freed once parsed, so only the
+    current row is kept in memory.
+
+    Args:
+        html (str): Page source of the calendar page.
+
+    Yields:
+        tuple: The CALENDAR_COLUMNS values of every event, rows without a currency
+        (day breakers) excluded.
+    """
+    previous_date = ""
+    rows = lxml.etree.iterparse(
+        BytesIO(html.encode("utf-8")), events=("end",), tag="tr", html=True, encoding="utf-8")
+    for _, row in rows:
+        if "calendar__row" not in row.get("class", "").split():
+            continue
+
+        values = parse_calendar_row(row)
+        date = values.get("Date", "")
+        if date != "":
+            previous_date = date
+
+        event = (
+            row.get("data-event-id", ""),
+            previous_date,
+            values.get("Time", ""),
+            values.get("Currency", ""),
+            values.get("Impact", ""),
+            values.get("Description", ""),
+            values.get("Actual", ""),
+            values.get("Forecast", ""),
+            values.get("Previous", ""),
+        )
+
+        # Drop the parsed row and the rows before it
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+        # Remove rows that only have date information
+        if event[3] != "":
+            yield event
+
+
+def parse_calendar_html(html):
+    """
+    Parse the calendar rows of a Forex Factory month page.
+
+    Args:
+        html (str): Page source of the calendar page.
+
+    Returns:
+        pd.DataFrame: One row per event with the CALENDAR_COLUMNS columns.
+    """
+    return pd.DataFrame(list(iter_calendar_rows(html)), columns=CALENDAR_COLUMNS)
+
+
+def extract_calendar_rows_html(html):
+    """
+    Build the rows reformat_scraped_data expects from page HTML.
+
+    Mirrors browser.extract_calendar_rows for pages that were not rendered in a browser.
+
+    Args:
+        html (str): Page source of the calendar page.
+
+    Returns:
+        list: List of rows, each a list of cell texts.
+    """
+    root = lxml.html.fromstring(html)
+    data = []
+    for table in root.find_class("calendar__table")[:1]:
+        for row in table.iter("tr"):
+            row_data = []
+            for cell in row.iter("td"):
+                class_name = cell.get("class")
+                if class_name not in ALLOWED_ELEMENT_TYPES:
+                    continue
+
+                # Whitespace runs become one space, like the innerText of browser.extract_calendar_rows
+                text = " ".join(cell.text_content().split())
+                if text:
+                    row_data.append(text)
+                elif "calendar__impact" in class_name:
+                    color = None
+                    for span in cell.iter("span"):
+                        color = ICON_COLOR_MAP.get(span.get("class"), color)
+                    row_data.append(color or "impact")
+
+            if len(row_data):
+                data.append(row_data)
+    return data
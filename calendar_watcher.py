@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config import REQUEST_URL, FETCHER_BACKEND, HTTP_TIMEOUT, WATCH_PERIOD, WATCH_SLOW_INTERVAL, \
+    WATCH_FAST_INTERVAL, WATCH_LEAD_SECONDS, WATCH_RELEASE_TIMEOUT, WATCH_MAX_FAILURES
+from utils import generate_partial_target, convert_to_datetime_series, infer_year_month
+from calendar_parser import CALENDAR_COLUMNS, iter_calendar_rows
+from event_index import IMPACT_NAMES
+from fetcher import fetcher_factory
+
+
+def log(message):
+    # stdout may carry the JSONL output
+    print(message, file=sys.stderr, flush=True)
+
+
+def isoformat(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+
+class JsonlSink:
+    def __init__(self, path="-"):
+        """
+        Writes every change as one JSON line.
+
+        :param path: File the lines are appended to, "-" for stdout.
+        """
+        self.file = sys.stdout if path == "-" else open(path, 'a')
+
+    def emit(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class UnixSocketSink:
+    def __init__(self, path):
+        """
+        Serves the changes as JSON lines to every client connected to a Unix socket.
+
+        :param path: Path of the socket, replaced if it exists.
+        """
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.clients = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.clients.append(client)
+
+    def emit(self, record):
+        line = (json.dumps(record) + "\n").encode()
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(line)
+                except OSError:
+                    # The client went away
+                    self.clients.remove(client)
+                    client.close()
+
+    def close(self):
+        self.server.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class WebhookSink:
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        """
+        POSTs every change as JSON to a URL, over a keep-alive session.
+
+        :param url: The webhook URL.
+        :param timeout: Request timeout in seconds.
+        """
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def emit(self, record):
+        try:
+            self.session.post(self.url, json=record, timeout=self.timeout).raise_for_status()
+        except requests.RequestException as e:
+            log(f"Webhook {self.url} failed: {e}")
+
+    def close(self):
+        self.session.close()
+
+
+def parse_page(html, target_date):
+    """
+    Read the events of a day or week page.
+
+    Args:
+        html (str): Page source of the calendar page.
+        target_date (date): A date of the page, for the year of its dates.
+
+    Returns:
+        pd.DataFrame: The CALENDAR_COLUMNS columns indexed by event_id, plus the scheduled
+        release time in UTC seconds (NaN for events without a clock time).
+    """
+    df = pd.DataFrame(list(iter_calendar_rows(html)), columns=CALENDAR_COLUMNS)
+    df = df.loc[df['event_id'] != "", :]
+    # Rows at the same time as the previous one have no time on the calendar
+    times = df['Time'].replace("", np.nan).ffill()
+    years = pd.Series(
+        [infer_year_month(text, target_date)[0] or target_date.year for text in df['Date']], index=df.index)
+    scheduled = convert_to_datetime_series(df['Date'], times, years)
+    clock_time = times.fillna("").str.contains(r"\d:\d\d", regex=True).to_numpy()
+    seconds = scheduled.to_numpy(dtype='datetime64[ns]').view(np.int64) / 1e9
+    df['scheduled'] = np.where(clock_time & ~pd.isna(scheduled), seconds, np.nan)
+    return df.set_index('event_id')
+
+
+class CalendarWatcher:
+    def __init__(
+            self,
+            fetcher_factory,
+            sinks,
+            period=WATCH_PERIOD,
+            url=REQUEST_URL,
+            currencies=None,
+            impacts=None,
+            fast_interval=WATCH_FAST_INTERVAL,
+            slow_interval=WATCH_SLOW_INTERVAL,
+            lead_seconds=WATCH_LEAD_SECONDS,
+            release_timeout=WATCH_RELEASE_TIMEOUT,
+            clock=time.time
+    ):
+        """
+        Watches the current day or week of the calendar and emits the Actual values as
+        they are published.
+
+        One fetcher (browser or HTTP session) is kept warm between polls. Polls are fast
+        from lead_seconds before a scheduled release until its Actual appears, and slow
+        otherwise. Rows are diffed by event_id.
+
+        :param fetcher_factory: Callable creating the fetcher, as returned by fetcher.fetcher_factory.
+        :param sinks: Objects with emit(record) and close(), e.g. JsonlSink.
+        :param period: "day" or "week".
+        :param url: Base calendar URL.
+        :param currencies: Currencies to watch (optional, default all).
+        :param impacts: Impacts to watch: High, Medium, Low, Holiday (optional, default all).
+        :param fast_interval: Seconds between polls around a release.
+        :param slow_interval: Longest wait between two polls in seconds.
+        :param lead_seconds: Fast polling starts this many seconds before a release.
+        :param release_timeout: Fast polling for a release stops after this many seconds.
+        :param clock: Returns the current time in seconds, for tests.
+        """
+        self.fetcher_factory = fetcher_factory
+        self.fetcher = None
+        self.sinks = sinks
+        self.period = period
+        self.url = url
+        self.currencies = set(currencies) if currencies else None
+        self.impacts = set(impacts) if impacts else None
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.lead_seconds = lead_seconds
+        self.release_timeout = release_timeout
+        self.clock = clock
+
+        # event_id -> Actual of the previous poll, None before the first poll
+        self.actuals = None
+        self.events = None
+        self.failures = 0
+        self.latencies = []
+
+    def watched(self, df):
+        impacts = df['Impact'].map(IMPACT_NAMES).fillna(df['Impact'])
+        keep = np.ones(len(df), dtype=bool)
+        if self.currencies is not None:
+            keep &= df['Currency'].isin(self.currencies).to_numpy()
+        if self.impacts is not None:
+            keep &= impacts.isin(self.impacts).to_numpy()
+        return df.loc[keep, :]
+
+    def fetch(self, target_date):
+        if self.fetcher is None:
+            self.fetcher = self.fetcher_factory()
+            if self.fetcher is None:
+                raise RuntimeError("The fetcher could not be created")
+        _, _, url = generate_partial_target(self.period, target_date, url=self.url)
+        return self.fetcher.fetch(url)
+
+    def diff(self, df, detected_at, fetch_seconds):
+        """
+        Compare the events of a poll with the previous poll.
+
+        Args:
+            df (pd.DataFrame): The events as returned by parse_page.
+            detected_at (float): Time the page was loaded, in seconds.
+            fetch_seconds (float): Time spent loading and parsing the page.
+
+        Returns:
+            list: One record per event whose Actual appeared or was revised, without
+            the emit time and latency, added by poll().
+        """
+        records = []
+        if self.actuals is not None:
+            for event_id, event in df.iterrows():
+                # Events first seen in this poll (e.g. after midnight) are the new baseline
+                if event_id not in self.actuals:
+                    continue
+                actual = event['Actual']
+                previous_actual = self.actuals[event_id]
+                if actual == "" or actual == previous_actual:
+                    continue
+
+                scheduled = event['scheduled']
+                records.append({
+                    'type': "actual" if previous_actual == "" else "revision",
+                    'event_id': int(event_id),
+                    'currency': event['Currency'],
+                    'impact': IMPACT_NAMES.get(event['Impact'], event['Impact']),
+                    'title': event['Description'],
+                    'actual': actual,
+                    'previous_actual': previous_actual,
+                    'forecast': event['Forecast'],
+                    'previous': event['Previous'],
+                    'scheduled': None if np.isnan(scheduled) else isoformat(scheduled),
+                    'detected_at': isoformat(detected_at),
+                    'fetch_seconds': round(fetch_seconds, 3),
+                })
+        self.actuals = df['Actual'].to_dict()
+        self.events = df
+        return records
+
+    def poll(self):
+        """
+        Load the page once and emit the changes.
+
+        Returns:
+            list: The emitted records.
+        """
+        start = self.clock()
+        target_date = date.fromtimestamp(start)
+        df = self.watched(parse_page(self.fetch(target_date), target_date))
+        detected_at = self.clock()
+        records = self.diff(df, detected_at, detected_at - start)
+
+        for record in records:
+            emitted_at = self.clock()
+            record['emitted_at'] = isoformat(emitted_at)
+            # Release to emit, including the sinks of the records before this one
+            record['latency_seconds'] = None
+            if record['scheduled'] is not None:
+                record['latency_seconds'] = round(
+                    emitted_at - datetime.fromisoformat(record['scheduled']).timestamp(), 3)
+                if record['type'] == "actual":
+                    self.latencies.append(record['latency_seconds'])
+            for sink in self.sinks:
+                sink.emit(record)
+            log(f"{record['currency']} {record['title']}: {record['actual']} "
+                f"(forecast {record['forecast']}, latency {record['latency_seconds']}s)")
+        return records
+
+    def next_delay(self, now):
+        """
+        Seconds to wait before the next poll.
+
+        Polls are fast while a watched release without Actual is due in less than
+        lead_seconds or overdue by less than release_timeout. Otherwise the watcher
+        sleeps until the next release is lead_seconds away, at most slow_interval.
+
+        Args:
+            now (float): The current time in seconds.
+
+        Returns:
+            float: The delay.
+        """
+        if self.events is None or self.events.empty:
+            return self.slow_interval
+        pending = self.events.loc[self.events['Actual'] == "", 'scheduled'].dropna().to_numpy()
+        pending = pending[pending > now - self.release_timeout]
+        if len(pending) == 0:
+            return self.slow_interval
+
+        next_release = pending.min()
+        if next_release - self.lead_seconds <= now:
+            return self.fast_interval
+        return max(self.fast_interval, min(self.slow_interval, next_release - self.lead_seconds - now))
+
+    def run(self, max_polls=None):
+        """
+        Poll until interrupted (or max_polls polls), then close the sinks.
+
+        Args:
+            max_polls (int): Number of polls to run (optional, default forever).
+        """
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                try:
+                    self.poll()
+                    self.failures = 0
+                except Exception as e:
+                    self.failures += 1
+                    log(f"Poll failed ({self.failures} in a row): {e}")
+                    if self.failures >= WATCH_MAX_FAILURES and self.fetcher is not None:
+                        # Start again with a fresh browser or session
+                        self.fetcher.quit()
+                        self.fetcher = None
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.next_delay(self.clock()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.fetcher is not None:
+                self.fetcher.quit()
+            for sink in self.sinks:
+                sink.close()
+            self.report()
+
+    def report(self):
+        if self.latencies:
+            latencies = np.array(self.latencies)
+            log(f"{len(latencies)} releases, release-to-emit latency median {np.median(latencies):.1f}s, "
+                f"p95 {np.percentile(latencies, 95):.1f}s, max {latencies.max():.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the calendar and emit the Actual values as they are released.")
+    parser.add_argument("--period", choices=["day", "week"], default=WATCH_PERIOD,
+                        help="Calendar page to watch, for the current date")
+    parser.add_argument("--fetcher", choices=["selenium", "http"], default=FETCHER_BACKEND,
+                        help="How calendar pages are loaded")
+    parser.add_argument("--url", default=REQUEST_URL, help="Base calendar URL, e.g. a local stub server")
+    parser.add_argument("--currency", nargs="+", help="Currencies to watch (default: all)")
+    parser.add_argument("--impact", nargs="+", choices=sorted(set(IMPACT_NAMES.values())),
+                        help="Impacts to watch (default: all)")
+    parser.add_argument("--jsonl", default="-", help="File the changes are appended to, - for stdout")
+    parser.add_argument("--socket", help="Unix socket serving the changes to connected clients")
+    parser.add_argument("--webhook", help="URL every change is POSTed to")
+    parser.add_argument("--fast", type=float, default=WATCH_FAST_INTERVAL, help="Seconds between polls around a release")
+    parser.add_argument("--slow", type=float, default=WATCH_SLOW_INTERVAL, help="Longest wait between polls")
+    args = parser.parse_args()
+
+    sinks = [JsonlSink(args.jsonl)]
+    if args.socket:
+        sinks.append(UnixSocketSink(args.socket))
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+
+    watcher = CalendarWatcher(
+        fetcher_factory(args.fetcher), sinks, period=args.period, url=args.url,
+        currencies=args.currency, impacts=args.impact, fast_interval=args.fast, slow_interval=args.slow)
+    watcher.run()
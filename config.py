@@ -50,3 +50,97 @@ ALLOWED_CURRENCY_CODES = ['CAD', 'EUR', 'GBP', 'USD', 'NZD']
 
 # THE NEWS EVENTS WITH IMPACTS, THAT I WANT TO SCRAPE
 ALLOWED_IMPACT_COLORS = ['High', 'Holiday']
+
+# Number of browsers scraping months in parallel
+NUM_WORKERS = 4
+
+# Waiting for the calendar to finish loading (seconds)
+SCROLL_INITIAL_DELAY = 0.1
+SCROLL_MAX_DELAY = 1.0
+SCROLL_STABLE_CHECKS = 3
+SCROLL_TIMEOUT = 60
+
+# How calendar pages are loaded: "selenium" (headless Chrome) or "http" (plain requests)
+FETCHER_BACKEND = "selenium"
+
+# Used by the "http" fetcher
+HTTP_TIMEOUT = 30
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Referer": "https://www.forexfactory.com/",
+}
+# Retries of a page that failed, timed out or came back without the calendar,
+# waiting HTTP_BACKOFF seconds before the first one, doubled on every retry
+HTTP_MAX_RETRIES = 2
+HTTP_BACKOFF = 1.0
+
+# Months older than this many months before the current one are considered final
+# and skipped when their saved file matches the manifest
+MANIFEST_HORIZON_MONTHS = 1
+
+# Raw HTML of every fetched page, for reparsing without the browser
+SNAPSHOT_FOLDER_NAME = "snapshots"
+
+# Times a month is tried before the backfill gives up on it
+JOB_MAX_ATTEMPTS = 3
+
+# Event details ("Usual Effect") requests
+DETAILS_URL_FORMAT = "https://www.forexfactory.com/calendar/details/1-{}"
+DETAILS_MAX_WORKERS = 8
+DETAILS_MAX_RETRIES = 3
+DETAILS_BACKOFF = 1.0
+
+# "Usual Effect" cache shared across months and runs
+CRITERIA_CACHE_FILE = "high_impact_news/criteria_cache.json"
+CRITERIA_CACHE_TTL_DAYS = 90
+CRITERIA_CACHE_MAX_ENTRIES = 50000
+
+# Format of the month files of every stage: "csv" or "parquet" (typed, needs pyarrow)
+STORAGE_FORMAT = "csv"
+PARQUET_COMPRESSION = "zstd"
+
+# Events buffered by the Parquet and SQLite sinks of event_stream.py before a write
+EVENT_BATCH_SIZE = 10000
+
+# SQLite database of the calendar events, upserted by event_id (event_db.py)
+EVENT_DB_FILE = "events.db"
+
+# Memory-mapped copies of the price CSV exports, inside DATA_FOLDER_NAME
+PRICE_CACHE_FOLDER_NAME = "price_cache"
+
+# How news are matched to price bars: "backward" takes the bar the event falls in,
+# "forward" the first bar opened at or after it
+PRICE_JOIN_DIRECTION = "backward"
+
+# Price merge and evaluation (merge_price_w_news.py, evaluate_dataset.py)
+DATA_FOLDER_NAME = "."
+FILTER_NEWS_W_PRICE_FOLDER_NAME = "news_w_price"
+SELECTED_CURRENCY_PAIRS = ['EURUSD', 'GBPUSD', 'USDCAD', 'NZDUSD']
+
+# Number of pairs merged or evaluated in parallel, None for one per CPU
+NUM_PROCESSES = None
+
+# Fingerprints of the inputs of every pipeline.py partition that ran
+PIPELINE_STATE_FILE = "pipeline_state.json"
+
+# Google Drive uploads
+DRIVE_MAX_WORKERS = 4
+DRIVE_MAX_RETRIES = 5
+DRIVE_BACKOFF = 1.0
+
+# Live calendar watcher (calendar_watcher.py): poll every WATCH_SLOW_INTERVAL seconds,
+# every WATCH_FAST_INTERVAL seconds from WATCH_LEAD_SECONDS before a release until its
+# Actual is published or WATCH_RELEASE_TIMEOUT seconds have passed
+WATCH_PERIOD = "day"
+WATCH_SLOW_INTERVAL = 60
+WATCH_FAST_INTERVAL = 2
+WATCH_LEAD_SECONDS = 30
+WATCH_RELEASE_TIMEOUT = 600
+# The fetcher is recreated after this many failed polls in a row
+WATCH_MAX_FAILURES = 3
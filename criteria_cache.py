@@ -0,0 +1,112 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+from config import CRITERIA_CACHE_FILE, CRITERIA_CACHE_TTL_DAYS, CRITERIA_CACHE_MAX_ENTRIES
+
+
+def title_key(currency, title):
+    return f"{str(currency).strip()}|{str(title).strip()}"
+
+
+class CriteriaCache:
+    def __init__(
+            self,
+            path=CRITERIA_CACHE_FILE,
+            ttl_days=CRITERIA_CACHE_TTL_DAYS,
+            max_entries=CRITERIA_CACHE_MAX_ENTRIES
+    ):
+        """
+        On-disk cache of the "Usual Effect" of events, keyed by event ID.
+
+        Recurring events (e.g. "USD|Non-Farm Employment Change") share the same spec,
+        so a second index by currency and title answers lookups for occurrences that
+        were never fetched themselves.
+
+        :param path: Path of the JSON cache file.
+        :param ttl_days: Entries older than this are fetched again.
+        :param max_entries: Least recently used entries are evicted above this size.
+        """
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.events = {}
+        self.titles = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.events = data.get("events", {})
+            self.titles = data.get("titles", {})
+
+    def _is_fresh(self, entry, now):
+        return now - datetime.fromisoformat(entry['fetched_at']) <= self.ttl
+
+    def get(self, event_id, currency=None, title=None):
+        """
+        Look up the criteria of an event, or of a sibling occurrence of the same event.
+
+        Args:
+            event_id: The calendar event ID.
+            currency (str): The event currency, for the sibling lookup.
+            title (str): The event title, for the sibling lookup.
+
+        Returns:
+            tuple: (raw spec text, criteria value), or None on a miss.
+        """
+        now = datetime.now()
+        entry = self.events.get(str(event_id))
+        if (entry is None or not self._is_fresh(entry, now)) and currency is not None and title is not None:
+            sibling_id = self.titles.get(title_key(currency, title))
+            entry = self.events.get(sibling_id) if sibling_id is not None else None
+
+        if entry is None or not self._is_fresh(entry, now):
+            return None
+        entry['last_used'] = now.isoformat(timespec='seconds')
+        return entry['raw_criteria'], entry['criteria']
+
+    def put(self, event_id, raw_criteria, criteria, currency=None, title=None):
+        """
+        Store the criteria of a fetched event.
+
+        Args:
+            event_id: The calendar event ID.
+            raw_criteria (str): The raw "Usual Effect" text.
+            criteria (int): The criteria value.
+            currency (str): The event currency.
+            title (str): The event title.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        self.events[str(event_id)] = {
+            'raw_criteria': raw_criteria,
+            'criteria': criteria,
+            'currency': currency,
+            'title': title,
+            'fetched_at': now,
+            'last_used': now,
+        }
+        if currency is not None and title is not None:
+            self.titles[title_key(currency, title)] = str(event_id)
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        now = datetime.now()
+        self.events = {
+            event_id: entry for event_id, entry in self.events.items()
+            if self._is_fresh(entry, now)
+        }
+        if len(self.events) > self.max_entries:
+            kept = sorted(
+                self.events.items(), key=lambda item: item[1]['last_used'], reverse=True
+            )[:self.max_entries]
+            self.events = dict(kept)
+        self.titles = {
+            key: event_id for key, event_id in self.titles.items() if event_id in self.events
+        }
+
+    def save(self):
+        self.evict()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"events": self.events, "titles": self.titles}, f)
+        os.replace(temp_path, self.path)
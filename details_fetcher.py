@@ -0,0 +1,164 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import DETAILS_URL_FORMAT, DETAILS_MAX_WORKERS, DETAILS_MAX_RETRIES, DETAILS_BACKOFF, HTTP_HEADERS, HTTP_TIMEOUT
+
+
+def parse_usual_effect(json_data):
+    """
+    Read the "Usual Effect" spec of an event details response.
+
+    Args:
+        json_data (dict): The decoded details response.
+
+    Returns:
+        tuple: (raw spec text, 1 if higher than forecast is good for the currency,
+        -1 if lower is good, 0 otherwise).
+    """
+    usual_effect_raw_value = ""
+    usual_effect_value = 0
+    specs_data = json_data.get("data", {}).get('specs', [])
+
+    for spec in specs_data:
+        if "Usual Effect" == spec["title"].strip():
+            usual_effect_raw_value = spec["html"]
+            if usual_effect_raw_value == "'Actual' greater than 'Forecast' is good for currency;":
+                usual_effect_value = 1
+            elif usual_effect_raw_value == "'Actual' less than 'Forecast' is good for currency;":
+                usual_effect_value = -1
+            else:
+                usual_effect_value = 0
+    return usual_effect_raw_value, usual_effect_value
+
+
+class DetailsFetcher:
+    def __init__(
+            self,
+            url_format=DETAILS_URL_FORMAT,
+            max_workers=DETAILS_MAX_WORKERS,
+            max_retries=DETAILS_MAX_RETRIES,
+            backoff=DETAILS_BACKOFF,
+            headers=HTTP_HEADERS,
+            timeout=HTTP_TIMEOUT,
+            cache=None
+    ):
+        """
+        Fetches event details pages concurrently over one keep-alive connection pool.
+
+        :param url_format: Details URL with a {} placeholder for the event ID.
+        :param max_workers: Maximum number of requests in flight.
+        :param max_retries: Number of retries of a request that did not return 200.
+        :param backoff: Wait before the first retry in seconds, doubled on every retry.
+        :param headers: Headers sent with every request.
+        :param timeout: Request timeout in seconds.
+        :param cache: CriteriaCache consulted before any request (optional).
+        """
+        self.url_format = url_format
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch_details(self, event_id):
+        """
+        Fetch the details of one event, retrying with exponential backoff.
+
+        :param event_id: The calendar event ID.
+        :return: The decoded JSON response, or None if every attempt failed.
+        """
+        request_url = self.url_format.format(event_id)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self.session.get(request_url, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Request failed. {request_url}: {e}")
+                continue
+
+            if response.status_code != 200:
+                print(f"Request failed. Status code: {response.status_code}")
+                continue
+
+            # A 200 can still be a challenge page instead of the details
+            try:
+                json_data = json.loads(response.text)
+            except ValueError:
+                print(f"Request failed. {request_url}: response is not JSON")
+                continue
+            if not isinstance(json_data, dict):
+                print(f"Request failed. {request_url}: unexpected response")
+                continue
+            return json_data
+        return None
+
+    def fetch_usual_effect(self, event_id):
+        """
+        Fetch the "Usual Effect" of one event.
+
+        :param event_id: The calendar event ID.
+        :return: (raw spec text, criteria value), None if it could not be fetched.
+        """
+        json_data = self.fetch_details(event_id)
+        if json_data is None:
+            return None
+        return parse_usual_effect(json_data)
+
+    def fetch_usual_effects(self, event_ids, currencies=None, titles=None):
+        """
+        Fetch the "Usual Effect" of many events concurrently.
+
+        Events found in the cache are not requested. When currencies and titles are given,
+        occurrences of the same event share one request.
+
+        :param event_ids: Iterable of calendar event IDs.
+        :param currencies: Currency of every event (optional).
+        :param titles: Title of every event (optional).
+        :return: List of (raw spec text, criteria value), in the order of event_ids.
+            Events that could not be fetched get ("", 0).
+        """
+        event_ids = list(event_ids)
+        if currencies is not None and titles is not None:
+            keys = list(zip(currencies, titles))
+        else:
+            keys = [(None, None)] * len(event_ids)
+
+        results = [None] * len(event_ids)
+        # Request key -> positions sharing the response
+        requests_to_send = {}
+        for index, (event_id, (currency, title)) in enumerate(zip(event_ids, keys)):
+            if self.cache is not None:
+                results[index] = self.cache.get(event_id, currency, title)
+                if results[index] is not None:
+                    continue
+            request_key = (currency, title) if title is not None else event_id
+            requests_to_send.setdefault(request_key, []).append(index)
+
+        representatives = [event_ids[indexes[0]] for indexes in requests_to_send.values()]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = list(executor.map(self.fetch_usual_effect, representatives))
+
+        for indexes, usual_effect in zip(requests_to_send.values(), fetched):
+            if usual_effect is None:
+                usual_effect = ("", 0)
+            elif self.cache is not None:
+                currency, title = keys[indexes[0]]
+                self.cache.put(event_ids[indexes[0]], *usual_effect, currency=currency, title=title)
+            for index in indexes:
+                results[index] = usual_effect
+
+        print(f"{len(event_ids)} events, {len(representatives)} requests")
+        return results
+
+    def close(self):
+        self.session.close()
@@ -1,24 +1,92 @@
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from google.oauth2 import service_account
 
+from config import DRIVE_MAX_WORKERS, DRIVE_MAX_RETRIES, DRIVE_BACKOFF
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+# Rate limits and transient server errors. A 403 is only retried for a rate limit reason.
+RETRY_STATUS_CODES = {403, 429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+
+def guess_mimetype(file_path):
+    return MIME_TYPES.get(file_path.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def file_md5(file_path):
+    """MD5 of a file, the checksum Drive reports as md5Checksum."""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def error_status(error):
+    """HTTP status of a googleapiclient HttpError (or of a fake raising the same shape), else None."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return int(status) if status is not None else None
+
+
+def is_retryable(error):
+    status = error_status(error)
+    if status == 403:
+        content = getattr(error, "content", b"")
+        if isinstance(content, bytes):
+            content = content.decode(errors="replace")
+        return any(reason in str(content) for reason in RATE_LIMIT_REASONS)
+    return status in RETRY_STATUS_CODES
+
 
 class DriveUploader:
     def __init__(
             self,
             service_account_file="credentials.json",
-            root_folder_id="1SIG6fkN9l4DCYHFCW7PzTpWGr_WsGwYh"
+            root_folder_id="1SIG6fkN9l4DCYHFCW7PzTpWGr_WsGwYh",
+            service=None,
+            max_workers=DRIVE_MAX_WORKERS,
+            max_retries=DRIVE_MAX_RETRIES,
+            backoff=DRIVE_BACKOFF
     ):
         """
         Initializes the DriveUploader with authentication and service setup.
 
         :param service_account_file: Path to the Google service account credentials JSON file.
         :param root_folder_id: ID of the root folder where files and subfolders will be managed.
+        :param service: Drive v3 service to use instead of authenticating (e.g. a fake in tests).
+        :param max_workers: Maximum number of uploads running at once.
+        :param max_retries: Number of retries of a request rejected by the rate limit.
+        :param backoff: Wait before the first retry in seconds, doubled on every retry.
         """
         self.service_account_file = service_account_file
         self.root_folder_id = root_folder_id
-        self.creds = self.authenticate()
-        self.service = build("drive", "v3", credentials=self.creds)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._service = service
+        self.creds = None
+        if service is None:
+            self.creds = self.authenticate()
+        # The HTTP client of a built service is not thread-safe: one per thread
+        self._local = threading.local()
+
+        self.lock = threading.Lock()
+        # Folder name -> ID, and folder ID -> {file name: {"id", "md5Checksum"}}
+        self.folder_ids = None
+        self.folder_files = {}
 
     def authenticate(self):
         """Authenticates using a Google service account."""
@@ -28,6 +96,58 @@ class DriveUploader:
                 "https://www.googleapis.com/auth/drive"]
         )
 
+    @property
+    def service(self):
+        if self._service is not None:
+            return self._service
+        if getattr(self._local, "service", None) is None:
+            self._local.service = build("drive", "v3", credentials=self.creds, cache_discovery=False)
+        return self._local.service
+
+    def execute(self, request):
+        """
+        Executes a Drive request, retrying with exponential backoff when it is rate limited.
+
+        :param request: The request, e.g. service.files().list(...).
+        :return: The response.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request.execute()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"Drive request failed with status {error_status(e)}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def list_children(self, parent_folder_id, folders=False):
+        """
+        Lists the files or folders of a folder in as few requests as possible.
+
+        :param parent_folder_id: The ID of the folder.
+        :param folders: List the subfolders instead of the files.
+        :return: Dictionary of name -> ID for folders, name -> {"id", "md5Checksum"} for files.
+        """
+        query = f"'{parent_folder_id}' in parents and trashed = false"
+        query += f" and mimeType {'=' if folders else '!='} '{FOLDER_MIME_TYPE}'"
+
+        children = {}
+        page_token = None
+        while True:
+            results = self.execute(self.service.files().list(
+                q=query, fields="nextPageToken, files(id, name, md5Checksum)", pageSize=1000,
+                pageToken=page_token))
+            for file in results.get("files", []):
+                if folders:
+                    children.setdefault(file["name"], file["id"])
+                else:
+                    children.setdefault(
+                        file["name"], {"id": file["id"], "md5Checksum": file.get("md5Checksum")})
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                return children
+
     def search_drive(self, parent_folder_id, **params):
         """
         Searches for a file or folder in Google Drive.
@@ -37,13 +157,13 @@ class DriveUploader:
         :return: File or folder ID if found, else None.
         """
         name = params.get('file_name') or params.get('folder_name', '')
-        mime_type = 'application/vnd.google-apps.folder' if 'folder_name' in params else ''
+        mime_type = FOLDER_MIME_TYPE if 'folder_name' in params else ''
 
         query = f"name = '{name}' and '{parent_folder_id}' in parents and trashed = false"
         if mime_type:
             query += f" and mimeType = '{mime_type}'"
 
-        results = self.service.files().list(q=query, fields="files(id)").execute()
+        results = self.execute(self.service.files().list(q=query, fields="files(id)"))
         files = results.get("files", [])
         return files[0]["id"] if files else None
 
@@ -59,19 +179,47 @@ class DriveUploader:
         folder_metadata = {
             "name": folder_name,
             "parents": [parent_folder_id],
-            "mimeType": "application/vnd.google-apps.folder"
+            "mimeType": FOLDER_MIME_TYPE
         }
-        folder = self.service.files().create(body=folder_metadata, fields="id").execute()
+        folder = self.execute(self.service.files().create(body=folder_metadata, fields="id"))
         print(f"Created folder '{folder_name}' with ID: {folder.get('id')}")
         return folder.get("id")
 
+    def get_folder_id(self, folder_name):
+        """
+        Returns the ID of a folder of the root folder, creating it if needed.
+
+        All the folders of the root are listed with the first lookup and cached.
+
+        :param folder_name: Name of the folder.
+        :return: The ID of the folder.
+        """
+        with self.lock:
+            if self.folder_ids is None:
+                self.folder_ids = self.list_children(self.root_folder_id, folders=True)
+            if folder_name not in self.folder_ids:
+                self.folder_ids[folder_name] = self.create_folder(folder_name)
+            return self.folder_ids[folder_name]
+
+    def get_folder_files(self, folder_id):
+        """
+        Returns the files of a folder, listed once and then cached.
+
+        :param folder_id: The ID of the folder.
+        :return: Dictionary of file name -> {"id", "md5Checksum"}.
+        """
+        with self.lock:
+            if folder_id not in self.folder_files:
+                self.folder_files[folder_id] = self.list_children(folder_id)
+            return self.folder_files[folder_id]
+
     def delete_permanently(self, file_id):
         """
         Permanently deletes a file from Google Drive.
 
         :param file_id: ID of the file to delete.
         """
-        self.service.files().delete(fileId=file_id).execute()
+        self.execute(self.service.files().delete(fileId=file_id))
         print(f"Deleted existing file with ID: {file_id}")
 
     def update_file(self, file_path):
@@ -88,7 +236,7 @@ class DriveUploader:
             parent_folder_id=self.root_folder_id, file_name=file_name)
 
         # Define metadata for the new file
-        media = MediaFileUpload(file_path, mimetype="text/csv")
+        media = MediaFileUpload(file_path, mimetype=guess_mimetype(file_path))
 
         # Upload the new file
         created_file = {}
@@ -97,18 +245,18 @@ class DriveUploader:
                 "name": file_name,
                 "addParents": [self.root_folder_id]
             }
-            created_file = self.service.files().update(
+            created_file = self.execute(self.service.files().update(
                 fileId=existing_file_id,
                 body=file_metadata,
                 media_body=media,
-                fields="id").execute()
+                fields="id"))
         else:
             file_metadata = {
                 "name": file_name,
                 "parents": [self.root_folder_id]
             }
-            created_file = self.service.files().create(
-                body=file_metadata, media_body=media, fields="id").execute()
+            created_file = self.execute(self.service.files().create(
+                body=file_metadata, media_body=media, fields="id"))
 
         print(
             f"File uploaded successfully to folder, File ID: {created_file.get('id')}")
@@ -125,32 +273,125 @@ class DriveUploader:
         file_name = file_path.split("/")[-1]
 
         # Check if folder exists; create it if not
-        folder_id = self.search_drive(
-            parent_folder_id=self.root_folder_id, folder_name=folder_name)
-        if not folder_id:
-            folder_id = self.create_folder(folder_name)
+        folder_id = self.get_folder_id(folder_name)
 
         # Check if file exists; delete it if found
-        existing_file_id = self.search_drive(
-            parent_folder_id=folder_id, file_name=file_name)
-        if existing_file_id:
-            self.delete_permanently(existing_file_id)
+        folder_files = self.get_folder_files(folder_id)
+        existing_file = folder_files.get(file_name)
+        if existing_file:
+            self.delete_permanently(existing_file["id"])
 
         # Define metadata for the new file
         file_metadata = {
             "name": file_name,
             "parents": [folder_id]
         }
-        media = MediaFileUpload(file_path, mimetype="text/csv")
+        media = MediaFileUpload(file_path, mimetype=guess_mimetype(file_path))
 
         # Upload the new file
-        created_file = self.service.files().create(
-            body=file_metadata, media_body=media, fields="id").execute()
+        created_file = self.execute(self.service.files().create(
+            body=file_metadata, media_body=media, fields="id, md5Checksum"))
+        with self.lock:
+            folder_files[file_name] = {"id": created_file.get("id"), "md5Checksum": created_file.get("md5Checksum")}
 
         print(
             f"File uploaded successfully to folder '{folder_name}', File ID: {created_file.get('id')}")
         return created_file.get("id")
 
+    def upload_or_update_file(self, file_path, folder_name):
+        """
+        Uploads a file to a specific Google Drive folder, overwriting the content of the
+        existing file in place so its ID does not change.
+
+        :param file_path: Path to the file to upload.
+        :param folder_name: Name of the folder where the file will be uploaded.
+        :return: The ID of the uploaded file.
+        """
+        file_name = file_path.split("/")[-1]
+        folder_id = self.get_folder_id(folder_name)
+        folder_files = self.get_folder_files(folder_id)
+        existing_file = folder_files.get(file_name)
+        media = MediaFileUpload(file_path, mimetype=guess_mimetype(file_path))
+
+        if existing_file:
+            uploaded_file = self.execute(self.service.files().update(
+                fileId=existing_file["id"], media_body=media, fields="id, md5Checksum"))
+        else:
+            file_metadata = {
+                "name": file_name,
+                "parents": [folder_id]
+            }
+            uploaded_file = self.execute(self.service.files().create(
+                body=file_metadata, media_body=media, fields="id, md5Checksum"))
+        with self.lock:
+            folder_files[file_name] = {"id": uploaded_file.get("id"), "md5Checksum": uploaded_file.get("md5Checksum")}
+
+        print(
+            f"File {'updated' if existing_file else 'uploaded'} successfully in folder '{folder_name}', "
+            f"File ID: {uploaded_file.get('id')}")
+        return uploaded_file.get("id")
+
+    def upload_files(self, uploads):
+        """
+        Uploads many files concurrently, at most max_workers at a time.
+
+        :param uploads: Iterable of (file_path, folder_name).
+        :return: List of the uploaded file IDs, in the order of uploads (None if an upload failed).
+        """
+        def upload(item):
+            file_path, folder_name = item
+            try:
+                return self.upload_or_update_file(file_path, folder_name)
+            except Exception as e:
+                print(f"Upload of {file_path} failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(upload, uploads))
+
+    def sync_file(self, file_path, folder_name):
+        """
+        Uploads a file only if it is missing from the folder or its content differs.
+
+        :param file_path: Path to the local file.
+        :param folder_name: Name of the folder where the file belongs.
+        :return: (file ID, status) with status "unchanged", "updated" or "created".
+        """
+        file_name = file_path.split("/")[-1]
+        folder_files = self.get_folder_files(self.get_folder_id(folder_name))
+        remote_file = folder_files.get(file_name)
+        if remote_file and remote_file.get("md5Checksum") == file_md5(file_path):
+            return remote_file["id"], "unchanged"
+        file_id = self.upload_or_update_file(file_path, folder_name)
+        return file_id, "updated" if remote_file else "created"
+
+    def sync_files(self, uploads):
+        """
+        Brings the Drive folders in line with the local files, at most max_workers uploads at a time.
+
+        Every folder is listed once; files whose local MD5 matches the remote md5Checksum
+        are skipped and changed files are updated in place.
+
+        :param uploads: Iterable of (file_path, folder_name).
+        :return: List of (file ID, status) in the order of uploads, (None, "failed") if an upload failed.
+        """
+        def sync(item):
+            file_path, folder_name = item
+            try:
+                return self.sync_file(file_path, folder_name)
+            except Exception as e:
+                print(f"Sync of {file_path} failed: {e}")
+                return None, "failed"
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(sync, uploads))
+
+        counts = {}
+        for _, status in results:
+            counts[status] = counts.get(status, 0) + 1
+        print(f"Drive sync: {', '.join(f'{count} {status}' for status, count in sorted(counts.items()))}")
+        return results
+
 
 # Example Usage
 if __name__ == "__main__":
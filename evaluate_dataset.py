@@ -1,15 +1,31 @@
 import os
-import pandas as pd
-from evaluation.utils import IMAGE_FOLDER, evaluate, get_direction_value, get_groupby_values
-from config import FILTER_NEWS_W_PRICE_FOLDER_NAME, DATA_FOLDER_NAME, ALLOWED_CURRENCY_CODES, SELECTED_CURRENCY_PAIRS
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation.utils import IMAGE_FOLDER, evaluate, get_direction_value
+from config import FILTER_NEWS_W_PRICE_FOLDER_NAME, DATA_FOLDER_NAME, ALLOWED_CURRENCY_CODES, SELECTED_CURRENCY_PAIRS, \
+    NUM_PROCESSES
+from event_store import load_frame
+from evaluation_engine import BarGroups, split_by_currency
 
 PERIOD = "PERIOD_H1"
 
-for CURRENCY_PAIR in SELECTED_CURRENCY_PAIRS:
+
+def evaluate_pair(CURRENCY_PAIR):
+    """
+    Evaluate the news of one pair and save the classification reports.
+
+    Args:
+        CURRENCY_PAIR (str): The pair, e.g. "EURUSD".
+
+    Returns:
+        list: The printed results, in evaluation order.
+    """
+    outputs = []
     os.makedirs(f"{IMAGE_FOLDER}/{CURRENCY_PAIR}", exist_ok=True)
 
-    price_news_df = pd.read_csv(
-        f"{DATA_FOLDER_NAME}/{FILTER_NEWS_W_PRICE_FOLDER_NAME}/{CURRENCY_PAIR}_{PERIOD}.csv")
+    price_news_df = load_frame(
+        f"{DATA_FOLDER_NAME}/{FILTER_NEWS_W_PRICE_FOLDER_NAME}/{CURRENCY_PAIR}_{PERIOD}")
 
     # Lọc ra những tin trong những cặp quan sát thôi
     price_news_df = price_news_df.loc[price_news_df["Currency"].isin(
@@ -21,6 +37,10 @@ for CURRENCY_PAIR in SELECTED_CURRENCY_PAIRS:
     price_news_df["price_direction"] = price_news_df["pctChg"].apply(
         lambda x: -get_direction_value(x))
 
+    # Every grouped view below aggregates the bars of this single grouping
+    bar_groups = BarGroups(price_news_df)
+    currency_news = split_by_currency(price_news_df)
+
     # Đánh giá toàn bộ các tin có ảnh hưởng tới giá không?
     total_naive_prediction_result = evaluate(
         price_news_df["price_direction"],
@@ -28,31 +48,27 @@ for CURRENCY_PAIR in SELECTED_CURRENCY_PAIRS:
         CURRENCY_PAIR,
         "total"
     )
-    print("TOTAL")
-    print(total_naive_prediction_result)
+    outputs.append(f"TOTAL\n{total_naive_prediction_result}")
     total_naive_prediction_result["classification_report"].to_csv(
         f"{IMAGE_FOLDER}/{CURRENCY_PAIR}/total_classification_report.csv")
 
     # Đánh giá toàn bộ các tin gộp theo giờ có ảnh hưởng thế nào giá không?
-    groupby_df = price_news_df.groupby(["DateTime"]).apply(get_groupby_values)
-    groupby_df = groupby_df.sort_index()
+    groupby_df = bar_groups.aggregate()
     groupby_naive_prediction_result = evaluate(
         groupby_df["price_direction"],
         groupby_df["Good_for_Currency"],
         CURRENCY_PAIR,
         "total_groupby"
     )
-    print("TOTAL GROUPBY")
-    print(groupby_naive_prediction_result)
+    outputs.append(f"TOTAL GROUPBY\n{groupby_naive_prediction_result}")
     groupby_naive_prediction_result["classification_report"].to_csv(
         f"{IMAGE_FOLDER}/{CURRENCY_PAIR}/total_groupby_classification_report.csv")
 
     for CURRENCY_CODE in ALLOWED_CURRENCY_CODES:
         # Đánh giá từng loại tin có ảnh hưởng tới giá không?
         if CURRENCY_CODE != "CURRENCY":
-            separate_price_news_df = price_news_df.loc[
-                price_news_df["Currency"]
-                == CURRENCY_CODE, :]
+            separate_price_news_df = currency_news.get(CURRENCY_CODE, price_news_df.iloc[0:0])
+            CURRENCY_CODES = [CURRENCY_CODE]
 
             separate_naive_prediction_result = evaluate(
                 separate_price_news_df["price_direction"],
@@ -61,27 +77,42 @@ for CURRENCY_PAIR in SELECTED_CURRENCY_PAIRS:
                 CURRENCY_CODE
             )
 
-            print(CURRENCY_CODE)
-            print(separate_naive_prediction_result)
+            outputs.append(f"{CURRENCY_CODE}\n{separate_naive_prediction_result}")
             separate_naive_prediction_result["classification_report"].to_csv(
                 f"{IMAGE_FOLDER}/{CURRENCY_PAIR}/{CURRENCY_CODE}_classification_report.csv")
         else:
             CURRENCY_CODE = CURRENCY_PAIR
             CURRENCY_CODES = [CURRENCY_PAIR[:3], CURRENCY_PAIR[3:]]
-            separate_price_news_df = price_news_df.loc[
-                (price_news_df["Currency"] == CURRENCY_CODES[0]) | ((price_news_df["Currency"] == CURRENCY_CODES[1])), :]
 
         # Đánh giá từng loại tin gộp theo giờ có ảnh hưởng thế nào giá không?
-        groupby_separate_price_news_df = separate_price_news_df.groupby(
-            ["DateTime"]).apply(get_groupby_values)
-        groupby_separate_price_news_df = groupby_separate_price_news_df.sort_index()
+        groupby_separate_price_news_df = bar_groups.aggregate(CURRENCY_CODES)
         groupby_separate_naive_prediction_result = evaluate(
             groupby_separate_price_news_df["price_direction"],
             groupby_separate_price_news_df["Good_for_Currency"],
             CURRENCY_PAIR,
             f"{CURRENCY_CODE}_groupby"
         )
-        print(f"{CURRENCY_CODE} groupby")
-        print(groupby_separate_naive_prediction_result)
+        outputs.append(f"{CURRENCY_CODE} groupby\n{groupby_separate_naive_prediction_result}")
         groupby_separate_naive_prediction_result["classification_report"].to_csv(
             f"{IMAGE_FOLDER}/{CURRENCY_PAIR}/groupby_{CURRENCY_CODE}_classification_report.csv")
+
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the effect of the news on the price of every pair.")
+    parser.add_argument(
+        "--workers", type=int, default=NUM_PROCESSES,
+        help="Number of pairs evaluated in parallel (default: one per CPU, 1 runs in this process)")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        results = [evaluate_pair(currency_pair) for currency_pair in SELECTED_CURRENCY_PAIRS]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            # map keeps the order of SELECTED_CURRENCY_PAIRS
+            results = list(executor.map(evaluate_pair, SELECTED_CURRENCY_PAIRS))
+
+    for outputs in results:
+        for output in outputs:
+            print(output)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+
+class BarGroups:
+    def __init__(self, price_news_df, time_column="BarDateTime"):
+        """
+        The news of a pair grouped once by price bar.
+
+        The bars are factorized and the rows sorted by bar a single time. Every grouped view
+        (all news, one currency, the two currencies of the pair) then only selects its rows
+        and aggregates them at the bar boundaries, instead of running its own groupby.apply.
+
+        :param price_news_df: The merged news and prices, with price_direction and
+            Good_for_Currency columns.
+        :param time_column: The column the news are grouped by.
+        """
+        codes, self.bar_times = pd.factorize(price_news_df[time_column], sort=True)
+        # Rows without a bar are left out, like groupby does
+        positions = np.flatnonzero(codes >= 0)
+        order = positions[np.argsort(codes[positions], kind="stable")]
+        df = price_news_df.iloc[order]
+        self.codes = codes[order]
+        self.currencies = df["Currency"].to_numpy()
+        self.price_directions = df["price_direction"].to_numpy()
+        # sum() skips missing values
+        self.good_values = np.nan_to_num(df["Good_for_Currency"].to_numpy(dtype=float))
+        self.time_column = time_column
+
+    def aggregate(self, currencies=None):
+        """
+        Reduce the news of every bar to one row, like evaluation.utils.get_groupby_values:
+        the price direction of the bar, and the sign of the summed Good_for_Currency of its news.
+
+        The bars are cut from the sorted rows and summed with np.add.reduceat, without
+        a Python call per bar.
+
+        Args:
+            currencies (list): Only aggregate the news of these currencies (optional, default all).
+
+        Returns:
+            pd.DataFrame: One row per bar with news, indexed by bar time and sorted, with
+            price_direction, Good_for_Currency and news_count columns.
+        """
+        codes, price_directions, good_values = self.codes, self.price_directions, self.good_values
+        if currencies is not None:
+            selected = np.isin(self.currencies, list(currencies))
+            codes, price_directions, good_values = codes[selected], price_directions[selected], good_values[selected]
+
+        starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+        good_sums = np.add.reduceat(good_values, starts) if len(starts) else good_values[:0]
+        return pd.DataFrame({
+            "price_direction": price_directions[starts],
+            "Good_for_Currency": np.sign(good_sums).astype(int),
+            "news_count": np.diff(np.append(starts, len(codes))),
+        }, index=pd.Index(self.bar_times[codes[starts]], name=self.time_column))
+
+
+def split_by_currency(price_news_df):
+    """
+    Split the news rows by currency in one pass.
+
+    Args:
+        price_news_df (pd.DataFrame): The merged news and prices.
+
+    Returns:
+        dict: Currency -> its news rows. Currencies without news are missing.
+    """
+    return {
+        currency: currency_df
+        for currency, currency_df in price_news_df.groupby("Currency", sort=False, observed=True)
+    }
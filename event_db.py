@@ -0,0 +1,262 @@
+import time
+import sqlite3
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import EVENT_DB_FILE
+from manifest import file_hash
+from event_store import list_month_files, load_month_frame, to_typed
+
+# Columns of the events table: the raw_news/ columns, the criteria added by
+# get_criteria_data.py and the typed columns of event_store.to_typed
+EVENT_COLUMNS = {
+    'event_id': 'INTEGER PRIMARY KEY',
+    'datetime': 'INTEGER',
+    'Currency': 'TEXT',
+    'Impact': 'TEXT',
+    'Date': 'TEXT',
+    'Time': 'TEXT',
+    'Description': 'TEXT',
+    'Actual': 'TEXT',
+    'Forecast': 'TEXT',
+    'Previous': 'TEXT',
+    'actual_value': 'REAL',
+    'forecast_value': 'REAL',
+    'previous_value': 'REAL',
+    'raw_criteria': 'TEXT',
+    'criteria': 'INTEGER',
+    'year': 'INTEGER',
+    'month': 'INTEGER',
+}
+
+SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS events ({', '.join(f'{column} {kind}' for column, kind in EVENT_COLUMNS.items())})",
+    "CREATE INDEX IF NOT EXISTS events_datetime ON events (datetime, Currency, Impact)",
+    # "All High impact USD events between two dates": equality columns first
+    "CREATE INDEX IF NOT EXISTS events_currency_impact ON events (Currency, Impact, datetime)",
+    "CREATE INDEX IF NOT EXISTS events_month ON events (year, month)",
+    "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, content_hash TEXT)",
+]
+
+
+def to_seconds(datetimes):
+    """UTC datetimes as Unix seconds, None where missing."""
+    return [None if pd.isna(value) else int(value.timestamp()) for value in pd.to_datetime(pd.Series(datetimes), utc=True)]
+
+
+class EventDatabase:
+    def __init__(self, path=EVENT_DB_FILE):
+        """
+        SQLite store of the calendar events, one row per event_id.
+
+        Months are upserted as they are scraped, so a query only reads the rows it
+        needs through the (datetime, Currency, Impact) indexes instead of every month file.
+        The connection can be shared by threads; writes are serialized.
+
+        :param path: Path of the database file.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # Readers are not blocked by a running upsert
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def upsert_frame(self, df, year, month=None, previous_time=None):
+        """
+        Insert the events of a month frame, or update them if their event_id is known.
+
+        Only the columns of the frame are written, so upserting the high_impact_news/
+        rows adds the criteria without touching the other columns.
+
+        Args:
+            df (pd.DataFrame): A raw_news/ or high_impact_news/ month frame.
+            year (int): The year of the month.
+            month (int): The month number (optional).
+            previous_time (str): Time of the row before the frame, when it continues a month.
+
+        Returns:
+            int: Number of events written. Rows without an event_id are skipped.
+        """
+        df = to_typed(df, year, previous_time=previous_time)
+        df = df.loc[df['event_id'].notna(), :]
+        df['year'] = year
+        if month is not None:
+            df['month'] = month
+
+        columns = [column for column in EVENT_COLUMNS if column in df]
+        values = {}
+        for column in columns:
+            if column == 'datetime':
+                values[column] = to_seconds(df[column])
+            elif EVENT_COLUMNS[column] == 'REAL':
+                values[column] = [None if np.isnan(value) else float(value) for value in df[column].astype(float)]
+            elif EVENT_COLUMNS[column].startswith('INTEGER'):
+                values[column] = [None if pd.isna(value) else int(value) for value in df[column]]
+            else:
+                values[column] = [None if pd.isna(value) else str(value) for value in df[column].astype(object)]
+        rows = list(zip(*(values[column] for column in columns)))
+
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != 'event_id')
+        statement = (
+            f"INSERT INTO events ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(event_id) DO UPDATE SET {updates}")
+        with self.lock, self.connection:
+            self.connection.executemany(statement, rows)
+        return len(rows)
+
+    def prune_month(self, year, month, event_ids, dates=None):
+        """
+        Delete the events of a month that are no longer on its calendar page.
+
+        Args:
+            year (int): The year of the month.
+            month (int): The month number.
+            event_ids (iterable): The event IDs of the freshly scraped month.
+            dates (list): Only prune these days, as in the Date column (optional, default
+                the whole month), e.g. the days of a week or day refresh.
+
+        Returns:
+            int: Number of events deleted.
+        """
+        query = "SELECT event_id FROM events WHERE year = ? AND month = ?"
+        parameters = [year, month]
+        if dates is not None:
+            query += f" AND Date IN ({', '.join('?' * len(dates))})"
+            parameters.extend(dates)
+        known = {row[0] for row in self.connection.execute(query, parameters)}
+        removed = [(event_id,) for event_id in known - {int(event_id) for event_id in event_ids}]
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM events WHERE event_id = ?", removed)
+        return len(removed)
+
+    def import_month_files(self, folder_name, prune=False):
+        """
+        Upsert the month files of a stage that changed since they were last imported.
+
+        Args:
+            folder_name (str): The stage folder (raw_news or high_impact_news).
+            prune (bool): Delete the events missing from the files (for full months, i.e. raw_news).
+
+        Returns:
+            int: Number of months imported.
+        """
+        imported = 0
+        for year, month, file_path in list_month_files(folder_name):
+            content_hash = file_hash(file_path)
+            row = self.connection.execute(
+                "SELECT content_hash FROM sources WHERE path = ?", (file_path,)).fetchone()
+            if row is not None and row[0] == content_hash:
+                continue
+
+            df = load_month_frame(file_path)
+            self.upsert_frame(df, year, month)
+            if prune:
+                event_ids = pd.to_numeric(df['event_id'], errors='coerce').dropna()
+                self.prune_month(year, month, event_ids)
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO sources (path, content_hash) VALUES (?, ?)", (file_path, content_hash))
+            imported += 1
+        return imported
+
+    def query(self, currencies=None, impacts=None, start=None, end=None, columns=None, with_criteria=False):
+        """
+        Read the events of the given currencies and impacts in a period.
+
+        Args:
+            currencies (list): Currencies to keep (optional).
+            impacts (list): Impacts to keep, as written on the calendar (optional).
+            start (str or pd.Timestamp): First datetime to keep, UTC (optional).
+            end (str or pd.Timestamp): Datetimes from this one on are dropped, UTC (optional).
+            columns (list): Columns to read (optional, default all).
+            with_criteria (bool): Only keep the events that have their criteria.
+
+        Returns:
+            pd.DataFrame: The events sorted by datetime, with the columns of a typed
+            high_impact_news/ frame (UTC datetime, float values).
+        """
+        conditions = []
+        parameters = []
+        if currencies is not None:
+            conditions.append(f"Currency IN ({', '.join('?' * len(currencies))})")
+            parameters.extend(currencies)
+        if impacts is not None:
+            conditions.append(f"Impact IN ({', '.join('?' * len(impacts))})")
+            parameters.extend(impacts)
+        if start is not None:
+            conditions.append("datetime >= ?")
+            parameters.extend(to_seconds([pd.Timestamp(start, tz='UTC')]))
+        if end is not None:
+            conditions.append("datetime < ?")
+            parameters.extend(to_seconds([pd.Timestamp(end, tz='UTC')]))
+        if with_criteria:
+            conditions.append("criteria IS NOT NULL")
+
+        selected = ", ".join(columns) if columns is not None else "*"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        df = pd.read_sql_query(
+            f"SELECT {selected} FROM events{where} ORDER BY datetime, event_id", self.connection, params=parameters)
+
+        if 'datetime' in df:
+            df['datetime'] = pd.to_datetime(df['datetime'], unit='s', utc=True)
+        if 'event_id' in df:
+            df['event_id'] = df['event_id'].astype("Int64")
+        if 'criteria' in df:
+            df['criteria'] = pd.to_numeric(df['criteria']).astype("Int64")
+        return df
+
+    def get(self, event_id):
+        """
+        Read one event.
+
+        Args:
+            event_id (int): The data-event-id of the calendar row.
+
+        Returns:
+            dict: Column -> value, or None if the event is unknown.
+        """
+        cursor = self.connection.execute("SELECT * FROM events WHERE event_id = ?", (int(event_id),))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([description[0] for description in cursor.description], row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import the month files into the event database, or query it.")
+    parser.add_argument("--db", default=EVENT_DB_FILE, help="Path of the database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("import", help="Upsert the raw_news/ and high_impact_news/ months that changed")
+    query_parser = subparsers.add_parser("query", help="Print the events matching the filters")
+    query_parser.add_argument("--currency", nargs="+")
+    query_parser.add_argument("--impact", nargs="+")
+    query_parser.add_argument("--start")
+    query_parser.add_argument("--end")
+    args = parser.parse_args()
+
+    with EventDatabase(args.db) as database:
+        if args.command == "import":
+            # Raw months first, the criteria are added on top of them
+            print(f"raw_news: {database.import_month_files('raw_news', prune=True)} months imported")
+            print(f"high_impact_news: {database.import_month_files('high_impact_news')} months imported")
+        else:
+            start = time.perf_counter()
+            events = database.query(args.currency, args.impact, args.start, args.end)
+            print(events.to_string())
+            print(f"{len(events)} events in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,366 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import STORAGE_FORMAT
+from event_store import list_month_files, load_month_frame, to_typed, find_column
+
+# Impact titles of raw_news/ -> impact names of news/ (config.ICON_COLOR_MAP)
+IMPACT_NAMES = {
+    "High Impact Expected": "High",
+    "Medium Impact Expected": "Medium",
+    "Low Impact Expected": "Low",
+    "Non-Economic": "Holiday",
+}
+
+# Columns of the events held by the index
+INDEX_COLUMNS = ['time', 'currency', 'impact', 'event_id', 'title']
+
+
+def to_nanoseconds(times):
+    """UTC nanoseconds of one or many datetimes (Timestamp, datetime, ISO string or int64 nanoseconds)."""
+    if np.ndim(times) == 0:
+        if isinstance(times, (int, np.integer)):
+            return np.int64(times)
+        timestamp = pd.Timestamp(times)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize('UTC')
+        return np.int64(timestamp.value)
+    if not isinstance(times, (pd.Series, pd.Index)):
+        times = np.asarray(times)
+        if times.dtype.kind in "iu":
+            return times.astype(np.int64)
+    return to_int64(times)
+
+
+def to_int64(datetimes):
+    """UTC nanoseconds of datetimes, the int64 minimum where missing."""
+    return pd.DatetimeIndex(pd.to_datetime(datetimes, utc=True)).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def to_duration(value):
+    """Nanoseconds of a window size given as minutes (number) or a Timedelta."""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return np.int64(value * 60 * 10 ** 9)
+    return np.int64(pd.Timedelta(value).value)
+
+
+def to_filter(values):
+    """A currency or impact filter as a frozenset, None for all. A single value can be given as a string."""
+    if values is None:
+        return None
+    if isinstance(values, str):
+        return frozenset([values])
+    return frozenset(values)
+
+
+def normalize_events(df):
+    """
+    Reduce a month frame of any stage to the INDEX_COLUMNS columns.
+
+    Args:
+        df (pd.DataFrame): A typed month frame (event_store.to_typed) or an EventDatabase.query result.
+
+    Returns:
+        pd.DataFrame: time (UTC nanoseconds), currency, impact (High, Medium, Low, Holiday),
+        event_id (-1 when unknown) and title, without the rows that have no time.
+    """
+    columns = list(df.columns)
+    impacts = df[find_column(columns, "impact")].astype(str)
+    title_column = find_column(columns, "description") or find_column(columns, "event")
+    events = pd.DataFrame({
+        'time': to_int64(df['datetime']),
+        'currency': df[find_column(columns, "currency")].astype(str).to_numpy(),
+        'impact': impacts.map(IMPACT_NAMES).fillna(impacts).to_numpy(),
+        'event_id': (pd.to_numeric(df['event_id'], errors='coerce').fillna(-1).astype(np.int64).to_numpy()
+                     if 'event_id' in df else np.full(len(df), -1, dtype=np.int64)),
+        'title': df[title_column].astype(str).to_numpy() if title_column else "",
+    })
+    return events.loc[events['time'] != np.iinfo(np.int64).min, :]
+
+
+class EventTimeline:
+    def __init__(self, times, rows):
+        """
+        Sorted release times of the events of some currencies and impacts.
+
+        :param times: int64 array of UTC nanoseconds, sorted.
+        :param rows: Position of every time in the events frame of the index.
+        """
+        self.times = times
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.times)
+
+    def count_between(self, start, end):
+        """Number of events in [start, end], scalars or arrays of nanoseconds."""
+        return np.searchsorted(self.times, end, side='right') - np.searchsorted(self.times, start, side='left')
+
+    def nearest(self, times, direction="nearest"):
+        """
+        Find the closest event of every time with a binary search.
+
+        Args:
+            times (np.ndarray): UTC nanoseconds.
+            direction (str): "backward" (last event at or before), "forward" (first event
+                at or after) or "nearest" (either, the closest).
+
+        Returns:
+            tuple: (positions in times, signed distances event - time in nanoseconds),
+            -1 and the int64 maximum where there is no event.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        missing = np.iinfo(np.int64).max
+        count = len(self.times)
+        after = np.searchsorted(self.times, times, side='left')
+        before = np.searchsorted(self.times, times, side='right') - 1
+        has_after = after < count
+        has_before = before >= 0
+        after_distance = np.where(has_after, self.times[np.minimum(after, count - 1)] - times, missing) \
+            if count else np.full(times.shape, missing)
+        before_distance = np.where(has_before, self.times[np.maximum(before, 0)] - times, -missing) \
+            if count else np.full(times.shape, -missing)
+
+        if direction == "forward":
+            return np.where(has_after, after, -1), after_distance
+        if direction == "backward":
+            return np.where(has_before, before, -1), np.where(has_before, before_distance, missing)
+        if direction != "nearest":
+            raise ValueError(f"Unknown direction: {direction}")
+        use_before = has_before & (~has_after | (-before_distance <= after_distance))
+        positions = np.where(use_before, before, np.where(has_after, after, -1))
+        return positions, np.where(use_before, before_distance, after_distance)
+
+
+class EventIndex:
+    def __init__(self, folder_name="raw_news", storage_format=STORAGE_FORMAT):
+        """
+        In-memory index of the calendar events for window and nearest-event lookups.
+
+        The events are kept in sorted int64 arrays, one per (currency, impact), and queried
+        with binary searches; a combination of currencies and impacts is merged once and
+        cached. refresh() only reloads the month files that changed since the last call.
+        Queries can run while another thread refreshes, they see the previous or the new
+        events, never a mix.
+
+        :param folder_name: The stage folder the events are read from (raw_news or news).
+        :param storage_format: "csv" or "parquet".
+        """
+        self.folder_name = folder_name
+        self.storage_format = storage_format
+        self.refresh_lock = threading.Lock()
+        # (year, month) -> (file stamp, normalized events)
+        self.months = {}
+        self.state = (pd.DataFrame(columns=INDEX_COLUMNS), {}, {})
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build an index from events already in memory (e.g. EventDatabase.query()).
+
+        Args:
+            df (pd.DataFrame): Typed events with datetime, currency and impact columns.
+
+        Returns:
+            EventIndex: The index, refresh() does nothing on it.
+        """
+        index = cls(folder_name=None)
+        index.months = {None: (None, normalize_events(df))}
+        index.rebuild()
+        return index
+
+    @staticmethod
+    def file_stamp(file_path):
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def refresh(self):
+        """
+        Reload the month files that were added, changed or removed since the last refresh.
+
+        Returns:
+            list: (year, month) of the months reloaded or dropped.
+        """
+        if self.folder_name is None:
+            return []
+        with self.refresh_lock:
+            changed = []
+            months = dict(self.months)
+            found = set()
+            for year, month, file_path in list_month_files(self.folder_name, self.storage_format):
+                found.add((year, month))
+                stamp = self.file_stamp(file_path)
+                if (year, month) in months and months[(year, month)][0] == stamp:
+                    continue
+                months[(year, month)] = (stamp, normalize_events(to_typed(load_month_frame(file_path), year)))
+                changed.append((year, month))
+            for key in set(months) - found:
+                del months[key]
+                changed.append(key)
+
+            if changed:
+                self.months = months
+                self.rebuild()
+            return changed
+
+    def rebuild(self):
+        """Rebuild the per-(currency, impact) timelines from the loaded months."""
+        frames = [events for _, events in self.months.values()]
+        events = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=INDEX_COLUMNS)
+        events = events.sort_values('time', kind='mergesort').reset_index(drop=True)
+
+        timelines = {}
+        for (currency, impact), rows in events.groupby(['currency', 'impact'], sort=False).indices.items():
+            timelines[(currency, impact)] = EventTimeline(
+                events['time'].to_numpy(dtype=np.int64)[rows], rows.astype(np.int64))
+        # Swapped in one assignment, with an empty cache of combined timelines
+        self.state = (events, timelines, {})
+
+    @property
+    def events(self):
+        return self.state[0]
+
+    def timeline(self, currencies=None, impacts=None, state=None):
+        """
+        The merged timeline of some currencies and impacts, built on first use.
+
+        Args:
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts: High, Medium, Low or Holiday (optional, default all).
+            state (tuple): The state read by the caller, whose events frame the timeline rows
+                point into (optional, default the current one).
+
+        Returns:
+            EventTimeline: The events of these currencies and impacts.
+        """
+        events, timelines, combined = self.state if state is None else state
+        key = (to_filter(currencies), to_filter(impacts))
+        if key not in combined:
+            parts = [
+                timeline for (currency, impact), timeline in timelines.items()
+                if (key[0] is None or currency in key[0]) and (key[1] is None or impact in key[1])
+            ]
+            rows = np.concatenate([timeline.rows for timeline in parts]) if parts else np.empty(0, dtype=np.int64)
+            # Rows follow the time order of the events frame
+            rows.sort()
+            combined[key] = EventTimeline(events['time'].to_numpy(dtype=np.int64)[rows], rows)
+        return combined[key]
+
+    def has_event(self, time, before, after=None, currencies=None, impacts=None):
+        """
+        Whether an event is released within a window around a time.
+
+        Args:
+            time: The time (Timestamp, datetime, ISO string or UTC nanoseconds).
+            before: Window before the time, in minutes or as a Timedelta.
+            after: Window after the time (optional, default before).
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts, or one impact (optional, default all).
+
+        Returns:
+            bool: True if an event lies in [time - before, time + after].
+        """
+        time = to_nanoseconds(time)
+        after = before if after is None else after
+        timeline = self.timeline(currencies, impacts)
+        return bool(timeline.count_between(time - to_duration(before), time + to_duration(after)) > 0)
+
+    def window(self, time, before, after=None, currencies=None, impacts=None):
+        """
+        The events released within a window around a time.
+
+        Args:
+            time: The time (Timestamp, datetime, ISO string or UTC nanoseconds).
+            before: Window before the time, in minutes or as a Timedelta.
+            after: Window after the time (optional, default before).
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts, or one impact (optional, default all).
+
+        Returns:
+            pd.DataFrame: The events in [time - before, time + after], in time order.
+        """
+        time = to_nanoseconds(time)
+        after = before if after is None else after
+        # One read of the state, so a concurrent refresh cannot mix two of them
+        state = self.state
+        events = state[0]
+        timeline = self.timeline(currencies, impacts, state)
+        start = np.searchsorted(timeline.times, time - to_duration(before), side='left')
+        end = np.searchsorted(timeline.times, time + to_duration(after), side='right')
+        return events.iloc[timeline.rows[start:end]]
+
+    def nearest(self, time, currencies=None, impacts=None, direction="nearest"):
+        """
+        The event released closest to a time.
+
+        Args:
+            time: The time (Timestamp, datetime, ISO string or UTC nanoseconds).
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts, or one impact (optional, default all).
+            direction (str): "backward", "forward" or "nearest".
+
+        Returns:
+            tuple: (event as a pd.Series, pd.Timedelta from the time to the event), or
+            (None, None) if there is no event in that direction.
+        """
+        state = self.state
+        events = state[0]
+        timeline = self.timeline(currencies, impacts, state)
+        positions, distances = timeline.nearest(np.array([to_nanoseconds(time)]), direction)
+        if positions[0] < 0:
+            return None, None
+        return events.iloc[timeline.rows[positions[0]]], pd.Timedelta(int(distances[0]), unit='ns')
+
+    def has_event_batch(self, times, before, after=None, currencies=None, impacts=None):
+        """
+        Vectorized has_event for many times, e.g. every bar of a backtest.
+
+        Args:
+            times (array-like): The times (DatetimeIndex, datetime64 or UTC nanoseconds).
+            before: Window before every time, in minutes or as a Timedelta.
+            after: Window after every time (optional, default before).
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts, or one impact (optional, default all).
+
+        Returns:
+            np.ndarray: One bool per time.
+        """
+        times = to_nanoseconds(times)
+        after = before if after is None else after
+        timeline = self.timeline(currencies, impacts)
+        return timeline.count_between(times - to_duration(before), times + to_duration(after)) > 0
+
+    def nearest_batch(self, times, currencies=None, impacts=None, direction="nearest"):
+        """
+        Vectorized nearest for many times.
+
+        Args:
+            times (array-like): The times (DatetimeIndex, datetime64 or UTC nanoseconds).
+            currencies (iterable or str): Currencies, or one currency (optional, default all).
+            impacts (iterable or str): Impacts, or one impact (optional, default all).
+            direction (str): "backward", "forward" or "nearest".
+
+        Returns:
+            pd.DataFrame: One row per time: the event_id and title of the closest event and
+            the distance to it (NaT and -1 event_id where there is none).
+        """
+        state = self.state
+        events = state[0]
+        timeline = self.timeline(currencies, impacts, state)
+        positions, distances = timeline.nearest(to_nanoseconds(times), direction)
+        found = positions >= 0
+        rows = timeline.rows[positions[found]]
+
+        event_ids = np.full(len(positions), -1, dtype=np.int64)
+        event_ids[found] = events['event_id'].to_numpy(dtype=np.int64)[rows]
+        titles = np.full(len(positions), None, dtype=object)
+        titles[found] = events['title'].to_numpy()[rows]
+        distances = np.where(found, distances, np.iinfo(np.int64).min)
+        return pd.DataFrame({
+            'event_id': event_ids,
+            'title': titles,
+            'distance': pd.to_timedelta(distances, unit='ns'),
+        })
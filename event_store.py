@@ -0,0 +1,308 @@
+import os
+from glob import glob
+
+import numpy as np
+import pandas as pd
+
+from config import STORAGE_FORMAT, PARQUET_COMPRESSION
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    # Only the "csv" storage format can be used without pyarrow
+    pass
+
+FILE_EXTENSIONS = {"csv": "csv", "parquet": "parquet"}
+
+# Free text columns of the different stages
+TEXT_COLUMNS = [
+    'Date', 'Time', 'Description', 'Actual', 'Forecast', 'Previous',
+    'raw_criteria', 'event']
+CATEGORY_COLUMNS = ['Currency', 'currency', 'Impact', 'impact']
+
+# Columns added by to_typed to the raw stages (raw_news/, high_impact_news/)
+VALUE_COLUMNS = {
+    'Actual': 'actual_value',
+    'Forecast': 'forecast_value',
+    'Previous': 'previous_value',
+}
+
+NEWS_DATETIME_FORMAT = '%Y.%m.%d %H:%M:%S'
+
+
+def month_file(folder_name, year, month, storage_format=STORAGE_FORMAT):
+    """
+    Path of the file holding one month of a stage.
+
+    Args:
+        folder_name (str): The stage folder (e.g. "news", "raw_news").
+        year (int): The year of the month.
+        month (int): The month number.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        str: {folder_name}/{year}/{month}.{extension}
+    """
+    return f"{folder_name}/{year}/{month}.{FILE_EXTENSIONS[storage_format]}"
+
+
+def list_month_files(folder_name, storage_format=STORAGE_FORMAT):
+    """
+    List the month files of a stage.
+
+    Args:
+        folder_name (str): The stage folder.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        list: (year, month, file_path) tuples in chronological order.
+    """
+    month_files = []
+    for file_path in glob(f"{folder_name}/*/*.{FILE_EXTENSIONS[storage_format]}"):
+        year = os.path.basename(os.path.dirname(file_path))
+        month = os.path.splitext(os.path.basename(file_path))[0]
+        if year.isdigit() and month.isdigit():
+            month_files.append((int(year), int(month), file_path))
+    return sorted(month_files)
+
+
+def to_typed(df, year, previous_time=None):
+    """
+    Convert a month frame to the typed schema used by the Parquet files.
+
+    Currency and impact become categorical, event_id a nullable integer and the
+    datetime column a UTC timestamp. Frames of the raw stages, which only have the
+    calendar Date and Time texts, get a datetime column and float actual_value,
+    forecast_value and previous_value columns. The original columns are kept.
+
+    Args:
+        df (pd.DataFrame): The month frame as written by one of the stages.
+        year (int): The year of the month, for the calendar dates without a year.
+        previous_time (str): Time of the row before the frame, for frames that continue
+            a month (e.g. the batches of a stream).
+
+    Returns:
+        pd.DataFrame: The typed frame.
+    """
+    # utils imports this module
+    from utils import convert_to_datetime_series, parse_numeric_series
+
+    df = df.copy()
+    for column in TEXT_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("string")
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("string").astype("category")
+    if 'event_id' in df:
+        df['event_id'] = pd.to_numeric(df['event_id'], errors='coerce').astype("Int64")
+
+    if 'Date' in df and 'Time' in df:
+        # Rows at the same time as the previous one have no time on the calendar
+        times = df['Time'].replace("", pd.NA)
+        if previous_time is not None and len(times):
+            times.iloc[:1] = times.iloc[:1].fillna(previous_time)
+        times = times.ffill()
+        df['datetime'] = convert_to_datetime_series(
+            df['Date'].astype(object), times.astype(object), year)
+        for column, value_column in VALUE_COLUMNS.items():
+            if column in df:
+                df[value_column] = parse_numeric_series(df[column].fillna("").astype(object))
+    elif 'datetime' in df and not pd.api.types.is_datetime64_any_dtype(df['datetime']):
+        df['datetime'] = pd.to_datetime(df['datetime'], format=NEWS_DATETIME_FORMAT, utc=True)
+
+    return df
+
+
+def to_plain(df):
+    """
+    Convert a typed month frame back to what pd.read_csv returns for the CSV file,
+    so the stages can read either format.
+
+    Args:
+        df (pd.DataFrame): The frame as returned by to_typed.
+
+    Returns:
+        pd.DataFrame: The frame without the typed columns.
+    """
+    df = df.copy()
+    if 'Date' in df:
+        df = df.drop(columns=['datetime', *VALUE_COLUMNS.values()], errors='ignore')
+    elif 'datetime' in df:
+        df['datetime'] = df['datetime'].dt.strftime(NEWS_DATETIME_FORMAT)
+
+    for column in [*TEXT_COLUMNS, *CATEGORY_COLUMNS]:
+        if column in df:
+            df[column] = df[column].astype(object).replace({"": np.nan, pd.NA: np.nan})
+    return df
+
+
+def save_month_frame(df, folder_name, year, month, storage_format=STORAGE_FORMAT):
+    """
+    Save one month of a stage.
+
+    Args:
+        df (pd.DataFrame): The month frame.
+        folder_name (str): The stage folder.
+        year (int): The year of the month.
+        month (int): The month number.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        str: Path of the saved file.
+    """
+    file_name = month_file(folder_name, year, month, storage_format)
+    os.makedirs(f"{folder_name}/{year}", exist_ok=True)
+    if storage_format == "parquet":
+        to_typed(df, year).to_parquet(file_name, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(file_name, index=False)
+    return file_name
+
+
+def load_month_frame(file_path):
+    """
+    Load one month of a stage as pd.read_csv would return it, whatever its format.
+
+    Args:
+        file_path (str): Path of the month file.
+
+    Returns:
+        pd.DataFrame: The month frame.
+    """
+    if file_path.endswith(".parquet"):
+        return to_plain(pd.read_parquet(file_path))
+    return pd.read_csv(file_path)
+
+
+def save_frame(df, file_stem, storage_format=STORAGE_FORMAT):
+    """
+    Save a frame that is not split by month (e.g. the merged news and prices).
+
+    Args:
+        df (pd.DataFrame): The frame.
+        file_stem (str): Path of the file without extension.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        str: Path of the saved file.
+    """
+    file_name = f"{file_stem}.{FILE_EXTENSIONS[storage_format]}"
+    if storage_format == "parquet":
+        df.to_parquet(file_name, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(file_name, index=False)
+    return file_name
+
+
+def load_frame(file_stem, storage_format=STORAGE_FORMAT):
+    """
+    Load a frame saved by save_frame.
+
+    Args:
+        file_stem (str): Path of the file without extension.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        pd.DataFrame: The frame.
+    """
+    file_name = f"{file_stem}.{FILE_EXTENSIONS[storage_format]}"
+    if storage_format == "parquet":
+        return pd.read_parquet(file_name)
+    # Frames saved again after loading (e.g. by pipeline.py) must not drift
+    return pd.read_csv(file_name, float_precision="round_trip")
+
+
+def find_column(columns, name):
+    """The column called name in any case (the news stage uses lower case names)."""
+    for column in columns:
+        if column.lower() == name:
+            return column
+    return None
+
+
+def month_in_range(year, month, start, end):
+    """Whether a month overlaps the [start, end) period (UTC, either may be None)."""
+    month_start = pd.Timestamp(year=year, month=month, day=1, tz='UTC')
+    # Calendar months are local time, allow a day on both sides
+    if end is not None and month_start - pd.Timedelta(days=1) >= end:
+        return False
+    if start is not None and month_start + pd.DateOffset(months=1) + pd.Timedelta(days=1) <= start:
+        return False
+    return True
+
+
+def read_events(folder_name, currencies=None, impacts=None, start=None, end=None, columns=None,
+                storage_format=STORAGE_FORMAT):
+    """
+    Read the typed events of a stage, keeping only the requested currencies, impacts and period.
+
+    Months outside the period are not opened. With the "parquet" format the currency,
+    impact and datetime filters are pushed down to the Parquet reader.
+
+    Args:
+        folder_name (str): The stage folder.
+        currencies (list): Currencies to keep (optional).
+        impacts (list): Impacts to keep, as written by the stage (optional).
+        start (str or pd.Timestamp): First datetime to keep, UTC (optional).
+        end (str or pd.Timestamp): Datetimes from this one on are dropped, UTC (optional).
+        columns (list): Columns to read (optional, default all).
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        pd.DataFrame: The typed events in chronological month order.
+    """
+    start = pd.Timestamp(start, tz='UTC') if start is not None else None
+    end = pd.Timestamp(end, tz='UTC') if end is not None else None
+    month_files = [
+        (year, month, file_path)
+        for year, month, file_path in list_month_files(folder_name, storage_format)
+        if month_in_range(year, month, start, end)
+    ]
+    if not month_files:
+        return pd.DataFrame(columns=columns)
+
+    if storage_format == "parquet":
+        dataset = ds.dataset([file_path for _, _, file_path in month_files], format="parquet")
+        names = dataset.schema.names
+    else:
+        frames = [to_typed(pd.read_csv(file_path), year) for year, _, file_path in month_files]
+        df = pd.concat(frames, ignore_index=True)
+        names = list(df.columns)
+
+    conditions = []
+    currency_column = find_column(names, "currency")
+    impact_column = find_column(names, "impact")
+    if currencies is not None and currency_column is not None:
+        conditions.append((currency_column, "isin", list(currencies)))
+    if impacts is not None and impact_column is not None:
+        conditions.append((impact_column, "isin", list(impacts)))
+    if start is not None:
+        conditions.append(("datetime", ">=", start))
+    if end is not None:
+        conditions.append(("datetime", "<", end))
+
+    if storage_format == "parquet":
+        expression = None
+        for column, operator, value in conditions:
+            field = ds.field(column)
+            if operator == "isin":
+                condition = field.isin(value)
+            else:
+                value = pa.scalar(value, type=pa.timestamp('ns', tz='UTC'))
+                condition = field >= value if operator == ">=" else field < value
+            expression = condition if expression is None else expression & condition
+        table = dataset.to_table(columns=columns, filter=expression)
+        return table.to_pandas()
+
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value in conditions:
+        if operator == "isin":
+            mask &= df[column].isin(value).to_numpy()
+        elif operator == ">=":
+            mask &= (df[column] >= value).to_numpy()
+        else:
+            mask &= (df[column] < value).to_numpy()
+    df = df.loc[mask, :].reset_index(drop=True)
+    return df[columns] if columns is not None else df
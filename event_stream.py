@@ -0,0 +1,451 @@
+import os
+import csv
+import heapq
+import itertools
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from config import ALLOWED_IMPACT_COLORS, STORAGE_FORMAT, PARQUET_COMPRESSION, EVENT_BATCH_SIZE
+from calendar_parser import CALENDAR_COLUMNS, iter_calendar_rows
+from event_store import month_file, to_typed, find_column, NEWS_DATETIME_FORMAT
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Only the CSV, SQLite and queue sinks can be used without pyarrow
+    pass
+
+# Records of the raw_news/ stage (fields named like the file columns) and of the news/ stage
+CalendarEvent = namedtuple("CalendarEvent", CALENDAR_COLUMNS)
+NewsEvent = namedtuple("NewsEvent", ['date', 'datetime', 'currency', 'impact', 'event'])
+
+# Columns of the news/ month files
+NEWS_COLUMNS = ['datetime', 'currency', 'impact', 'event']
+
+# Put in a queue by QueueSink when the stream ends
+STREAM_END = None
+
+
+def iter_calendar_events(html):
+    """
+    Extract the events of a calendar page, as parse_calendar_html without the DataFrame.
+
+    Args:
+        html (str): Page source of the calendar page.
+
+    Yields:
+        CalendarEvent: Every event of the page, in page order.
+    """
+    for row in iter_calendar_rows(html):
+        yield CalendarEvent(*row)
+
+
+def iter_news_rows(data):
+    """
+    Extract the events of scraped rows, carrying the date and time of the rows above
+    to the rows that do not repeat them.
+
+    Args:
+        data (iterable): The scraped rows, each a list of cell texts.
+
+    Yields:
+        NewsEvent: Events with the calendar time text in the datetime field.
+    """
+    # Imported here, utils imports this module
+    from utils import contains_day_or_month
+
+    current_date = ''
+    current_time = ''
+    for row in data:
+        if len(row) == 1 or len(row) == 5:
+            match, day = contains_day_or_month(row[0])
+            if match:
+                current_date = row[0].replace(day, "").replace("\n", "").strip()
+        if len(row) == 4:
+            current_time = row[0]
+
+        if len(row) == 5:
+            current_time = row[1]
+
+        if len(row) > 1 and current_date != "" and current_time != "":
+            yield NewsEvent(current_date, current_time, row[-3], row[-2], row[-1])
+
+
+def filter_events(events, currencies=None, impacts=None, exclude_currencies=()):
+    """
+    Keep the events of the given currencies and impacts.
+
+    Args:
+        events (iterable): NewsEvent or CalendarEvent records.
+        currencies (list): Currencies to keep (optional, default all).
+        impacts (list): Impacts to keep (optional, default all).
+        exclude_currencies (tuple): Currencies to drop (e.g. "All").
+
+    Yields:
+        The matching records.
+    """
+    fields = {}
+    for event in events:
+        if not fields:
+            # The raw_news/ records use capitalized field names
+            fields = {name: find_column(event._fields, name) for name in ("currency", "impact")}
+        currency = getattr(event, fields["currency"])
+        impact = getattr(event, fields["impact"])
+        if currencies is not None and currency not in currencies:
+            continue
+        if impacts is not None and impact not in impacts:
+            continue
+        if currency in exclude_currencies:
+            continue
+        yield event
+
+
+def normalize_news_events(events, year, target_date=None):
+    """
+    Replace the calendar time text of news events by a timezone-aware datetime.
+
+    Args:
+        events (iterable): NewsEvent records as yielded by iter_news_rows.
+        year (int): The year of the scraped page.
+        target_date (date): For week and day pages, a date of the page; lets rows
+            of a week spanning the turn of the year get the right year.
+
+    Yields:
+        NewsEvent: The events with their datetime.
+    """
+    from utils import convert_to_datetime, infer_year_month
+
+    # Rows share a handful of (date, time) pairs
+    converted = {}
+    for event in events:
+        row_year = year
+        if target_date is not None:
+            row_year = infer_year_month(event.date, target_date)[0] or year
+
+        key = (event.date, event.datetime, row_year)
+        if key not in converted:
+            converted[key] = convert_to_datetime(event.date, event.datetime, row_year)
+        yield event._replace(datetime=converted[key])
+
+
+def sort_events(events, key, lag=timedelta(days=1)):
+    """
+    Sort a stream that is already in order up to a bounded lag.
+
+    Calendar pages list events day by day, so an event is never more than a day
+    (the largest timezone offset) earlier than an event before it. Only the events
+    of that window are buffered, and the result is the same as a full stable sort.
+
+    Args:
+        events (iterable): The records.
+        key (callable): Sort key of a record, comparable and subtractable with lag.
+        lag (timedelta): Largest distance an event can be behind an event before it.
+
+    Yields:
+        The records sorted by key.
+    """
+    buffer = []
+    counter = itertools.count()
+    for event in events:
+        event_key = key(event)
+        heapq.heappush(buffer, (event_key, next(counter), event))
+        while buffer[0][0] < event_key - lag:
+            yield heapq.heappop(buffer)[2]
+    while buffer:
+        yield heapq.heappop(buffer)[2]
+
+
+def news_sort_key(event):
+    # The datetime text of the news/ files sorts like the wall-clock time
+    return event.datetime.replace(tzinfo=None)
+
+
+def news_event_stream(data, year, target_date=None):
+    """
+    Chain the stages turning scraped rows into the sorted events of a news/ file.
+
+    Args:
+        data (iterable): The scraped rows, each a list of cell texts.
+        year (int): The year of the scraped page.
+        target_date (date): For week and day pages, a date of the page.
+
+    Returns:
+        generator: NewsEvent records sorted by datetime.
+    """
+    events = iter_news_rows(data)
+    events = filter_events(events, impacts=ALLOWED_IMPACT_COLORS, exclude_currencies=("All",))
+    events = normalize_news_events(events, year, target_date)
+    return sort_events(events, news_sort_key)
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime(NEWS_DATETIME_FORMAT)
+    return value
+
+
+class EventSink:
+    def __init__(self, columns):
+        """
+        Receives the records of a stream. Subclasses implement write() and close().
+
+        :param columns: The record fields to keep, in output order.
+        """
+        self.columns = list(columns)
+
+    def row(self, event):
+        return tuple(format_value(getattr(event, column)) for column in self.columns)
+
+    def write(self, event):
+        raise NotImplementedError
+
+    def close(self):
+        """Flushes the records and releases the output."""
+
+    def abort(self):
+        """Called instead of close() when the stream failed."""
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class FileSink(EventSink):
+    def __init__(self, path, columns):
+        """
+        Writes to a temporary file, moved over path when the stream ends, so a failed
+        stream never leaves a half-written file.
+
+        :param path: Path of the output file.
+        :param columns: The record fields to keep, in output order.
+        """
+        super().__init__(columns)
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def abort(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class CsvSink(FileSink):
+    def __init__(self, path, columns):
+        """
+        Writes every record as a CSV line, as DataFrame.to_csv(index=False) would.
+
+        :param path: Path of the CSV file.
+        :param columns: The record fields to keep, also used as the header.
+        """
+        super().__init__(path, columns)
+        self.file = open(self.temp_path, 'w', newline='')
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        self.writer.writerow(self.columns)
+
+    def write(self, event):
+        self.writer.writerow(self.row(event))
+
+    def close(self):
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        super().abort()
+
+
+class BatchSink(EventSink):
+    def __init__(self, columns, year=None, batch_size=EVENT_BATCH_SIZE):
+        """
+        Collects the records into frames of batch_size rows. Subclasses implement write_batch().
+
+        :param columns: The record fields to keep.
+        :param year: The year of the events, for calendar dates without a year.
+        :param batch_size: Number of records per batch.
+        """
+        super().__init__(columns)
+        self.year = year
+        self.batch_size = batch_size
+        self.batch = []
+        # Rows at the same time as the previous one have no time, also across batches
+        self.previous_time = None
+
+    def write_batch(self, df, previous_time):
+        raise NotImplementedError
+
+    def flush(self):
+        df = pd.DataFrame(self.batch, columns=self.columns, dtype=object)
+        self.write_batch(df, self.previous_time)
+        if 'Time' in df:
+            times = df['Time'].replace("", pd.NA).dropna()
+            if len(times):
+                self.previous_time = times.iloc[-1]
+        self.batch = []
+
+    def write(self, event):
+        self.batch.append(self.row(event))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+
+class ParquetSink(BatchSink):
+    def __init__(self, path, columns, year=None, batch_size=EVENT_BATCH_SIZE):
+        """
+        Writes the records as row groups of a Parquet file, in the typed schema of
+        event_store.to_typed.
+
+        :param path: Path of the Parquet file.
+        :param columns: The record fields to keep.
+        :param year: The year of the events, for calendar dates without a year.
+        :param batch_size: Number of records per row group.
+        """
+        super().__init__(columns, year, batch_size)
+        # Written next to path and moved over it on close, like FileSink
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.writer = None
+
+    def write_batch(self, df, previous_time):
+        table = pa.Table.from_pandas(to_typed(df, self.year, previous_time=previous_time), preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.temp_path, table.schema, compression=PARQUET_COMPRESSION)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        # An empty stream still writes the file, with the schema of an empty frame
+        if self.batch or self.writer is None:
+            self.flush()
+        self.writer.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class SqliteSink(BatchSink):
+    def __init__(self, database, year, month=None, columns=CALENDAR_COLUMNS, batch_size=EVENT_BATCH_SIZE,
+                 prune=False):
+        """
+        Upserts the records into the event database by event_id, one transaction per batch.
+
+        :param database: The event_db.EventDatabase, left open on close.
+        :param year: The year of the events.
+        :param month: The month of the events (optional).
+        :param columns: The record fields to keep, named like the database columns.
+        :param batch_size: Number of records per transaction.
+        :param prune: The stream is a whole month: delete the events of the month that
+            were not streamed.
+        """
+        super().__init__(columns, year, batch_size)
+        self.database = database
+        self.month = month
+        self.prune = prune
+        self.event_ids = []
+
+    def write_batch(self, df, previous_time):
+        self.database.upsert_frame(df, self.year, self.month, previous_time=previous_time)
+        self.event_ids.extend(pd.to_numeric(df['event_id'], errors='coerce').dropna())
+
+    def close(self):
+        if self.batch:
+            self.flush()
+        if self.prune and self.month is not None:
+            self.database.prune_month(self.year, self.month, self.event_ids)
+
+    def abort(self):
+        """Batches already upserted are kept, a month is never pruned from a failed stream."""
+
+
+class QueueSink(EventSink):
+    def __init__(self, queue):
+        """
+        Hands every record to another thread as soon as it is extracted.
+
+        :param queue: A queue.Queue, STREAM_END is put in it when the stream ends.
+        """
+        super().__init__(())
+        self.queue = queue
+
+    def write(self, event):
+        self.queue.put(event)
+
+    def close(self):
+        self.queue.put(STREAM_END)
+
+
+def iter_queue(queue):
+    """
+    Read the records put in a queue by a QueueSink until the stream ends.
+
+    Args:
+        queue (queue.Queue): The queue of the sink.
+
+    Yields:
+        The records.
+    """
+    while True:
+        event = queue.get()
+        if event is STREAM_END:
+            return
+        yield event
+
+
+def month_sink(folder_name, year, month, columns, storage_format=STORAGE_FORMAT):
+    """
+    Sink writing one month file of a stage, the streaming counterpart of save_month_frame.
+
+    Args:
+        folder_name (str): The stage folder.
+        year (int): The year of the month.
+        month (int): The month number.
+        columns (list): The record fields to keep.
+        storage_format (str): "csv" or "parquet".
+
+    Returns:
+        EventSink: The sink, writing to month_file(folder_name, year, month).
+    """
+    file_name = month_file(folder_name, year, month, storage_format)
+    if storage_format == "parquet":
+        return ParquetSink(file_name, columns, year=year)
+    return CsvSink(file_name, columns)
+
+
+def run_stream(events, *sinks):
+    """
+    Push every record of a stream into the sinks, then close them.
+
+    If the stream fails, the sinks are aborted and the error is raised again.
+
+    Args:
+        events (iterable): The records.
+        sinks (EventSink): The sinks receiving every record.
+
+    Returns:
+        int: Number of records written.
+    """
+    count = 0
+    try:
+        for event in events:
+            for sink in sinks:
+                sink.write(event)
+            count += 1
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    for sink in sinks:
+        sink.close()
+    return count
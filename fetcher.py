@@ -0,0 +1,172 @@
+try:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+except ImportError:
+    # Only the "http" fetcher can be used without Selenium
+    pass
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import FETCHER_BACKEND, HTTP_HEADERS, HTTP_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF
+from browser import generate_driver, scroll_to_end, extract_calendar_rows, log_page_timing
+from calendar_parser import extract_calendar_rows_html
+
+
+class Fetcher:
+    def __init__(self, timings_file=None, snapshots=None):
+        """
+        Loads calendar pages. Subclasses implement fetch().
+
+        :param timings_file: CSV file the load time of every page is appended to (optional).
+        :param snapshots: SnapshotCache every fetched page is stored in (optional).
+        """
+        self.timings_file = timings_file
+        self.snapshots = snapshots
+
+    def _log(self, url, row_count, seconds):
+        if self.timings_file:
+            log_page_timing(self.timings_file, url, row_count, seconds)
+
+    def _store(self, url, html):
+        if self.snapshots is not None:
+            self.snapshots.put(url, html)
+
+    def fetch(self, url):
+        """
+        Loads a calendar page.
+
+        :param url: The calendar URL.
+        :return: The page HTML.
+        """
+        raise NotImplementedError
+
+    def fetch_rows(self, url):
+        """
+        Loads a calendar page and returns the rows reformat_scraped_data expects.
+
+        :param url: The calendar URL.
+        :return: List of rows, each a list of cell texts.
+        """
+        return extract_calendar_rows_html(self.fetch(url))
+
+    def quit(self):
+        """Releases the browser or connections held by the fetcher."""
+
+
+class SeleniumFetcher(Fetcher):
+    def __init__(self, driver, timings_file=None, snapshots=None):
+        """
+        Loads pages in a stealth-configured Chrome and scrolls them to the end.
+
+        :param driver: A driver created by browser.generate_driver.
+        :param timings_file: CSV file the load time of every page is appended to (optional).
+        :param snapshots: SnapshotCache every fetched page is stored in (optional).
+        """
+        super().__init__(timings_file, snapshots)
+        self.browser = driver
+
+    def load(self, url):
+        self.browser.get(url)
+
+        WebDriverWait(self.browser, 20).until(
+            EC.visibility_of_element_located((By.CLASS_NAME, 'calendar__table')))
+
+        row_count, load_seconds = scroll_to_end(self.browser)
+        self._log(url, row_count, load_seconds)
+
+    def fetch(self, url):
+        self.load(url)
+        html = self.browser.page_source
+        self._store(url, html)
+        return html
+
+    def fetch_rows(self, url):
+        # Serialize the table in the page instead of downloading and parsing the HTML
+        self.load(url)
+        if self.snapshots is not None:
+            self._store(url, self.browser.page_source)
+        return extract_calendar_rows(self.browser)
+
+    def quit(self):
+        self.browser.quit()
+
+
+class HttpFetcher(Fetcher):
+    def __init__(self, timings_file=None, snapshots=None, headers=HTTP_HEADERS, timeout=HTTP_TIMEOUT, pool_size=4,
+                 max_retries=HTTP_MAX_RETRIES, backoff=HTTP_BACKOFF):
+        """
+        Downloads calendar pages directly over a pooled, keep-alive HTTP session.
+
+        :param timings_file: CSV file the load time of every page is appended to (optional).
+        :param snapshots: SnapshotCache every fetched page is stored in (optional).
+        :param headers: Headers sent with every request.
+        :param timeout: Request timeout in seconds.
+        :param pool_size: Number of connections kept open per host.
+        :param max_retries: Number of retries of a page that could not be loaded.
+        :param backoff: Wait before the first retry in seconds, doubled on every retry.
+        """
+        super().__init__(timings_file, snapshots)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url):
+        """
+        Loads a calendar page, retrying with exponential backoff.
+
+        :param url: The calendar URL.
+        :return: The page HTML.
+        :raises requests.RequestException: The last error, if every attempt failed.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                # A 200 can still be a challenge page instead of the calendar
+                if "calendar__table" not in response.text:
+                    raise requests.RequestException("the page has no calendar table", response=response)
+            except requests.RequestException as e:
+                print(f"Request failed. {url}: {e}")
+                error = e
+                continue
+
+            self._log(url, "", time.perf_counter() - start)
+            self._store(url, response.text)
+            return response.text
+        raise error
+
+    def quit(self):
+        self.session.close()
+
+
+def fetcher_factory(backend=FETCHER_BACKEND, timings_file=None, snapshots=None):
+    """
+    Returns a callable creating fetchers of the given backend, for use with DriverPool.
+
+    :param backend: "selenium" or "http".
+    :param timings_file: CSV file the load time of every page is appended to (optional).
+    :param snapshots: SnapshotCache every fetched page is stored in (optional).
+    :return: Callable returning a new fetcher, or None if it could not be created.
+    """
+    if backend == "selenium":
+        def create():
+            driver = generate_driver()
+            if driver is None:
+                return None
+            return SeleniumFetcher(driver, timings_file=timings_file, snapshots=snapshots)
+        return create
+    if backend == "http":
+        return lambda: HttpFetcher(timings_file=timings_file, snapshots=snapshots)
+    raise ValueError(f"Unknown fetcher backend: {backend}")
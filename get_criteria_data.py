@@ -1,64 +1,48 @@
-from glob import glob
-import json
-import os
-import pandas as pd
-import requests
+from details_fetcher import DetailsFetcher
+from criteria_cache import CriteriaCache
+from event_store import list_month_files, load_month_frame, save_month_frame
+from event_db import EventDatabase
 
 
 SAVED_FOLDER_NAME = "high_impact_news"
 FOLDER_NAME = "raw_news"
-URL_FORMAT = "https://www.forexfactory.com/calendar/details/1-{}"
 
-headers = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Accept-Language": "en-US,en;q=0.9",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Referer": "https://www.forexfactory.com/",
-}
 
-files = glob(f'{FOLDER_NAME}/**/*.csv', recursive=True)
-for file_path in files:
-    df = pd.read_csv(file_path)
-    df.loc[:, ["Date", "Time"]] = df.loc[:, ["Date", "Time"]].ffill()
-    df = df.loc[df["Impact"] == "High Impact Expected", :]
+def get_criteria(file_path, fetcher, year, month, database=None):
+    """
+    Add the "Usual Effect" criteria to the high impact events of a raw_news month file.
 
-    file_name = file_path.split("/")[-1]
-    year = file_path.split("/")[-2]
+    Args:
+        file_path (str): Path of the raw_news/{year}/{month} file.
+        fetcher (DetailsFetcher): The details fetcher.
+        year (int): The year of the month.
+        month (int): The month number.
+        database (EventDatabase): Event database the criteria are also upserted into (optional).
 
-    usual_effect_raw_data, usual_effect_data = [], []
-    for _, row in df.iterrows():
-        request_url = URL_FORMAT.format(row["event_id"])
-        response = requests.get(
-            request_url, headers=headers)
+    Returns:
+        str: Path of the saved high_impact_news file.
+    """
+    df = load_month_frame(file_path)
+    df.loc[:, ["Date", "Time"]] = df.loc[:, ["Date", "Time"]].ffill()
+    df = df.loc[df["Impact"] == "High Impact Expected", :]
 
-        usual_effect_raw_value = ""
-        usual_effect_value = 0
-        if response.status_code == 200:
-            print(request_url)
-            json_data = json.loads(response.text)
-            specs_data = json_data.get("data", []).get('specs', [])
+    usual_effects = fetcher.fetch_usual_effects(
+        df["event_id"], currencies=df["Currency"], titles=df["Description"])
 
-            for spec in specs_data:
-                if "Usual Effect" == spec["title"].strip():
-                    usual_effect_raw_value = spec["html"]
-                    if usual_effect_raw_value == "'Actual' greater than 'Forecast' is good for currency;":
-                        usual_effect_value = 1
-                    elif usual_effect_raw_value == "'Actual' less than 'Forecast' is good for currency;":
-                        usual_effect_value = -1
-                    else:
-                        usual_effect_value = 0
-        else:
-            print(f"Request failed. Status code: {response.status_code}")
+    df["raw_criteria"] = [usual_effect_raw_value for usual_effect_raw_value, _ in usual_effects]
+    df["criteria"] = [usual_effect_value for _, usual_effect_value in usual_effects]
 
-        usual_effect_raw_data.append(usual_effect_raw_value)
-        usual_effect_data.append(usual_effect_value)
+    if database is not None:
+        database.upsert_frame(df, year, month)
+    return save_month_frame(df, SAVED_FOLDER_NAME, year, month)
 
-    df["raw_criteria"] = usual_effect_raw_data
-    df["criteria"] = usual_effect_data
 
-    os.makedirs(f"{SAVED_FOLDER_NAME}/{year}", exist_ok=True)
-    df.to_csv(f"{SAVED_FOLDER_NAME}/{year}/{file_name}", index=False)
+if __name__ == "__main__":
+    cache = CriteriaCache()
+    fetcher = DetailsFetcher(cache=cache)
+    database = EventDatabase()
+    for year, month, file_path in list_month_files(FOLDER_NAME):
+        get_criteria(file_path, fetcher, year, month, database)
+        cache.save()
+    fetcher.close()
+    database.close()
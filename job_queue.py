@@ -0,0 +1,163 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+from config import JOB_MAX_ATTEMPTS
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    def __init__(self, path, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        A persistent queue of (year, month) scrape tasks.
+
+        Every task keeps its status, attempt count and last error in a JSON file that is
+        rewritten after each change, so a crashed run can be resumed where it stopped.
+
+        :param path: Path of the JSON queue file.
+        :param max_attempts: Number of times a task is tried before it is given up.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.tasks = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.tasks = json.load(f)
+
+    @staticmethod
+    def key(year, month):
+        return f"{int(year)}-{int(month):02d}"
+
+    def is_finished(self):
+        """Whether no task is left to run (all done, or failed too many times)."""
+        return all(
+            task['status'] == DONE
+            or (task['status'] == FAILED and task['attempts'] >= self.max_attempts)
+            for task in self.tasks.values()
+        )
+
+    def resume(self):
+        """
+        Pick up the unfinished queue left on disk by an interrupted run.
+
+        Returns:
+            bool: True if there is an interrupted run to resume.
+        """
+        if not self.tasks or self.is_finished():
+            return False
+
+        # Tasks running when the previous run crashed start over
+        for task in self.tasks.values():
+            if task['status'] == RUNNING:
+                task['status'] = PENDING
+        self.save()
+        done = sum(task['status'] == DONE for task in self.tasks.values())
+        print(f"Resuming queue {self.path}: {done}/{len(self.tasks)} tasks done")
+        return True
+
+    def create(self, targets):
+        """
+        Start a new queue, replacing the finished one on disk.
+
+        Args:
+            targets (list): (year, month, url) tuples as built by generate_targets.
+        """
+        self.tasks = {
+            self.key(selected_year, selected_month): {
+                'year': selected_year,
+                'month': selected_month,
+                'url': url,
+                'status': PENDING,
+                'attempts': 0,
+                'error': None,
+                'updated_at': None,
+            }
+            for selected_year, selected_month, url in targets
+        }
+        self.save()
+
+    def pending(self):
+        """
+        List the tasks that still have to run.
+
+        Returns:
+            list: (year, month, url) tuples.
+        """
+        return [
+            (task['year'], task['month'], task['url'])
+            for task in self.tasks.values()
+            if task['status'] == PENDING
+            or (task['status'] == FAILED and task['attempts'] < self.max_attempts)
+        ]
+
+    def failed(self):
+        return [
+            (task['year'], task['month'], task['url'])
+            for task in self.tasks.values() if task['status'] == FAILED
+        ]
+
+    def _update(self, year, month, **fields):
+        with self.lock:
+            task = self.tasks[self.key(year, month)]
+            task.update(fields)
+            task['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self.save()
+
+    def start(self, year, month):
+        task = self.tasks[self.key(year, month)]
+        self._update(year, month, status=RUNNING, attempts=task['attempts'] + 1)
+
+    def complete(self, year, month):
+        self._update(year, month, status=DONE, error=None)
+
+    def fail(self, year, month, error):
+        self._update(year, month, status=FAILED, error=str(error))
+
+    def run(self, pool, func):
+        """
+        Run func(fetcher, target) for every unfinished task on the pool, retrying failed
+        tasks up to max_attempts times.
+
+        Args:
+            pool (DriverPool): The pool to run the tasks on.
+            func (callable): Scrapes (and saves) one (year, month, url) target.
+
+        Returns:
+            list: The targets that still failed after all attempts.
+        """
+        def run_task(fetcher, target):
+            selected_year, selected_month, _ = target
+            self.start(selected_year, selected_month)
+            try:
+                result = func(fetcher, target)
+                if result is None:
+                    raise RuntimeError("No output was produced")
+            except Exception as e:
+                self.fail(selected_year, selected_month, e)
+                raise
+            self.complete(selected_year, selected_month)
+            return result
+
+        for _ in range(self.max_attempts):
+            pending = self.pending()
+            if not pending:
+                break
+            pool.map(run_task, pending)
+
+        failed = self.failed()
+        if failed:
+            print(f"{len(failed)} tasks failed, see {self.path}")
+        return failed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.tasks, f, indent=2)
+        os.replace(temp_path, self.path)
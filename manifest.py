@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+from config import MANIFEST_HORIZON_MONTHS
+
+
+def file_hash(file_path):
+    """
+    Compute the SHA-256 of a file.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def count_rows(file_path):
+    """Number of data rows of a CSV file (header excluded) or a Parquet file."""
+    if file_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(file_path).metadata.num_rows
+    with open(file_path, 'rb') as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+class ScrapeManifest:
+    def __init__(self, path, horizon_months=MANIFEST_HORIZON_MONTHS):
+        """
+        Keeps track of the months already scraped, keyed by year and month.
+
+        Every entry stores the scrape time, the row count and the content hash of the
+        saved file (and the Drive ID once uploaded).
+
+        :param path: Path of the JSON manifest file.
+        :param horizon_months: Months older than this many months before the current one are final.
+        """
+        self.path = path
+        self.horizon_months = horizon_months
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(year, month):
+        return f"{int(year)}-{int(month):02d}"
+
+    def get(self, year, month):
+        return self.entries.get(self.key(year, month))
+
+    def is_finalized(self, year, month, now=None):
+        """
+        Whether the month lies further in the past than the horizon.
+
+        Args:
+            year (int): The year of the month.
+            month (int): The month number.
+            now (datetime): Reference time, defaults to now.
+
+        Returns:
+            bool: True if the month is not expected to change anymore.
+        """
+        now = now or datetime.now()
+        months_ago = (now.year - int(year)) * 12 + now.month - int(month)
+        return months_ago > self.horizon_months
+
+    def should_skip(self, year, month, file_path, now=None):
+        """
+        Whether a month can be skipped: it is finalized, was scraped before and its
+        saved file still has the recorded content hash.
+
+        Args:
+            year (int): The year of the month.
+            month (int): The month number.
+            file_path (str): Path of the saved file of the month.
+            now (datetime): Reference time, defaults to now.
+
+        Returns:
+            bool: True if the month does not need to be scraped.
+        """
+        entry = self.get(year, month)
+        if entry is None or not self.is_finalized(year, month, now):
+            return False
+        if not os.path.exists(file_path):
+            return False
+        return file_hash(file_path) == entry['content_hash']
+
+    def record(self, year, month, file_path, **extra):
+        """
+        Record a freshly scraped month.
+
+        Args:
+            year (int): The year of the month.
+            month (int): The month number.
+            file_path (str): Path of the saved file of the month.
+            extra: Additional fields to store (e.g. drive_id).
+        """
+        entry = dict(self.get(year, month) or {})
+        entry.update({
+            'file_path': file_path,
+            'scraped_at': datetime.now().isoformat(timespec='seconds'),
+            'row_count': count_rows(file_path),
+            'content_hash': file_hash(file_path),
+        })
+        entry.update(extra)
+        self.entries[self.key(year, month)] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
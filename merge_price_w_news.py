@@ -1,68 +1,175 @@
-from glob import glob
+import os
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-from config import SELECTED_CURRENCY_PAIRS, FILTER_NEWS_W_PRICE_FOLDER_NAME, DATA_FOLDER_NAME
-from utils import convert_to_datetime, convert_to_float, is_good_for_currency
+from config import SELECTED_CURRENCY_PAIRS, FILTER_NEWS_W_PRICE_FOLDER_NAME, DATA_FOLDER_NAME, \
+    PRICE_CACHE_FOLDER_NAME, PRICE_JOIN_DIRECTION, NUM_PROCESSES
+from utils import is_good_for_currency
+from event_store import read_events, save_frame, VALUE_COLUMNS
+from price_store import PriceStore, PERIOD_LENGTHS
+from event_db import EventDatabase
 
 FOLDER_NAME = "high_impact_news"
+HIGH_IMPACT = "High Impact Expected"
 PERIOD = "PERIOD_H1"
 
+# News frame of a worker process, loaded once by load_news
+news_df = None
+
+
+def prepare_news(news_df):
+    """
+    Compute how good each high impact news was for its currency.
 
-news_df_list = []
-files = glob(f'{DATA_FOLDER_NAME}/{FOLDER_NAME}/**/*.csv', recursive=True)
-for file_path in files:
-    file_name = file_path.split("/")[-1]
-    year = file_path.split("/")[-2]
+    Args:
+        news_df (pd.DataFrame): Typed high_impact_news rows, as returned by event_store.read_events.
 
-    df = pd.read_csv(file_path)
-    df = df.loc[df["criteria"] != 0, :]
-    df = df.loc[df["Currency"] != "CNY", :]
+    Returns:
+        pd.DataFrame: The news sorted by DateTime and Currency.
+    """
+    news_df = news_df.loc[news_df["criteria"] != 0, :]
+    news_df = news_df.loc[news_df["Currency"] != "CNY", :]
+    news_df["Currency"] = news_df["Currency"].astype(str)
 
-    # Convert datetime
-    # Chuẩn hoá datetime để cùng thời gian với giá (lấy xuống)
-    df['DateTime'] = df.apply(lambda row: convert_to_datetime(
-        ' '.join(row['Date'].split()[1:]), row['Time'], year).replace(minute=0), axis=1)
+    # Exact release time, matched to a price bar below
+    news_df['DateTime'] = news_df['datetime']
 
     # Apply conversion
-    df['Actual_float'] = df['Actual'].apply(convert_to_float)
-    df['Forecast_float'] = df['Forecast'].apply(convert_to_float)
+    news_df['Actual_float'] = news_df['actual_value']
+    news_df['Forecast_float'] = news_df['forecast_value']
+    news_df = news_df.drop(columns=['datetime', *VALUE_COLUMNS.values()])
 
     # Create difference column
-    df['Diff'] = df['Actual_float'] - df['Forecast_float']
-    df['Good_for_Currency'] = df.apply(is_good_for_currency, axis=1)
+    news_df['Diff'] = news_df['Actual_float'] - news_df['Forecast_float']
+    news_df['Good_for_Currency'] = news_df.apply(is_good_for_currency, axis=1)
+
+    # --- Sort news data ---
+    news_df = news_df.sort_values(['DateTime', 'Currency'])
+    return news_df.reset_index(drop=True)
+
+
+def build_news_frame(source="files"):
+    """
+    Load all the high impact news and prepare them for the merge.
+
+    Args:
+        source (str): "files" reads the high_impact_news/ months, "db" the event database.
+
+    Returns:
+        pd.DataFrame: The news sorted by DateTime and Currency.
+    """
+    # Typed events: UTC datetime and float actual/forecast values are already parsed
+    if source == "db":
+        with EventDatabase() as database:
+            return prepare_news(database.query(impacts=[HIGH_IMPACT], with_criteria=True))
+    return prepare_news(read_events(f'{DATA_FOLDER_NAME}/{FOLDER_NAME}'))
+
+
+def load_news(file_path):
+    """Worker initializer: read the news frame shared by the parent process once."""
+    global news_df
+    news_df = pd.read_pickle(file_path)
+
+
+def price_file(currency_pair):
+    return f"{DATA_FOLDER_NAME}/price_data_raw/{currency_pair}_{PERIOD}_2015-2025.csv"
 
-    news_df_list.append(df)
 
-# --- Concat news list ---
-news_df = pd.concat(news_df_list)
-news_df = news_df.reset_index(drop=True)
-news_df['DateTime'] = pd.to_datetime(news_df['DateTime'], utc=True)
-# --- Sort news data ---
-news_df = news_df.sort_values(['DateTime', 'Currency'])
+def load_prices(currency_pair):
+    """
+    Load the price bars of a pair.
 
+    Converted once to memory-mapped arrays, rebuilt when the CSV export changes.
 
-# --- Load price data ---
-for currency_pair in SELECTED_CURRENCY_PAIRS:
-    price_df = pd.read_csv(
-        f"{DATA_FOLDER_NAME}/price_data_raw/{currency_pair}_{PERIOD}_2015-2025.csv", encoding="utf-16")
-    price_df['DateTime'] = pd.to_datetime(
-        price_df['time'], format="%Y.%m.%d %H:%M", utc=True)
-    price_df = price_df.drop('time', axis=1)
+    Args:
+        currency_pair (str): The pair, e.g. "EURUSD".
 
-    # --- Add preClose (shifted close) ---
-    price_df['preClose'] = price_df['close'].shift(1)
-    price_df['pctChg'] = (price_df['close'] -
-                          price_df['preClose']) / price_df['preClose'] * 100
+    Returns:
+        PriceSeries: The bars of the pair.
+    """
+    price_store = PriceStore(f"{DATA_FOLDER_NAME}/{PRICE_CACHE_FOLDER_NAME}")
+    return price_store.load(currency_pair, PERIOD, price_file(currency_pair))
 
-    # --- Merge on datetime ---
-    merged_df = pd.merge(news_df, price_df, on="DateTime", how="left")
+
+def match_prices(news_df, prices, period=PERIOD):
+    """
+    Add the price bar of every news.
+
+    Args:
+        news_df (pd.DataFrame): The news as returned by prepare_news.
+        prices (PriceSeries): The bars of the pair.
+        period (str): The MetaTrader period of the bars.
+
+    Returns:
+        pd.DataFrame: The news with BarDateTime, the bar columns, preClose and pctChg,
+        sorted by DateTime and Currency.
+    """
+    # --- Find the bar of every news (as-of, at most one bar away) ---
+    bar_indexes = prices.asof_indexes(
+        news_df['DateTime'], direction=PRICE_JOIN_DIRECTION, tolerance=PERIOD_LENGTHS[period])
+    bars = prices.take(bar_indexes)
+
+    # --- Add preClose (close of the previous bar) ---
+    bars['preClose'] = prices.take(np.where(bar_indexes > 0, bar_indexes - 1, -1))['close']
+    bars['pctChg'] = (bars['close'] -
+                      bars['preClose']) / bars['preClose'] * 100
+
+    merged_df = pd.concat([news_df.reset_index(drop=True), bars], axis=1)
 
     # --- Sort merged data ---
-    merged_df = merged_df.sort_values(['DateTime', 'Currency'])
+    return merged_df.sort_values(['DateTime', 'Currency'])
+
+
+def merged_file_stem(currency_pair):
+    return f"{DATA_FOLDER_NAME}/{FILTER_NEWS_W_PRICE_FOLDER_NAME}/{currency_pair}_{PERIOD}"
+
+
+def merge_pair(currency_pair):
+    """
+    Match every news to the price bar of one pair and save the result.
+
+    Args:
+        currency_pair (str): The pair, e.g. "EURUSD".
+
+    Returns:
+        str: Path of the saved file.
+    """
+    merged_df = match_prices(news_df, load_prices(currency_pair))
 
     # --- Save merged data ---
-    merged_df.to_csv(
-        f"{DATA_FOLDER_NAME}/{FILTER_NEWS_W_PRICE_FOLDER_NAME}/{currency_pair}_{PERIOD}.csv", index=False)
+    return save_frame(merged_df, merged_file_stem(currency_pair))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match the high impact news to the price bars of every pair.")
+    parser.add_argument(
+        "--workers", type=int, default=NUM_PROCESSES,
+        help="Number of pairs merged in parallel (default: one per CPU, 1 runs in this process)")
+    parser.add_argument(
+        "--source", choices=["files", "db"], default="files",
+        help="Read the news from the high_impact_news/ months or from the event database")
+    args = parser.parse_args()
+    os.makedirs(f"{DATA_FOLDER_NAME}/{FILTER_NEWS_W_PRICE_FOLDER_NAME}", exist_ok=True)
+
+    if args.workers == 1:
+        news_df = build_news_frame(args.source)
+        saved_files = [merge_pair(currency_pair) for currency_pair in SELECTED_CURRENCY_PAIRS]
+    else:
+        # Workers read the news frame from disk once, instead of receiving it with every pair
+        with tempfile.TemporaryDirectory() as temp_folder:
+            news_file = f"{temp_folder}/news.pkl"
+            build_news_frame(args.source).to_pickle(news_file)
+            with ProcessPoolExecutor(
+                    max_workers=args.workers, initializer=load_news, initargs=(news_file,)) as executor:
+                # map keeps the order of SELECTED_CURRENCY_PAIRS
+                saved_files = list(executor.map(merge_pair, SELECTED_CURRENCY_PAIRS))
+
+    for saved_file in saved_files:
+        print(saved_file)
 
 
 # - Cần kiểm tra xem giá tại 1 thời điểm đó, có những tin gì và giá sẽ đi như thế nào
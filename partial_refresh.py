@@ -0,0 +1,160 @@
+import os
+
+import pandas as pd
+
+from event_store import month_file, save_month_frame, load_month_frame, NEWS_DATETIME_FORMAT
+from utils import contains_day_or_month, convert_to_datetime, infer_year_month, structure_scraped_data
+
+
+def scraped_dates(data):
+    """
+    List the calendar dates present in scraped rows, including days without allowed events.
+
+    Args:
+        data (list): The scraped data as a list of lists.
+
+    Returns:
+        list: Dates as shown on the calendar without the day name (e.g. "Oct 18").
+    """
+    dates = []
+    for row in data:
+        if len(row) == 1 or len(row) == 5:
+            match, day = contains_day_or_month(row[0])
+            if match:
+                current_date = row[0].replace(day, "").replace("\n", "").strip()
+                if current_date not in dates:
+                    dates.append(current_date)
+    return dates
+
+
+def split_by_month(dates, target_date):
+    """
+    Group calendar dates by the month file they belong to.
+
+    Args:
+        dates (iterable): Dates as shown on the calendar.
+        target_date (date): A date of the scraped week or day.
+
+    Returns:
+        dict: (year, month) -> list of dates.
+    """
+    months = {}
+    for date_text in dates:
+        year, month = infer_year_month(date_text, target_date)
+        if month is not None:
+            months.setdefault((year, month), []).append(date_text)
+    return months
+
+
+def day_of_month(dates):
+    return dates.astype(str).str.split().str[-1].astype(int)
+
+
+def merge_news_month(existing, partial, start, end, days):
+    """
+    Replace the rows of a news/ month file that belong to the refreshed days.
+
+    Timed rows are saved in UTC and belong to the days when they fall between start and
+    end. All Day, Tentative and Day N rows are saved at local midnight and belong to the
+    days when their date is one of them. A timed row at midnight UTC reads like one of those
+    under a negative UTC offset, so rows scraped again are replaced wherever they fall.
+
+    Args:
+        existing (pd.DataFrame): The saved month (datetime, currency, impact, event).
+        partial (pd.DataFrame): The freshly scraped rows of the days.
+        start (str): First datetime of the days in UTC, formatted like the datetime column.
+        end (str): Last datetime of the days in UTC.
+        days (list): The refreshed days at local midnight, formatted like the datetime column.
+
+    Returns:
+        pd.DataFrame: The merged month, sorted by datetime. Rows of other days are untouched.
+    """
+    datetimes = existing['datetime'].astype(str)
+    midnight = datetimes.str.endswith(" 00:00:00")
+    refreshed = datetimes.isin(days) | (~midnight & (datetimes >= start) & (datetimes <= end))
+    columns = list(partial.columns)
+    refreshed |= pd.MultiIndex.from_frame(existing[columns].fillna("").astype(str)).isin(
+        pd.MultiIndex.from_frame(partial[columns].fillna("").astype(str)))
+    merged = pd.concat([existing.loc[~refreshed, :], partial])
+    return merged.sort_values(['datetime'], kind='mergesort')
+
+
+def merge_raw_month(existing, partial, dates):
+    """
+    Upsert freshly scraped rows into a raw_news/ month file.
+
+    Rows of the refreshed days, and rows whose event_id was scraped again (e.g. an
+    event moved to another day), are replaced. Everything else is left as it is.
+
+    Args:
+        existing (pd.DataFrame): The saved month as written by scrape_full_data.py.
+        partial (pd.DataFrame): The freshly scraped rows of the month.
+        dates (list): The refreshed dates, as in the Date column.
+
+    Returns:
+        pd.DataFrame: The merged month in calendar order.
+    """
+    refreshed = existing['Date'].isin(dates) | existing['event_id'].astype(str).isin(
+        partial['event_id'].astype(str))
+    merged = pd.concat([existing.loc[~refreshed, :], partial])
+    return merged.iloc[day_of_month(merged['Date']).argsort(kind='mergesort')]
+
+
+def merge_news_partial(data, target_date, folder_name):
+    """
+    Merge the rows of a scraped week or day page into the news/ month files.
+
+    Args:
+        data (list): The scraped data as a list of lists.
+        target_date (date): A date of the scraped week or day.
+        folder_name (str): Output folder holding {year}/{month} files.
+
+    Returns:
+        list: (year, month, file_name) of every month file written.
+    """
+    partial = structure_scraped_data(data, target_date.year, target_date=target_date)
+    partial_months = [infer_year_month(text, target_date) for text in partial['date']]
+    partial = partial.drop(columns=['date'])
+
+    written = []
+    for (year, month), dates in split_by_month(scraped_dates(data), target_date).items():
+        month_rows = partial.loc[[key == (year, month) for key in partial_months], :]
+        days = sorted(dates, key=lambda text: int(text.split()[-1]))
+        start = convert_to_datetime(days[0], "12:00am", year).strftime('%Y.%m.%d %H:%M:%S')
+        end = convert_to_datetime(days[-1], "11:59pm", year).strftime('%Y.%m.%d %H:%M:59')
+        local_days = [convert_to_datetime(day, "All Day", year).strftime(NEWS_DATETIME_FORMAT) for day in days]
+
+        file_name = month_file(folder_name, year, month)
+        if os.path.exists(file_name):
+            month_rows = merge_news_month(load_month_frame(file_name), month_rows, start, end, local_days)
+
+        save_month_frame(month_rows, folder_name, year, month)
+        written.append((year, month, file_name))
+    return written
+
+
+def merge_raw_partial(data, target_date, folder_name):
+    """
+    Merge a parsed week or day page into the raw_news/ month files.
+
+    Args:
+        data (pd.DataFrame): The page as returned by calendar_parser.parse_calendar_html.
+        target_date (date): A date of the scraped week or day.
+        folder_name (str): Output folder holding {year}/{month} files.
+
+    Returns:
+        list: (year, month, file_name) of every month file written.
+    """
+    months = [infer_year_month(text, target_date) for text in data['Date']]
+
+    written = []
+    for (year, month), dates in split_by_month(data['Date'].unique(), target_date).items():
+        month_rows = data.loc[[key == (year, month) for key in months], :]
+
+        file_name = month_file(folder_name, year, month)
+        if os.path.exists(file_name):
+            month_rows = merge_raw_month(load_month_frame(file_name), month_rows, dates)
+
+        save_month_frame(month_rows, folder_name, year, month)
+        written.append((year, month, file_name))
+    return written
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+
+import pandas as pd
+
+from config import SELECTED_CURRENCY_PAIRS, DATA_FOLDER_NAME, PIPELINE_STATE_FILE, STORAGE_FORMAT
+from manifest import file_hash
+from event_store import list_month_files, load_month_frame, to_typed, save_frame, load_frame, FILE_EXTENSIONS
+from price_store import PriceStore
+from criteria_cache import CriteriaCache
+from details_fetcher import DetailsFetcher
+
+import get_criteria_data
+import merge_price_w_news
+
+
+def fingerprint(parts):
+    """Hash of the fingerprints of the inputs of a partition."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class Stage:
+    def __init__(self, name, partitions, run, depends_on=()):
+        """
+        One step of the pipeline, split into independent partitions (a month, a pair...).
+
+        :param name: Name of the stage.
+        :param partitions: Callable returning {partition key: (run arguments, input fingerprints)}.
+            It is called after the upstream stages ran, so it sees their fresh outputs.
+        :param run: Callable processing one partition, called with the run arguments.
+        :param depends_on: Names of the stages whose outputs this stage reads.
+        """
+        self.name = name
+        self.partitions = partitions
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+
+class Pipeline:
+    def __init__(self, stages, state_path=PIPELINE_STATE_FILE):
+        """
+        Runs stages in dependency order, skipping the partitions whose inputs did not change.
+
+        The fingerprint of the inputs of every partition that ran successfully is kept in a
+        JSON file. A partition runs again when its fingerprint changes, so a re-scraped month
+        only flows through the partitions that read it.
+
+        :param stages: The stages, in any order.
+        :param state_path: Path of the JSON state file.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                self.state = json.load(f)
+
+    def ordered_stages(self):
+        """
+        Sort the stages so every stage comes after the stages it depends on.
+
+        Returns:
+            list: The stages in execution order.
+        """
+        ordered = []
+        visiting = set()
+
+        def visit(name):
+            stage = self.stages[name]
+            if stage in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in the pipeline at stage {name}")
+            visiting.add(name)
+            for dependency in stage.depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(stage)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def run(self, only=None, force=False):
+        """
+        Run the stale partitions of every stage.
+
+        Args:
+            only (list): Names of the stages to run (optional, default all).
+            force (bool): Run every partition, changed or not.
+
+        Returns:
+            list: (stage name, partition key, error) of the partitions that failed.
+        """
+        failures = []
+        for stage in self.ordered_stages():
+            if only is not None and stage.name not in only:
+                continue
+
+            partitions = stage.partitions()
+            stale = {}
+            for key, (arguments, inputs) in partitions.items():
+                partition_fingerprint = fingerprint(inputs)
+                if force or self.state.get(f"{stage.name}:{key}") != partition_fingerprint:
+                    stale[key] = (arguments, partition_fingerprint)
+            print(f"{stage.name}: {len(stale)} of {len(partitions)} partitions to run")
+
+            for key, (arguments, partition_fingerprint) in stale.items():
+                try:
+                    stage.run(*arguments)
+                except Exception as e:
+                    print(f"{stage.name} {key} failed: {e}")
+                    failures.append((stage.name, key, str(e)))
+                    continue
+                self.state[f"{stage.name}:{key}"] = partition_fingerprint
+                self.save()
+        return failures
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.state_path)
+
+
+def month_key(year, month):
+    return f"{year}-{month:02d}"
+
+
+def partition_folder(currency_pair):
+    """Folder of the per-month merged news and prices of a pair."""
+    return f"{merge_price_w_news.merged_file_stem(currency_pair)}_months"
+
+
+def build_stages():
+    """
+    Build the stages criteria -> merge -> collect -> evaluate.
+
+    Returns:
+        list: The stages.
+    """
+    fetcher = None
+    cache = None
+
+    def criteria_partitions():
+        return {
+            month_key(year, month): ((file_path, year, month), [file_hash(file_path)])
+            for year, month, file_path in list_month_files(get_criteria_data.FOLDER_NAME)
+        }
+
+    def criteria(file_path, year, month):
+        nonlocal fetcher, cache
+        # Created on the first stale month only
+        if fetcher is None:
+            cache = CriteriaCache()
+            fetcher = DetailsFetcher(cache=cache)
+        get_criteria_data.get_criteria(file_path, fetcher, year, month)
+        cache.save()
+
+    def merge_partitions():
+        news_folder = f"{DATA_FOLDER_NAME}/{merge_price_w_news.FOLDER_NAME}"
+        news_months = [
+            (year, month, file_path, file_hash(file_path))
+            for year, month, file_path in list_month_files(news_folder)
+        ]
+        partitions = {}
+        for currency_pair in SELECTED_CURRENCY_PAIRS:
+            price_file = merge_price_w_news.price_file(currency_pair)
+            if not os.path.exists(price_file):
+                continue
+            price_stamp = PriceStore.source_stamp(price_file)
+            for year, month, file_path, news_hash in news_months:
+                partitions[f"{currency_pair}/{month_key(year, month)}"] = (
+                    (currency_pair, year, month, file_path), [news_hash, price_stamp])
+        return partitions
+
+    def merge(currency_pair, year, month, file_path):
+        news_df = to_typed(load_month_frame(file_path), year)
+        news_df = merge_price_w_news.prepare_news(news_df)
+        merged_df = merge_price_w_news.match_prices(news_df, merge_price_w_news.load_prices(currency_pair))
+        os.makedirs(f"{partition_folder(currency_pair)}/{year}", exist_ok=True)
+        save_frame(merged_df, f"{partition_folder(currency_pair)}/{year}/{month}")
+
+    def collect_partitions():
+        partitions = {}
+        for currency_pair in SELECTED_CURRENCY_PAIRS:
+            month_files = list_month_files(partition_folder(currency_pair))
+            if month_files:
+                partitions[currency_pair] = (
+                    (currency_pair, [file_path for _, _, file_path in month_files]),
+                    [file_hash(file_path) for _, _, file_path in month_files])
+        return partitions
+
+    def collect(currency_pair, month_files):
+        merged_df = pd.concat([load_frame(os.path.splitext(file_path)[0]) for file_path in month_files])
+        merged_df = merged_df.sort_values(['DateTime', 'Currency'], kind='mergesort')
+        save_frame(merged_df, merge_price_w_news.merged_file_stem(currency_pair))
+
+    def evaluate_partitions():
+        partitions = {}
+        for currency_pair in SELECTED_CURRENCY_PAIRS:
+            file_path = f"{merge_price_w_news.merged_file_stem(currency_pair)}.{FILE_EXTENSIONS[STORAGE_FORMAT]}"
+            if os.path.exists(file_path):
+                partitions[currency_pair] = ((currency_pair,), [file_hash(file_path)])
+        return partitions
+
+    def evaluate(currency_pair):
+        # evaluation.utils is only needed by this stage
+        from evaluate_dataset import evaluate_pair
+        for output in evaluate_pair(currency_pair):
+            print(output)
+
+    return [
+        Stage("criteria", criteria_partitions, criteria),
+        Stage("merge", merge_partitions, merge, depends_on=["criteria"]),
+        Stage("collect", collect_partitions, collect, depends_on=["merge"]),
+        Stage("evaluate", evaluate_partitions, evaluate, depends_on=["collect"]),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run scrape_full_data.py -> get_criteria_data.py -> merge_price_w_news.py -> "
+                    "evaluate_dataset.py, only for the months whose inputs changed.")
+    parser.add_argument(
+        "--scrape", action="store_true",
+        help="Run scrape_full_data.py first, with the arguments this script does not know")
+    parser.add_argument("--only", nargs="+", help="Stages to run (default: all)")
+    parser.add_argument("--force", action="store_true", help="Run every partition, changed or not")
+    args, scrape_args = parser.parse_known_args()
+
+    if args.scrape:
+        # scrape_full_data.py keeps its own manifest of the months to fetch
+        subprocess.run([sys.executable, "scrape_full_data.py", *scrape_args], check=True)
+
+    pipeline = Pipeline(build_stages())
+    failures = pipeline.run(only=args.only, force=args.force)
+    if failures:
+        print(f"{len(failures)} partitions failed, they will run again next time")
+        sys.exit(1)
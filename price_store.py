@@ -0,0 +1,177 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from config import PRICE_CACHE_FOLDER_NAME
+
+# Length of the bars of every MetaTrader period
+PERIOD_LENGTHS = {
+    "PERIOD_M1": pd.Timedelta(minutes=1),
+    "PERIOD_M5": pd.Timedelta(minutes=5),
+    "PERIOD_M15": pd.Timedelta(minutes=15),
+    "PERIOD_M30": pd.Timedelta(minutes=30),
+    "PERIOD_H1": pd.Timedelta(hours=1),
+    "PERIOD_H4": pd.Timedelta(hours=4),
+    "PERIOD_D1": pd.Timedelta(days=1),
+}
+
+TIME_FORMAT = "%Y.%m.%d %H:%M"
+
+
+class PriceSeries:
+    def __init__(self, times, columns):
+        """
+        Price bars of one pair and period, sorted by time.
+
+        :param times: int64 array of bar open times in UTC nanoseconds.
+        :param columns: Column name -> array of the bar values (memory-mapped when loaded from the store).
+        """
+        self.times = times
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.times)
+
+    def asof_indexes(self, datetimes, direction="backward", tolerance=None):
+        """
+        Find the bar of every datetime with a binary search.
+
+        "backward" takes the last bar opened at or before the datetime (the bar the
+        datetime falls in), "forward" the first bar opened at or after it.
+
+        Args:
+            datetimes (pd.Series or pd.DatetimeIndex): UTC datetimes to look up.
+            direction (str): "backward" or "forward".
+            tolerance (pd.Timedelta): Matches this far away or further are dropped (optional).
+
+        Returns:
+            np.ndarray: Index of the matched bar of every datetime, -1 where there is none.
+        """
+        values = pd.DatetimeIndex(datetimes).tz_convert('UTC').to_numpy(dtype='datetime64[ns]').view(np.int64)
+        missing = pd.isna(datetimes)
+
+        if direction == "backward":
+            indexes = np.searchsorted(self.times, values, side='right') - 1
+            found = indexes >= 0
+        elif direction == "forward":
+            indexes = np.searchsorted(self.times, values, side='left')
+            found = indexes < len(self.times)
+        else:
+            raise ValueError(f"Unknown direction: {direction}")
+
+        indexes = np.where(found & ~np.asarray(missing), indexes, -1)
+        if tolerance is not None:
+            matched = indexes >= 0
+            distance = np.abs(values[matched] - self.times[indexes[matched]])
+            too_far = distance >= pd.Timedelta(tolerance).value
+            indexes[np.flatnonzero(matched)[too_far]] = -1
+        return indexes
+
+    def take(self, indexes):
+        """
+        Gather the bars at the given indexes.
+
+        Args:
+            indexes (np.ndarray): Bar indexes as returned by asof_indexes.
+
+        Returns:
+            pd.DataFrame: BarDateTime and every price column, NaN where the index is -1.
+        """
+        found = indexes >= 0
+        safe_indexes = np.where(found, indexes, 0)
+        bar_times = pd.to_datetime(np.where(found, self.times[safe_indexes], np.iinfo(np.int64).min), utc=True)
+        data = {'BarDateTime': bar_times}
+        for name, values in self.columns.items():
+            data[name] = np.where(found, values[safe_indexes].astype(float), np.nan)
+        return pd.DataFrame(data)
+
+
+class PriceStore:
+    def __init__(self, root=PRICE_CACHE_FOLDER_NAME):
+        """
+        Binary cache of the price CSV exports.
+
+        Every (pair, period) is converted once into one .npy file per column, with the
+        bar times sorted, and memory-mapped on load. The conversion is redone when the
+        source CSV changes.
+
+        :param root: Folder of the cache.
+        """
+        self.root = root
+
+    def series_folder(self, currency_pair, period):
+        return f"{self.root}/{currency_pair}_{period}"
+
+    @staticmethod
+    def source_stamp(csv_path):
+        stat = os.stat(csv_path)
+        return {'source': csv_path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def is_fresh(self, currency_pair, period, csv_path):
+        meta_path = f"{self.series_folder(currency_pair, period)}/meta.json"
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        return meta['stamp'] == self.source_stamp(csv_path)
+
+    def build(self, currency_pair, period, csv_path, encoding="utf-16"):
+        """
+        Convert a MetaTrader CSV export ("time" column plus numeric columns) into the cache.
+
+        Args:
+            currency_pair (str): The pair, e.g. "EURUSD".
+            period (str): The MetaTrader period, e.g. "PERIOD_H1".
+            csv_path (str): Path of the CSV export.
+            encoding (str): Encoding of the CSV export.
+
+        Returns:
+            str: Folder of the cached series.
+        """
+        price_df = pd.read_csv(csv_path, encoding=encoding)
+        times = pd.to_datetime(price_df['time'], format=TIME_FORMAT, utc=True)
+        price_df = price_df.drop('time', axis=1)
+        price_df['time'] = times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        price_df = price_df.sort_values('time', kind='mergesort').drop_duplicates('time', keep='last')
+
+        folder = self.series_folder(currency_pair, period)
+        os.makedirs(folder, exist_ok=True)
+        columns = [column for column in price_df.columns if column != 'time']
+        np.save(f"{folder}/time.npy", price_df['time'].to_numpy(dtype=np.int64))
+        for column in columns:
+            np.save(f"{folder}/{column}.npy", price_df[column].to_numpy(dtype=np.float64))
+
+        # Written last: a cache without meta.json is rebuilt
+        temp_path = f"{folder}/meta.json.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'stamp': self.source_stamp(csv_path), 'columns': columns, 'rows': len(price_df)}, f)
+        os.replace(temp_path, f"{folder}/meta.json")
+        print(f"Cached {len(price_df)} {currency_pair} {period} bars in {folder}")
+        return folder
+
+    def load(self, currency_pair, period, csv_path=None):
+        """
+        Memory-map the cached series, converting the CSV export first if needed.
+
+        Args:
+            currency_pair (str): The pair, e.g. "EURUSD".
+            period (str): The MetaTrader period, e.g. "PERIOD_H1".
+            csv_path (str): Path of the CSV export. Without it the cache is used as it is.
+
+        Returns:
+            PriceSeries: The bars of the pair.
+        """
+        if csv_path is not None and not self.is_fresh(currency_pair, period, csv_path):
+            self.build(currency_pair, period, csv_path)
+
+        folder = self.series_folder(currency_pair, period)
+        with open(f"{folder}/meta.json", 'r') as f:
+            meta = json.load(f)
+        times = np.load(f"{folder}/time.npy", mmap_mode='r')
+        columns = {
+            column: np.load(f"{folder}/{column}.npy", mmap_mode='r')
+            for column in meta['columns']
+        }
+        return PriceSeries(times, columns)
@@ -3,9 +3,15 @@
 export PYTHONPATH=.
 
 # Define the path to the Python script
-SCRIPT_PATH="scrape.py"
+SCRIPT_PATH="scraper.py"
 
 # Run the Python script
 /usr/bin/python3 "$SCRIPT_PATH"
 
-# 0 0 * * * run_scraper.sh >> /path/to/logfile.log 2>&1
+# Refresh the raw months and rerun the downstream stages of the months that changed
+# /usr/bin/python3 pipeline.py --scrape
+
+# Keep watching today's releases and append the Actual values to a JSONL file
+# /usr/bin/python3 calendar_watcher.py --impact High --jsonl live_actuals.jsonl
+
+# 0 0 * * * run_scrape.sh >> /path/to/logfile.log 2>&1
@@ -1,172 +1,152 @@
-try:
-    import undetected_chromedriver as uc
-    from selenium_stealth import stealth
-
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-except:
-    from selenium import webdriver
-    from webdriver_manager.chrome import ChromeDriverManager
-
-    print("AF: No Chrome webdriver installed")
-    driver = webdriver.Chrome(ChromeDriverManager().install())
-
-import os
-import time
-import json
+import sys
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
-from config import ALLOWED_ELEMENT_TYPES, ICON_COLOR_MAP, REQUEST_URL, MONTH_NUM_TO_NAME, SERVICE_ACCOUNT_FILE, SHARED_FOLDER_ID, FOLDER_NAME
-from utils import reformat_scraped_data, construct_url
+from utils import generate_targets, generate_partial_target, parse_scrape_args, filter_targets
+from calendar_parser import parse_calendar_html, CALENDAR_COLUMNS
+from browser import DriverPool
+from fetcher import fetcher_factory
+from manifest import ScrapeManifest
+from partial_refresh import merge_raw_partial, split_by_month
+from snapshot_cache import SnapshotCache
+from job_queue import JobQueue
+from event_stream import iter_calendar_events, month_sink, run_stream, SqliteSink
+from event_db import EventDatabase
+from event_store import load_month_frame
 
 FOLDER_NAME = "raw_news"
 
+# Event database the months are also upserted into, opened by __main__ (optional)
+event_database = None
+
+
+def scrape_month(fetcher, target):
+    """
+    Scrape every row of one calendar month with an already running fetcher.
+
+    Args:
+        fetcher (Fetcher): The fetcher to load the page with.
+        target (tuple): (year, month, url) as built by generate_targets.
+
+    Returns:
+        str: Path of the saved file.
+    """
+    selected_year, selected_month, url = target
+
+    return save_month(fetcher.fetch(url), selected_year, selected_month)
+
+
+def save_month(html, selected_year, selected_month):
+    """
+    Stream the rows of one month page into its month file, and into the event database if open.
+
+    Args:
+        html (str): Page source of the calendar page.
+        selected_year (int): The year of the month.
+        selected_month (int): The month number.
+
+    Returns:
+        str: Path of the saved file.
+    """
+    sinks = [month_sink(FOLDER_NAME, selected_year, selected_month, CALENDAR_COLUMNS)]
+    if event_database is not None:
+        sinks.append(SqliteSink(event_database, selected_year, selected_month, prune=True))
+    run_stream(iter_calendar_events(html), *sinks)
+    return sinks[0].path
+
+
+def scrape_partial(fetcher, target):
+    """
+    Scrape every row of one calendar week or day and merge it into the month files.
+
+    Args:
+        fetcher (Fetcher): The fetcher to load the page with.
+        target (tuple): (period, date, url) as built by generate_partial_target.
+
+    Returns:
+        list: (year, month, file_name) of every month file written.
+    """
+    _, target_date, url = target
+    data = parse_calendar_html(fetcher.fetch(url))
+
+    written = merge_raw_partial(data, target_date, FOLDER_NAME)
+    if event_database is not None:
+        upsert_partial(data, target_date, written)
+    return written
+
+
+def upsert_partial(data, target_date, written):
+    """
+    Upsert the month files written by a week or day refresh into the event database.
+
+    Only the refreshed days are pruned: the rest of the month was not on the page.
+
+    Args:
+        data (pd.DataFrame): The parsed week or day page.
+        target_date (date): A date of the scraped week or day.
+        written (list): (year, month, file_name) as returned by merge_raw_partial.
+    """
+    refreshed_dates = split_by_month(data['Date'].unique(), target_date)
+    for selected_year, selected_month, file_name in written:
+        df = load_month_frame(file_name)
+        event_database.upsert_frame(df, selected_year, selected_month)
+        event_ids = pd.to_numeric(df['event_id'], errors='coerce').dropna()
+        event_database.prune_month(
+            selected_year, selected_month, event_ids, dates=refreshed_dates[(selected_year, selected_month)])
+
+
+def reparse_snapshots(snapshots, manifest):
+    """
+    Rebuild every month file from the cached HTML, without fetching anything.
+
+    Args:
+        snapshots (SnapshotCache): The snapshot cache.
+        manifest (ScrapeManifest): The manifest of the output folder.
+    """
+    for selected_year, selected_month in snapshots.months():
+        file_name = save_month(snapshots.get_month(selected_year, selected_month), selected_year, selected_month)
+        manifest.record(selected_year, selected_month, file_name)
+    manifest.save()
+
+
+if __name__ == "__main__":
+    args = parse_scrape_args()
+    manifest = ScrapeManifest(f"{FOLDER_NAME}/manifest.json")
+    snapshots = SnapshotCache()
+    event_database = EventDatabase()
 
-def generate_driver():
     try:
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.6167.140 Safari/537.36"
-        chrome_options = uc.ChromeOptions()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("user-agent={}".format(user_agent))
-        driver = uc.Chrome(options=chrome_options)
-        stealth(driver,
-                languages=["en-US", "en"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True
-                )
-        return driver
-    except Exception as e:
-        print("Error in Driver: ", e)
-
-
-current_time = datetime.now()
-year = current_time.year
-structure_data = []
-
-for selected_year in range(year, year - 3, -1):
-    for selected_month in range(1, 13):
-        month_param = "{}.{}".format(
-            MONTH_NUM_TO_NAME[selected_month],
-            selected_year)
-        url = construct_url(
-            url=REQUEST_URL,
-            month=month_param
-        )
-        driver = generate_driver()
-        driver.implicitly_wait(20)
-
-        with driver as browser:
-            browser.get(url)
-
-            commentr = WebDriverWait(browser, 20).until(
-                EC.visibility_of_element_located((By.CLASS_NAME, 'calendar__table')))
-
-            table = browser.find_element(By.CLASS_NAME, "calendar__table")
-
-            data = []
-            previous_row_count = 0
-            # Scroll down to the end of the page
-            while True:
-                # Record the current scroll position
-                before_scroll = browser.execute_script(
-                    "return window.pageYOffset;")
-
-                # Scroll down a fixed amount
-                browser.execute_script(
-                    "window.scrollTo(0, window.pageYOffset + 500);")
-
-                # Wait for a short moment to allow content to load
-                time.sleep(2)
-
-                # Record the new scroll position
-                after_scroll = browser.execute_script(
-                    "return window.pageYOffset;")
-
-                # If the scroll position hasn't changed, we've reached the end of the page
-                if before_scroll == after_scroll:
-                    break
-
-            soup = BeautifulSoup(browser.page_source, "html.parser")
-            previous_date = ""
-            dictionary = {
-                'event_id': [], 'Date': [], 'Time': [], 'Currency': [], 'Impact': [],
-                'Description': [], 'Actual': [], 'Forecast': [], 'Previous': []}
-            for row in soup.find_all("tr"):
-                if "calendar__row" in row.get("class", []):
-                    date_cell = row.find("td", {"class": "calendar__date"})
-                    if date_cell is not None and date_cell.text.strip() != "":
-                        date = date_cell.text.strip()
-                        dictionary['Date'].append(date)
-                        previous_date = date
-                    else:
-                        dictionary['Date'].append(previous_date)
-                    time_cell = row.find("td", {"class": "calendar__time"})
-                    if time_cell is not None:
-                        dictionary['Time'].append(time_cell.text.strip())
-                    else:
-                        dictionary['Time'].append("")
-                    currency_cell = row.find(
-                        "td", {"class": "calendar__currency"})
-                    if currency_cell is not None:
-                        dictionary['Currency'].append(
-                            currency_cell.text.strip())
-                    else:
-                        dictionary['Currency'].append("")
-                    actual_cell = row.find("td", {"class": "calendar__actual"})
-                    if actual_cell is not None:
-                        dictionary['Actual'].append(actual_cell.text.strip())
-                    else:
-                        dictionary['Actual'].append("")
-                    forecast_cell = row.find(
-                        "td", {"class": "calendar__forecast"})
-                    if forecast_cell is not None:
-                        dictionary['Forecast'].append(
-                            forecast_cell.text.strip())
-                    else:
-                        dictionary['Forecast'].append("")
-                    previous_cell = row.find(
-                        "td", {"class": "calendar__previous"})
-                    if previous_cell is not None:
-                        dictionary['Previous'].append(
-                            previous_cell.text.strip())
-                    else:
-                        dictionary['Previous'].append("")
-                    event_cell = row.find("td", {"class": "calendar__event"})
-                    if event_cell is not None:
-
-                        event_id = row.get("data-event-id", "")
-                        dictionary['event_id'].append(
-                            event_id)
-
-                        dictionary['Description'].append(
-                            event_cell.text.strip())
-                    else:
-                        event_id = row.get("data-event-id", "")
-                        dictionary['event_id'].append(
-                            event_id)
-                        dictionary['Description'].append("")
-                    impact_cell = row.find("td", {"class": "calendar__impact"})
-                    if impact_cell is not None:
-                        impact = impact_cell.find('span', {'title': True})
-                        if impact is not None:
-                            dictionary['Impact'].append(impact['title'])
-                        else:
-                            dictionary['Impact'].append("")
-                    else:
-                        dictionary['Impact'].append("")
-
-            data = pd.DataFrame.from_dict(dictionary)
-
-            # Remove rows that only have date information
-            data = data[data['Currency'] != '']
-
-            file_name = f"{FOLDER_NAME}/{selected_year}/{selected_month}.csv"
-
-            os.makedirs(f"{FOLDER_NAME}/{selected_year}", exist_ok=True)
-            data.to_csv(file_name, index=False)
+        if args.reparse:
+            reparse_snapshots(snapshots, manifest)
+            sys.exit(0)
+
+        current_time = datetime.now()
+        year = current_time.year
+
+        pool = DriverPool(
+            num_workers=args.workers,
+            driver_factory=fetcher_factory(
+                args.fetcher, f"{FOLDER_NAME}/page_timings.csv",
+                snapshots=None if args.no_snapshots else snapshots))
+
+        if args.week or args.day:
+            partial_target = generate_partial_target(
+                "week" if args.week else "day", args.week or args.day, url=args.url)
+            for selected_year, selected_month, file_name in pool.map(scrape_partial, [partial_target])[0] or []:
+                manifest.record(selected_year, selected_month, file_name)
+            manifest.save()
+        else:
+            queue = JobQueue(f"{FOLDER_NAME}/queue.json")
+            if not queue.resume():
+                queue.create(filter_targets(
+                    generate_targets(year, url=args.url), manifest, FOLDER_NAME, full=args.full))
+
+            def scrape_and_record(fetcher, target):
+                file_name = scrape_month(fetcher, target)
+                with queue.lock:
+                    manifest.record(target[0], target[1], file_name)
+                    manifest.save()
+                return file_name
+
+            queue.run(pool, scrape_and_record)
+    finally:
+        event_database.close()
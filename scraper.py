@@ -1,137 +1,204 @@
-try:
-    import undetected_chromedriver as uc
-    from selenium_stealth import stealth
-
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-except:
-    from selenium import webdriver
-    from webdriver_manager.chrome import ChromeDriverManager
-
-    print("AF: No Chrome webdriver installed")
-    driver = webdriver.Chrome(ChromeDriverManager().install())
-
-import time
-import json
+import sys
+import threading
 import pandas as pd
 from datetime import datetime
-from config import ALLOWED_ELEMENT_TYPES, ICON_COLOR_MAP, REQUEST_URL, MONTH_NUM_TO_NAME, SERVICE_ACCOUNT_FILE, SHARED_FOLDER_ID, FOLDER_NAME
-from utils import reformat_scraped_data, construct_url
+from config import SERVICE_ACCOUNT_FILE, SHARED_FOLDER_ID, FOLDER_NAME
+from event_store import list_month_files
+from utils import reformat_scraped_data, generate_targets, generate_partial_target, parse_scrape_args, filter_targets
 from drive_handler import DriveUploader
+from browser import DriverPool
+from fetcher import fetcher_factory
+from manifest import ScrapeManifest, file_hash
+from partial_refresh import merge_news_partial
+from snapshot_cache import SnapshotCache
+from job_queue import JobQueue
+from calendar_parser import extract_calendar_rows_html
 
 
-def generate_driver():
-    try:
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.6167.140 Safari/537.36"
-        chrome_options = uc.ChromeOptions()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("user-agent={}".format(user_agent))
-        driver = uc.Chrome(options=chrome_options)
-        stealth(driver,
-                languages=["en-US", "en"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True
-                )
-        return driver
-    except Exception as e:
-        print("Error in Driver: ", e)
-
-
-uploader = DriveUploader(
-    service_account_file=SERVICE_ACCOUNT_FILE,
-    root_folder_id=SHARED_FOLDER_ID
-)
-
-current_time = datetime.now()
-year = current_time.year
-structure_data = []
-
-for selected_year in range(year, year - 3, -1):
-    for selected_month in range(1, 13):
-        month_param = "{}.{}".format(
-            MONTH_NUM_TO_NAME[selected_month],
-            selected_year)
-        url = construct_url(
-            url=REQUEST_URL,
-            month=month_param
-        )
-        driver = generate_driver()
-        driver.implicitly_wait(20)
-
-        with driver as browser:
-            browser.get(url)
-            # browser.get_screenshot_as_file("debug.png")
-
-            commentr = WebDriverWait(browser, 20).until(
-                EC.visibility_of_element_located((By.CLASS_NAME, 'calendar__table')))
-
-            table = browser.find_element(By.CLASS_NAME, "calendar__table")
-
-            data = []
-            previous_row_count = 0
-            # Scroll down to the end of the page
-            while True:
-                # Record the current scroll position
-                before_scroll = browser.execute_script(
-                    "return window.pageYOffset;")
-
-                # Scroll down a fixed amount
-                browser.execute_script(
-                    "window.scrollTo(0, window.pageYOffset + 500);")
-
-                # Wait for a short moment to allow content to load
-                time.sleep(2)
-
-                # Record the new scroll position
-                after_scroll = browser.execute_script(
-                    "return window.pageYOffset;")
-
-                # If the scroll position hasn't changed, we've reached the end of the page
-                if before_scroll == after_scroll:
-                    break
-
-            # Now that we've scrolled to the end, collect the data
-            for row in table.find_elements(By.TAG_NAME, "tr"):
-                row_data = []
-                for element in row.find_elements(By.TAG_NAME, "td"):
-                    class_name = element.get_attribute('class')
-                    if class_name in ALLOWED_ELEMENT_TYPES:
-                        if element.text:
-                            row_data.append(element.text)
-                        elif "calendar__impact" in class_name:
-                            impact_elements = element.find_elements(
-                                By.TAG_NAME, "span")
-                            for impact in impact_elements:
-                                impact_class = impact.get_attribute("class")
-                                color = ICON_COLOR_MAP[impact_class]
-                            if color:
-                                row_data.append(color)
-                            else:
-                                row_data.append("impact")
-
-                if len(row_data):
-                    data.append(row_data)
-
-            local_file_path = reformat_scraped_data(
-                data, selected_month, selected_year)
-            file_drive_id = uploader.upload_or_replace_file(
-                file_path=local_file_path,
-                folder_name=str(selected_year)
-            )
+def scrape_month(fetcher, target):
+    """
+    Scrape one calendar month with an already running fetcher.
+
+    Args:
+        fetcher (Fetcher): The fetcher to load the page with.
+        target (tuple): (year, month, url) as built by generate_targets.
+
+    Returns:
+        str: Path of the saved CSV file.
+    """
+    selected_year, selected_month, url = target
+    data = fetcher.fetch_rows(url)
+
+    return reformat_scraped_data(data, selected_month, selected_year)
+
+
+def scrape_partial(fetcher, target):
+    """
+    Scrape one calendar week or day and merge it into the month files.
+
+    Args:
+        fetcher (Fetcher): The fetcher to load the page with.
+        target (tuple): (period, date, url) as built by generate_partial_target.
+
+    Returns:
+        list: (year, month, file_name) of every month file written.
+    """
+    _, target_date, url = target
+    data = fetcher.fetch_rows(url)
 
+    return merge_news_partial(data, target_date, FOLDER_NAME)
+
+
+# Manifest and metadata writes are serialized, uploads run in parallel
+publish_lock = threading.Lock()
+
+
+def write_metadata(manifest, targets):
+    """
+    Write metadata.csv with the Drive ID of every month known to the manifest.
+
+    Args:
+        manifest (ScrapeManifest): The manifest of the output folder.
+        targets (list): (year, month, url) tuples, in the order of the file.
+
+    Returns:
+        str: Path of the metadata file.
+    """
+    # Skipped months keep the Drive IDs recorded in the manifest
+    structure_data = []
+    for selected_year, selected_month, _ in targets:
+        entry = manifest.get(selected_year, selected_month)
+        if entry is not None and entry.get('drive_id'):
             structure_data.append([
-                selected_year, selected_month, file_drive_id
+                selected_year, selected_month, entry['drive_id']
             ])
 
-structure_df = pd.DataFrame(
-    structure_data, columns=['year', 'month', 'drive_id'])
-structure_file_name = f"{FOLDER_NAME}/metadata.csv"
-structure_df.to_csv(structure_file_name, index=False)
-structure_drive_id = uploader.update_file(
-    file_path=structure_file_name
-)
+    structure_df = pd.DataFrame(
+        structure_data, columns=['year', 'month', 'drive_id'])
+    structure_file_name = f"{FOLDER_NAME}/metadata.csv"
+    structure_df.to_csv(structure_file_name, index=False)
+    return structure_file_name
+
+
+def publish_month(uploader, manifest, targets, selected_year, selected_month, local_file_path):
+    """
+    Upload a scraped month if it changed, record it and checkpoint metadata.csv.
+
+    Args:
+        uploader (DriveUploader): The Drive client, None to only record the month (it is
+            uploaded later by sync_months).
+        manifest (ScrapeManifest): The manifest of the output folder.
+        targets (list): All (year, month, url) tuples of the run.
+        selected_year (int): The year of the month.
+        selected_month (int): The month number.
+        local_file_path (str): Path of the saved CSV file.
+    """
+    # Unchanged files are already on Drive
+    previous = manifest.get(selected_year, selected_month) or {}
+    if uploader is None or (previous.get('drive_id') and previous.get('content_hash') == file_hash(local_file_path)):
+        file_drive_id = previous.get('drive_id')
+    else:
+        file_drive_id = uploader.upload_or_update_file(
+            file_path=local_file_path,
+            folder_name=str(selected_year)
+        )
+
+    with publish_lock:
+        manifest.record(
+            selected_year, selected_month, local_file_path, drive_id=file_drive_id)
+        manifest.save()
+        write_metadata(manifest, targets)
+
+
+def sync_months(uploader, manifest):
+    """
+    Upload the month files that are missing from Drive or differ from it, then
+    regenerate metadata.csv from the Drive IDs of all local months.
+
+    Args:
+        uploader (DriveUploader): The Drive client.
+        manifest (ScrapeManifest): The manifest of the output folder.
+
+    Returns:
+        str: Path of the metadata file.
+    """
+    month_files = list_month_files(FOLDER_NAME)
+    results = uploader.sync_files(
+        [(local_file_path, str(selected_year)) for selected_year, _, local_file_path in month_files])
+
+    for (selected_year, selected_month, local_file_path), (file_drive_id, _) in zip(month_files, results):
+        if file_drive_id is None:
+            continue
+        entry = manifest.get(selected_year, selected_month)
+        if entry is None:
+            manifest.record(selected_year, selected_month, local_file_path, drive_id=file_drive_id)
+        else:
+            # Not rescraped: keep the scrape time and hash
+            entry['drive_id'] = file_drive_id
+    manifest.save()
+    return write_metadata(manifest, [(selected_year, selected_month, None) for selected_year, selected_month, _ in month_files])
+
+
+def reparse_snapshots(snapshots, manifest):
+    """
+    Rebuild every month file from the cached HTML, without fetching anything.
+
+    Args:
+        snapshots (SnapshotCache): The snapshot cache.
+        manifest (ScrapeManifest): The manifest of the output folder.
+    """
+    for selected_year, selected_month in snapshots.months():
+        data = extract_calendar_rows_html(snapshots.get_month(selected_year, selected_month))
+        file_name = reformat_scraped_data(data, selected_month, selected_year)
+        manifest.record(selected_year, selected_month, file_name)
+    manifest.save()
+
+
+if __name__ == "__main__":
+    args = parse_scrape_args()
+    manifest = ScrapeManifest(f"{FOLDER_NAME}/manifest.json")
+    snapshots = SnapshotCache()
+
+    if args.reparse:
+        reparse_snapshots(snapshots, manifest)
+        sys.exit(0)
+
+    uploader = DriveUploader(
+        service_account_file=SERVICE_ACCOUNT_FILE,
+        root_folder_id=SHARED_FOLDER_ID
+    )
+
+    current_time = datetime.now()
+    year = current_time.year
+
+    targets = generate_targets(year, url=args.url)
+    pool = DriverPool(
+        num_workers=args.workers,
+        driver_factory=fetcher_factory(
+            args.fetcher, f"{FOLDER_NAME}/page_timings.csv",
+            snapshots=None if args.no_snapshots else snapshots))
+
+    if args.week or args.day:
+        partial_target = generate_partial_target(
+            "week" if args.week else "day", args.week or args.day, url=args.url)
+        for selected_year, selected_month, local_file_path in pool.map(scrape_partial, [partial_target])[0] or []:
+            publish_month(None if args.sync else uploader, manifest, targets, selected_year, selected_month, local_file_path)
+    else:
+        queue = JobQueue(f"{FOLDER_NAME}/queue.json")
+        if not queue.resume():
+            queue.create(filter_targets(targets, manifest, FOLDER_NAME, full=args.full))
+
+        def scrape_and_publish(fetcher, target):
+            local_file_path = scrape_month(fetcher, target)
+            publish_month(None if args.sync else uploader, manifest, targets, target[0], target[1], local_file_path)
+            return local_file_path
+
+        queue.run(pool, scrape_and_publish)
+
+    if args.sync:
+        structure_file_name = sync_months(uploader, manifest)
+    else:
+        structure_file_name = write_metadata(manifest, targets)
+    structure_drive_id = uploader.update_file(
+        file_path=structure_file_name
+    )
@@ -0,0 +1,138 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+from glob import glob
+from urllib.parse import urlparse, parse_qsl, quote, unquote
+
+from config import SNAPSHOT_FOLDER_NAME, MONTH_NUM_TO_NAME
+from utils import MONTH_NAME_TO_NUM
+
+
+def snapshot_key(url):
+    """
+    Key of a calendar page in the index: its query string, so the same page gets the
+    same key whatever host it was fetched from.
+
+    Args:
+        url (str): The calendar URL, e.g. https://www.forexfactory.com/calendar?month=oct.2025
+
+    Returns:
+        str: The key, e.g. "month=oct.2025".
+    """
+    return urlparse(url).query
+
+
+def month_key(year, month):
+    return f"month={MONTH_NUM_TO_NAME[int(month)]}.{int(year)}"
+
+
+class SnapshotCache:
+    def __init__(self, root=SNAPSHOT_FOLDER_NAME):
+        """
+        Stores the raw HTML of every fetched page gzip-compressed and content-addressed
+        (objects/<first two hash chars>/<sha256>.html.gz), with an index from page key
+        to content hash. Identical pages are only stored once.
+
+        Every index entry is its own file (index/<page key>.json), replaced atomically, so
+        scrapers running at the same time never overwrite each other's entries.
+
+        :param root: Folder of the cache.
+        """
+        self.root = root
+        self.index_folder = f"{root}/index"
+        # Single index file of older caches, read for the pages without an entry file
+        self.legacy_index_path = f"{root}/index.json"
+        self.legacy_index = {}
+        if os.path.exists(self.legacy_index_path):
+            with open(self.legacy_index_path, 'r') as f:
+                self.legacy_index = json.load(f)
+
+    def object_path(self, content_hash):
+        return f"{self.root}/objects/{content_hash[:2]}/{content_hash}.html.gz"
+
+    def entry_path(self, key):
+        return f"{self.index_folder}/{quote(key, safe='')}.json"
+
+    def put(self, url, html):
+        """
+        Store a fetched page.
+
+        :param url: The URL the page was fetched from.
+        :param html: The page HTML.
+        :return: The content hash of the page.
+        """
+        content = html.encode("utf-8")
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self.object_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+
+        entry_path = self.entry_path(snapshot_key(url))
+        os.makedirs(self.index_folder, exist_ok=True)
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'hash': content_hash,
+                'url': url,
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            }, f, indent=2, sort_keys=True)
+        os.replace(temp_path, entry_path)
+        return content_hash
+
+    def entry(self, key):
+        """
+        Read the index entry of a page.
+
+        :param key: The page key (see snapshot_key).
+        :return: Dict with the hash, url and fetched_at of the page, or None.
+        """
+        entry_path = self.entry_path(key)
+        if os.path.exists(entry_path):
+            with open(entry_path, 'r') as f:
+                return json.load(f)
+        return self.legacy_index.get(key)
+
+    def get(self, key):
+        """
+        Read a stored page.
+
+        :param key: The page key (see snapshot_key) or its URL.
+        :return: The page HTML, or None if the page was never fetched.
+        """
+        entry = self.entry(key) or self.entry(snapshot_key(key))
+        if entry is None:
+            return None
+        with gzip.open(self.object_path(entry['hash']), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def get_month(self, year, month):
+        return self.get(month_key(year, month))
+
+    def keys(self):
+        """Keys of all the stored pages."""
+        keys = set(self.legacy_index)
+        for entry_path in glob(f"{self.index_folder}/*.json"):
+            keys.add(unquote(os.path.basename(entry_path)[:-len(".json")]))
+        return keys
+
+    def months(self):
+        """
+        List the cached month pages.
+
+        :return: Sorted list of (year, month) tuples.
+        """
+        months = []
+        for key in self.keys():
+            params = dict(parse_qsl(key))
+            if "month" not in params:
+                continue
+            name, year = params["month"].split(".")
+            months.append((int(year), MONTH_NAME_TO_NUM[name]))
+        return sorted(months)
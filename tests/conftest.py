@@ -0,0 +1,21 @@
+import os
+import sys
+import time
+
+import pytest
+import tzlocal
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Run the test with America/New_York as the local timezone (UTC-4, UTC-5 in winter)."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    tzlocal.reload_localzone()
+    yield "America/New_York"
+    monkeypatch.undo()
+    time.tzset()
+    tzlocal.reload_localzone()
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from criteria_cache import CriteriaCache
+
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat(timespec='seconds')
+
+
+def test_expired_entries_are_fetched_again(tmp_path):
+    path = str(tmp_path / "criteria.json")
+    cache = CriteriaCache(path, ttl_days=30, max_entries=10)
+    cache.put(1, "Actual > Forecast = Good for currency", 1, "USD", "CPI m/m")
+    cache.put(2, "Actual < Forecast = Good for currency", -1, "USD", "Unemployment Rate")
+    cache.events["2"]['fetched_at'] = days_ago(31)
+
+    assert cache.get(1) == ("Actual > Forecast = Good for currency", 1)
+    assert cache.get(2) is None
+    # A sibling occurrence of an expired event is a miss too
+    assert cache.get(3, "USD", "Unemployment Rate") is None
+    assert cache.get(3, "USD", "CPI m/m") == ("Actual > Forecast = Good for currency", 1)
+
+    cache.save()
+    cache = CriteriaCache(path, ttl_days=30, max_entries=10)
+    assert list(cache.events) == ["1"]
+    assert cache.titles == {"USD|CPI m/m": "1"}
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    path = str(tmp_path / "criteria.json")
+    cache = CriteriaCache(path, ttl_days=30, max_entries=2)
+    for event_id, title in [(1, "CPI m/m"), (2, "Retail Sales m/m"), (3, "Unemployment Rate")]:
+        cache.put(event_id, "", 1, "USD", title)
+    cache.events["1"]['last_used'] = days_ago(3)
+    cache.events["2"]['last_used'] = days_ago(2)
+    cache.events["3"]['last_used'] = days_ago(1)
+    # Using the oldest entry makes the second one the least recently used
+    assert cache.get(1) == ("", 1)
+
+    cache.save()
+    cache = CriteriaCache(path, ttl_days=30, max_entries=2)
+    assert sorted(cache.events) == ["1", "3"]
+    assert cache.get(4, "USD", "Retail Sales m/m") is None
+    assert cache.get(4, "USD", "Unemployment Rate") == ("", 1)
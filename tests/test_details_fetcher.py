@@ -0,0 +1,84 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from details_fetcher import DetailsFetcher
+
+GREATER_IS_GOOD = "'Actual' greater than 'Forecast' is good for currency;"
+DETAILS = json.dumps({"data": {"specs": [{"title": "Usual Effect", "html": GREATER_IS_GOOD}]}})
+CHALLENGE = "<html><body>Just a moment...</body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Details endpoint answering by event ID:
+    1 details, 2 always a challenge page, 3 a challenge page then details,
+    4 a server error then details.
+    """
+    attempts = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        event_id = int(self.path.rsplit("-", 1)[-1])
+        with self.lock:
+            attempt = self.attempts.get(event_id, 0)
+            self.attempts[event_id] = attempt + 1
+
+        if event_id == 4 and attempt == 0:
+            status, body = 500, "error"
+        elif event_id == 2 or (event_id == 3 and attempt == 0):
+            status, body = 200, CHALLENGE
+        else:
+            status, body = 200, DETAILS
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    StubHandler.attempts = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/calendar/details/1-{{}}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(url):
+    return DetailsFetcher(url_format=url, max_workers=4, max_retries=2, backoff=0)
+
+
+def test_fetch_usual_effect(stub_url):
+    fetcher = make_fetcher(stub_url)
+    assert fetcher.fetch_usual_effect(1) == (GREATER_IS_GOOD, 1)
+    fetcher.close()
+
+
+def test_non_json_response_is_retried(stub_url):
+    fetcher = make_fetcher(stub_url)
+    assert fetcher.fetch_usual_effect(3) == (GREATER_IS_GOOD, 1)
+    assert StubHandler.attempts[3] == 2
+    fetcher.close()
+
+
+def test_non_json_response_fails_after_retries(stub_url):
+    fetcher = make_fetcher(stub_url)
+    assert fetcher.fetch_details(2) is None
+    assert StubHandler.attempts[2] == 3
+    fetcher.close()
+
+
+def test_failed_event_does_not_abort_the_others(stub_url):
+    fetcher = make_fetcher(stub_url)
+    results = fetcher.fetch_usual_effects([1, 2, 3, 4])
+    assert results == [(GREATER_IS_GOOD, 1), ("", 0), (GREATER_IS_GOOD, 1), (GREATER_IS_GOOD, 1)]
+    fetcher.close()
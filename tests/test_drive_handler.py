@@ -0,0 +1,148 @@
+import hashlib
+import itertools
+import threading
+
+import pytest
+
+from drive_handler import DriveUploader, FOLDER_MIME_TYPE
+
+ROOT_ID = "root"
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status, content=b""):
+        """Raised like googleapiclient.errors.HttpError: resp.status and the response content."""
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Response", (), {"status": status})()
+        self.content = content
+
+
+class FakeRequest:
+    def __init__(self, service, method, run):
+        self.service = service
+        self.method = method
+        self.run = run
+
+    def execute(self):
+        with self.service.lock:
+            self.service.calls.append(self.method)
+            errors = self.service.errors.get(self.method)
+            if errors:
+                raise errors.pop(0)
+        return self.run()
+
+
+class FakeDrive:
+    def __init__(self):
+        """
+        In-memory Drive v3 service: files().list/create/update/delete with the queries and
+        fields DriveUploader sends. Errors queued in errors[method] are raised first.
+        """
+        self.lock = threading.Lock()
+        self.files_by_id = {}
+        self.ids = itertools.count(1)
+        self.calls = []
+        self.queries = []
+        self.errors = {}
+
+    def files(self):
+        return self
+
+    def add(self, name, parent, mime_type="text/csv", content=None):
+        file_id = f"id{next(self.ids)}"
+        self.files_by_id[file_id] = {
+            "id": file_id, "name": name, "parent": parent, "mimeType": mime_type,
+            "md5Checksum": hashlib.md5(content).hexdigest() if content is not None else None}
+        return self.files_by_id[file_id]
+
+    @staticmethod
+    def content(media_body):
+        return media_body.getbytes(0, media_body.size())
+
+    def list(self, q, fields=None, pageSize=None, pageToken=None):
+        self.queries.append(q)
+
+        def run():
+            parent = q.split("'")[1] if q.startswith("'") else q.split("'")[3]
+            folders = f"mimeType = '{FOLDER_MIME_TYPE}'" in q
+            return {"files": [
+                {key: file[key] for key in ("id", "name", "md5Checksum")}
+                for file in self.files_by_id.values()
+                if file["parent"] == parent and (file["mimeType"] == FOLDER_MIME_TYPE) == folders]}
+        return FakeRequest(self, "list", run)
+
+    def create(self, body, media_body=None, fields=None):
+        def run():
+            content = self.content(media_body) if media_body is not None else None
+            file = self.add(body["name"], body["parents"][0], body.get("mimeType", "text/csv"), content)
+            return {"id": file["id"], "md5Checksum": file["md5Checksum"]}
+        return FakeRequest(self, "create", run)
+
+    def update(self, fileId, body=None, media_body=None, fields=None):
+        def run():
+            file = self.files_by_id[fileId]
+            file["md5Checksum"] = hashlib.md5(self.content(media_body)).hexdigest()
+            return {"id": fileId, "md5Checksum": file["md5Checksum"]}
+        return FakeRequest(self, "update", run)
+
+    def delete(self, fileId):
+        return FakeRequest(self, "delete", lambda: self.files_by_id.pop(fileId))
+
+
+@pytest.fixture
+def month_files(tmp_path):
+    paths = []
+    for month in range(1, 13):
+        path = tmp_path / f"{month}.csv"
+        path.write_text(f"datetime,currency,impact,event\n2024.{month:02d}.01 12:30:00,USD,High,CPI\n")
+        paths.append(str(path))
+    return paths
+
+
+def make_uploader(service):
+    return DriveUploader(root_folder_id=ROOT_ID, service=service, max_workers=4, backoff=0)
+
+
+def test_folders_and_files_are_listed_once(month_files):
+    service = FakeDrive()
+    ids = make_uploader(service).upload_files([(path, "2024") for path in month_files])
+
+    assert None not in ids
+    assert service.calls.count("list") == 2
+    assert service.calls.count("create") == 13
+    assert not any(query.startswith("name =") for query in service.queries)
+
+
+def test_rate_limit_is_retried(month_files):
+    service = FakeDrive()
+    service.errors["create"] = [FakeHttpError(429), FakeHttpError(403, b'{"reason": "userRateLimitExceeded"}')]
+    uploader = make_uploader(service)
+
+    assert uploader.upload_or_update_file(month_files[0], "2024") is not None
+    assert service.calls.count("create") == 4
+
+
+def test_permission_error_is_raised(month_files):
+    service = FakeDrive()
+    service.errors["list"] = [FakeHttpError(403, b'{"reason": "insufficientFilePermissions"}')]
+
+    with pytest.raises(FakeHttpError):
+        make_uploader(service).upload_or_update_file(month_files[0], "2024")
+    assert service.calls == ["list"]
+
+
+def test_sync_updates_changed_files_in_place(month_files):
+    service = FakeDrive()
+    uploads = [(path, "2024") for path in month_files]
+    first = make_uploader(service).sync_files(uploads)
+    assert [status for _, status in first] == ["created"] * 12
+
+    with open(month_files[0], "a") as f:
+        f.write("2024.01.02 12:30:00,USD,High,NFP\n")
+    service.calls = []
+    second = make_uploader(service).sync_files(uploads)
+
+    assert [status for _, status in second] == ["updated"] + ["unchanged"] * 11
+    assert [file_id for file_id, _ in second] == [file_id for file_id, _ in first]
+    assert service.calls.count("update") == 1
+    assert "create" not in service.calls and "delete" not in service.calls
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation_engine import BarGroups
+
+CURRENCIES = ["USD", "EUR", "GBP", "CAD"]
+
+
+def get_groupby_values(bar_df):
+    """The reduction evaluate_dataset.py used to apply to every bar."""
+    return pd.Series({
+        "price_direction": bar_df["price_direction"].iloc[0],
+        "Good_for_Currency": np.sign(bar_df["Good_for_Currency"].sum()),
+    })
+
+
+@pytest.fixture
+def price_news_df():
+    rng = np.random.default_rng(0)
+    rows = 2000
+    bars = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 300, rows), unit="h")
+    price_news_df = pd.DataFrame({
+        "BarDateTime": bars,
+        "Currency": rng.choice(CURRENCIES, rows),
+        "Good_for_Currency": rng.choice([-1, 0, 1], rows),
+    })
+    # The price direction is the same for all news of a bar
+    directions = pd.Series(rng.choice([-1, 1], 300))
+    price_news_df["price_direction"] = directions[(bars - bars.min()) // pd.Timedelta(hours=1)].to_numpy()
+    price_news_df.loc[::97, "BarDateTime"] = pd.NaT
+    return price_news_df.sort_values(["BarDateTime", "Currency"])
+
+
+@pytest.mark.parametrize("currencies", [None, ["USD"], ["EUR", "USD"], ["CHF"]])
+def test_aggregate_matches_groupby_apply(price_news_df, currencies):
+    selected = price_news_df if currencies is None else price_news_df[price_news_df["Currency"].isin(currencies)]
+    expected = selected.groupby("BarDateTime").apply(get_groupby_values).sort_index()
+
+    aggregated = BarGroups(price_news_df).aggregate(currencies)
+
+    assert aggregated.index.equals(expected.index)
+    for column in ["price_direction", "Good_for_Currency"]:
+        assert aggregated[column].tolist() == expected[column].astype(int).tolist()
+    assert aggregated["news_count"].tolist() == selected.groupby("BarDateTime").size().tolist()
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from calendar_parser import CALENDAR_COLUMNS
+from event_db import EventDatabase
+from event_store import save_month_frame
+
+MONTH = [
+    (1, "Fri Oct 17", "8:30am", "USD", "High Impact Expected", "PPI m/m", "0.3%", "0.2%", "0.1%"),
+    (2, "Sat Oct 18", "8:30am", "USD", "High Impact Expected", "CPI m/m", "", "0.3%", "0.4%"),
+    (3, "Sat Oct 18", "", "EUR", "Low Impact Expected", "Bank Lending", "", "", ""),
+    (4, "Sun Oct 19", "All Day", "GBP", "Non-Economic", "Bank Holiday", "", "", ""),
+]
+
+
+def month_frame(rows):
+    return pd.DataFrame(rows, columns=CALENDAR_COLUMNS)
+
+
+@pytest.fixture
+def database(tmp_path):
+    with EventDatabase(str(tmp_path / "events.db")) as database:
+        yield database
+
+
+def test_upsert_updates_the_event(database):
+    database.upsert_frame(month_frame(MONTH), 2025, 10)
+    released = [list(row) for row in MONTH]
+    released[1][6] = "0.5%"
+    database.upsert_frame(month_frame(released), 2025, 10)
+
+    events = database.query()
+    assert events['event_id'].tolist() == [1, 2, 3, 4]
+    assert database.get(2)['Actual'] == "0.5%"
+    assert database.get(2)['actual_value'] == 0.5
+    # Rows without a time take the time of the row above
+    assert database.get(3)['datetime'] == database.get(2)['datetime']
+
+
+def test_upsert_keeps_columns_missing_from_the_frame(database):
+    database.upsert_frame(month_frame(MONTH), 2025, 10)
+    database.upsert_frame(pd.DataFrame({
+        'event_id': [2], 'Date': ["Sat Oct 18"], 'Time': ["8:30am"], 'criteria': [1]}), 2025, 10)
+
+    assert database.get(2)['criteria'] == 1
+    assert database.get(2)['Description'] == "CPI m/m"
+
+
+def test_prune_by_dates_leaves_other_days(database):
+    database.upsert_frame(month_frame(MONTH), 2025, 10)
+
+    # A refresh of Oct 18 that no longer lists event 3
+    assert database.prune_month(2025, 10, [2], dates=["Sat Oct 18"]) == 1
+    assert database.query()['event_id'].tolist() == [1, 2, 4]
+
+    assert database.prune_month(2025, 10, [1]) == 2
+    assert database.query()['event_id'].tolist() == [1]
+
+
+def test_import_month_files_is_idempotent(tmp_path, database):
+    folder = str(tmp_path / "raw_news")
+    save_month_frame(month_frame(MONTH), folder, 2025, 10)
+
+    assert database.import_month_files(folder, prune=True) == 1
+    first = database.query()
+    assert database.import_month_files(folder, prune=True) == 0
+    pd.testing.assert_frame_equal(database.query(), first)
+
+    # A changed file is imported again, and its removed events are pruned
+    save_month_frame(month_frame(MONTH[:2]), folder, 2025, 10)
+    assert database.import_month_files(folder, prune=True) == 1
+    assert database.query()['event_id'].tolist() == [1, 2]
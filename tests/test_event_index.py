@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calendar_parser import CALENDAR_COLUMNS
+from event_index import EventIndex
+from event_store import save_month_frame
+
+CURRENCIES = ["USD", "EUR", "GBP"]
+IMPACTS = ["High Impact Expected", "Low Impact Expected", "Non-Economic"]
+
+
+@pytest.fixture
+def events():
+    rng = np.random.default_rng(0)
+    rows = 500
+    start = pd.Timestamp("2025-01-01", tz="UTC")
+    return pd.DataFrame({
+        'event_id': np.arange(rows) + 1,
+        'datetime': start + pd.to_timedelta(np.sort(rng.integers(0, 60 * 24 * 90, rows)), unit="m"),
+        'Currency': rng.choice(CURRENCIES, rows),
+        'Impact': rng.choice(IMPACTS, rows),
+        'Description': [f"Event {index}" for index in range(rows)],
+    })
+
+
+@pytest.fixture
+def times():
+    rng = np.random.default_rng(1)
+    start = pd.Timestamp("2024-12-31", tz="UTC")
+    return start + pd.to_timedelta(rng.integers(0, 60 * 24 * 92, 300), unit="m")
+
+
+@pytest.mark.parametrize("currencies, impacts", [(None, None), (["USD"], ["High"]), (["EUR", "GBP"], None)])
+def test_has_event_batch_matches_has_event(events, times, currencies, impacts):
+    index = EventIndex.from_frame(events)
+    batch = index.has_event_batch(times, 30, 60, currencies=currencies, impacts=impacts)
+    assert batch.tolist() == [
+        index.has_event(time, 30, 60, currencies=currencies, impacts=impacts) for time in times]
+    assert batch.any() and not batch.all()
+
+
+@pytest.mark.parametrize("direction", ["backward", "forward", "nearest"])
+def test_nearest_batch_matches_nearest(events, times, direction):
+    index = EventIndex.from_frame(events)
+    batch = index.nearest_batch(times, currencies=["USD"], direction=direction)
+    for time, row in zip(times, batch.itertuples()):
+        event, distance = index.nearest(time, currencies=["USD"], direction=direction)
+        if event is None:
+            assert row.event_id == -1 and pd.isna(row.distance)
+        else:
+            assert (row.event_id, row.title, row.distance) == (event['event_id'], event['title'], distance)
+
+
+def test_window(events):
+    index = EventIndex.from_frame(events)
+    time = events['datetime'].iloc[250]
+    window = index.window(time, 120, currencies=["USD"], impacts=["High"])
+
+    in_window = events[
+        (events['datetime'] >= time - pd.Timedelta(minutes=120)) & (events['datetime'] <= time + pd.Timedelta(minutes=120))
+        & (events['Currency'] == "USD") & (events['Impact'] == "High Impact Expected")]
+    assert window['event_id'].tolist() == in_window['event_id'].tolist()
+
+
+def test_single_currency_string(events, times):
+    index = EventIndex.from_frame(events)
+    assert index.has_event_batch(times, 60, currencies="USD", impacts="High").tolist() == \
+        index.has_event_batch(times, 60, currencies=["USD"], impacts=["High"]).tolist()
+    assert len(index.timeline("USD")) == (events['Currency'] == "USD").sum()
+
+
+def save_month(folder, month, rows):
+    save_month_frame(pd.DataFrame(rows, columns=CALENDAR_COLUMNS), folder, 2025, month)
+
+
+def test_refresh_reloads_changed_months(tmp_path, new_york):
+    folder = str(tmp_path / "raw_news")
+    october = [(1, "Fri Oct 17", "8:30am", "USD", "High Impact Expected", "CPI m/m", "", "", "")]
+    november = [(2, "Fri Nov 7", "8:30am", "USD", "High Impact Expected", "Non-Farm Employment Change", "", "", "")]
+    save_month(folder, 10, october)
+    save_month(folder, 11, november)
+
+    index = EventIndex(folder, storage_format="csv")
+    assert sorted(index.refresh()) == [(2025, 10), (2025, 11)]
+    assert index.refresh() == []
+    assert not index.has_event("2025-11-07 15:00", 30, currencies="USD")
+
+    november.append((3, "Fri Nov 7", "10:00am", "USD", "High Impact Expected", "ISM Services PMI", "", "", ""))
+    save_month(folder, 11, november)
+    assert index.refresh() == [(2025, 11)]
+    assert index.has_event("2025-11-07 15:00", 30, currencies="USD")
+    assert index.events['event_id'].tolist() == [1, 2, 3]
+
+    (tmp_path / "raw_news" / "2025" / "10.csv").unlink()
+    assert index.refresh() == [(2025, 10)]
+    assert index.events['event_id'].tolist() == [2, 3]
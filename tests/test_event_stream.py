@@ -0,0 +1,170 @@
+import queue
+import random
+import threading
+
+import pandas as pd
+import pytest
+
+from calendar_parser import CALENDAR_COLUMNS
+from config import ALLOWED_IMPACT_COLORS
+from event_db import EventDatabase
+from event_store import to_typed
+from event_stream import NEWS_COLUMNS, CalendarEvent, CsvSink, ParquetSink, QueueSink, SqliteSink, \
+    iter_queue, month_sink, news_event_stream, run_stream, sort_events
+from utils import contains_day_or_month, convert_to_datetime
+
+# Scraped rows of a month page: day breakers, rows with a date, rows with a time,
+# rows sharing the time above, All Day and Tentative rows, and rows that are filtered out
+SCRAPED = [
+    ["Fri Oct 17"],
+    ["Fri Oct 17", "8:30am", "USD", "High", "Retail Sales m/m"],
+    ["USD", "High", "Core Retail Sales m/m"],
+    ["USD", "Low", "Business Inventories m/m"],
+    ["11:00pm", "NZD", "High", "GDT Price Index"],
+    ["All", "Holiday", "World Holiday"],
+    ["Sat Oct 18"],
+    ["Sat Oct 18", "All Day", "CAD", "Holiday", "Thanksgiving"],
+    ["1:00am", "GBP", "High", "BOE Gov Speaks"],
+    ["Tentative", "EUR", "High", "ECB Minutes"],
+    ["Sun Oct 19"],
+    ["Sun Oct 19", "9:45pm", "NZD", "High", "CPI q/q"],
+]
+
+
+def old_reformat_scraped_data(data, year, path):
+    """The DataFrame version of reformat_scraped_data replaced by the stream."""
+    current_date = ''
+    current_time = ''
+    structured_rows = []
+    for row in data:
+        if len(row) == 1 or len(row) == 5:
+            match, day = contains_day_or_month(row[0])
+            if match:
+                current_date = row[0].replace(day, "").replace("\n", "").strip()
+        if len(row) == 4:
+            current_time = row[0]
+        if len(row) == 5:
+            current_time = row[1]
+        if len(row) > 1:
+            if row[-2] not in ALLOWED_IMPACT_COLORS or current_date == "" or current_time == "":
+                continue
+            current_datetime = convert_to_datetime(current_date, current_time, year)
+            structured_rows.append(
+                [current_datetime.strftime('%Y.%m.%d %H:%M:%S'), row[-3], row[-2], row[-1]])
+
+    df = pd.DataFrame(structured_rows, columns=NEWS_COLUMNS)
+    df = df.loc[df['currency'] != "All", :]
+    # Stable, so rows at the same time keep their page order
+    df = df.sort_values(['datetime'], kind='mergesort')
+    df.to_csv(path, index=False)
+
+
+def test_month_sink_matches_old_reformat(tmp_path, new_york):
+    expected_path = tmp_path / "expected.csv"
+    old_reformat_scraped_data(SCRAPED, 2025, expected_path)
+
+    sink = month_sink(str(tmp_path / "news"), 2025, 10, NEWS_COLUMNS, storage_format="csv")
+    assert isinstance(sink, CsvSink)
+    count = run_stream(news_event_stream(SCRAPED, 2025), sink)
+
+    assert (tmp_path / "news" / "2025" / "10.csv").read_text() == expected_path.read_text()
+    assert count == 7
+
+
+def test_sort_events_emits_in_order_with_bounded_buffer():
+    rng = random.Random(0)
+    lag = 50
+    # Every value is at most lag behind the largest value before it
+    values = []
+    for index in range(2000):
+        values.append((index * 3 - rng.randint(0, lag), index))
+
+    consumed = []
+
+    def source():
+        for value in values:
+            consumed.append(value)
+            yield value
+
+    emitted = []
+    for value in sort_events(source(), key=lambda value: value[0], lag=lag):
+        # Only the values of the last lag window are held back
+        assert len(consumed) - len(emitted) <= lag
+        emitted.append(value)
+
+    assert emitted == sorted(values, key=lambda value: value[0])
+
+
+def test_sort_events_keeps_the_order_of_equal_keys():
+    events = [(2, "a"), (1, "b"), (2, "c"), (1, "d"), (3, "e")]
+    assert list(sort_events(events, key=lambda event: event[0], lag=1)) == [
+        (1, "b"), (1, "d"), (2, "a"), (2, "c"), (3, "e")]
+
+
+def calendar_events():
+    rows = [
+        ("1", "Fri Oct 17", "8:30am", "USD", "High Impact Expected", "Retail Sales m/m", "0.6%", "0.4%", "0.5%"),
+        ("2", "Fri Oct 17", "", "USD", "High Impact Expected", "Core Retail Sales m/m", "0.2%", "0.3%", "0.3%"),
+        ("3", "Fri Oct 17", "", "USD", "Low Impact Expected", "Business Inventories m/m", "", "0.1%", "0.2%"),
+        ("4", "Sat Oct 18", "1:00am", "GBP", "High Impact Expected", "BOE Gov Speaks", "", "", ""),
+        ("5", "Sat Oct 18", "", "EUR", "Medium Impact Expected", "ECB Minutes", "", "", ""),
+    ]
+    return [CalendarEvent(*row) for row in rows]
+
+
+def test_parquet_sink_batches_match_one_frame(tmp_path, new_york):
+    pytest.importorskip("pyarrow")
+    events = calendar_events()
+    path = str(tmp_path / "10.parquet")
+    # Batches of two: rows without a time take the time of the previous batch
+    run_stream(events, ParquetSink(path, CALENDAR_COLUMNS, year=2025, batch_size=2))
+
+    expected = to_typed(pd.DataFrame(events, columns=CALENDAR_COLUMNS), 2025)
+    written = pd.read_parquet(path)
+    pd.testing.assert_series_equal(written['datetime'], expected['datetime'], check_dtype=False)
+    assert written['event_id'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_sqlite_sink_upserts_and_prunes(tmp_path, new_york):
+    with EventDatabase(str(tmp_path / "events.db")) as database:
+        database.upsert_frame(pd.DataFrame(
+            [("9", "Thu Oct 16", "8:30am", "USD", "High Impact Expected", "Removed", "", "", "")],
+            columns=CALENDAR_COLUMNS), 2025, 10)
+        run_stream(calendar_events(), SqliteSink(database, 2025, 10, batch_size=2, prune=True))
+
+        events = database.query()
+        expected = to_typed(pd.DataFrame(calendar_events(), columns=CALENDAR_COLUMNS), 2025)
+        assert events['event_id'].tolist() == [1, 2, 3, 4, 5]
+        assert events['datetime'].tolist() == expected['datetime'].tolist()
+
+
+def test_failed_stream_leaves_no_file(tmp_path):
+    def failing():
+        yield from calendar_events()[:2]
+        raise RuntimeError("page failed")
+
+    path = tmp_path / "10.csv"
+    with pytest.raises(RuntimeError):
+        run_stream(failing(), CsvSink(str(path), CALENDAR_COLUMNS))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_queue_sink_hands_events_to_another_thread():
+    events_queue = queue.Queue()
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(iter_queue(events_queue)))
+    reader.start()
+    run_stream(calendar_events(), QueueSink(events_queue))
+    reader.join(timeout=5)
+
+    assert received == calendar_events()
+
+
+def test_news_stream_sorts_across_days(new_york):
+    events = list(news_event_stream(SCRAPED, 2025))
+    keys = [event.datetime.replace(tzinfo=None) for event in events]
+    assert keys == sorted(keys)
+    # 11pm in New York (3am UTC) is listed before the All Day row of the next day
+    # (local midnight) on the page, and comes after it in the file
+    titles = [event.event for event in events]
+    assert titles.index("GDT Price Index") > titles.index("Thanksgiving")
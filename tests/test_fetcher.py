@@ -0,0 +1,131 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from fetcher import HttpFetcher, fetcher_factory
+
+CALENDAR = (
+    '<html><body><table class="calendar__table"><tbody>'
+    '<tr class="calendar__row calendar__row--day-breaker">'
+    '<td class="calendar__cell" colspan="10"><span>Sat <span>Oct 18</span></span></td></tr>'
+    '<tr class="calendar__row" data-event-id="1">'
+    '<td class="calendar__cell calendar__date"><span class="date">Sat <span>Oct 18</span></span></td>'
+    '<td class="calendar__cell calendar__time"><div>8:30am</div></td>'
+    '<td class="calendar__cell calendar__currency"><span>USD</span></td>'
+    '<td class="calendar__cell calendar__impact"><span title="High Impact Expected" '
+    'class="icon icon--ff-impact-red"></span></td>'
+    '<td class="calendar__cell calendar__event event"><div><span>CPI m/m</span></div></td>'
+    '</tr></tbody></table></body></html>')
+CHALLENGE = "<html><body>Just a moment...</body></html>"
+TIMEOUT = 0.5
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Calendar endpoint answering by path:
+    /calendar the calendar, /challenge always a challenge page, /flaky a challenge page
+    then the calendar, /error a server error then the calendar, /slow a response slower
+    than the timeout then the calendar, /missing always 404.
+    """
+    protocol_version = "HTTP/1.1"
+    attempts = {}
+    client_ports = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        with self.lock:
+            attempt = self.attempts.get(path, 0)
+            self.attempts[path] = attempt + 1
+            self.client_ports.append(self.client_address[1])
+
+        status, body = 200, CALENDAR
+        if path == "/challenge" or (path == "/flaky" and attempt == 0):
+            body = CHALLENGE
+        elif path == "/error" and attempt == 0:
+            status, body = 500, "error"
+        elif path == "/missing":
+            status, body = 404, "not found"
+        elif path == "/slow" and attempt == 0:
+            time.sleep(TIMEOUT * 3)
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    StubHandler.attempts = {}
+    StubHandler.client_ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(**kwargs):
+    return HttpFetcher(timeout=TIMEOUT, max_retries=2, backoff=0, **kwargs)
+
+
+def test_session_is_reused(stub_url):
+    fetcher = make_fetcher()
+    for month in ["jan.2025", "feb.2025", "mar.2025"]:
+        assert fetcher.fetch(f"{stub_url}/calendar?month={month}") == CALENDAR
+    fetcher.quit()
+
+    # Keep-alive: every page came over the same connection
+    assert len(StubHandler.client_ports) == 3
+    assert len(set(StubHandler.client_ports)) == 1
+
+
+@pytest.mark.parametrize("path", ["/flaky", "/error", "/slow"])
+def test_failed_attempt_is_retried(stub_url, path):
+    fetcher = make_fetcher()
+    assert fetcher.fetch(stub_url + path) == CALENDAR
+    assert StubHandler.attempts[path] == 2
+    fetcher.quit()
+
+
+@pytest.mark.parametrize("path", ["/challenge", "/missing"])
+def test_error_is_raised_after_retries(stub_url, path):
+    fetcher = make_fetcher()
+    with pytest.raises(requests.RequestException):
+        fetcher.fetch(stub_url + path)
+    assert StubHandler.attempts[path] == 3
+    fetcher.quit()
+
+
+def test_factory_creates_http_fetcher(stub_url):
+    class Snapshots:
+        def __init__(self):
+            self.pages = {}
+
+        def put(self, url, html):
+            self.pages[url] = html
+
+    snapshots = Snapshots()
+    fetcher = fetcher_factory("http", snapshots=snapshots)()
+    assert isinstance(fetcher, HttpFetcher)
+
+    url = f"{stub_url}/calendar?day=oct18.2025"
+    rows = fetcher.fetch_rows(url)
+    fetcher.quit()
+
+    assert any("USD" in row and "CPI m/m" in row for row in rows)
+    assert snapshots.pages == {url: CALENDAR}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        fetcher_factory("curl")
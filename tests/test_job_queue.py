@@ -0,0 +1,69 @@
+from browser import DriverPool
+from job_queue import DONE, FAILED, PENDING, JobQueue
+
+TARGETS = [
+    (2025, month, f"https://www.forexfactory.com/calendar?month={month}.2025")
+    for month in (8, 9, 10)
+]
+
+
+class StubDriver:
+    def quit(self):
+        pass
+
+
+def stub_pool(num_workers=2):
+    return DriverPool(num_workers=num_workers, driver_factory=StubDriver)
+
+
+def test_resume_after_a_crash(tmp_path):
+    path = str(tmp_path / "queue.json")
+    jobs = JobQueue(path)
+    jobs.create(TARGETS)
+    jobs.start(2025, 8)
+    jobs.complete(2025, 8)
+    # The run crashed while September was being scraped
+    jobs.start(2025, 9)
+
+    jobs = JobQueue(path)
+    assert jobs.resume()
+    assert jobs.tasks["2025-09"]['status'] == PENDING
+
+    scraped = []
+    failed = jobs.run(stub_pool(), lambda driver, target: scraped.append(target[:2]) or target)
+    assert failed == []
+    assert sorted(scraped) == [(2025, 9), (2025, 10)]
+    assert jobs.tasks["2025-09"]['attempts'] == 2
+
+    # Nothing is left to resume
+    jobs = JobQueue(path)
+    assert all(task['status'] == DONE for task in jobs.tasks.values())
+    assert not jobs.resume()
+
+
+def test_failed_tasks_stop_at_the_attempt_limit(tmp_path):
+    path = str(tmp_path / "queue.json")
+    jobs = JobQueue(path, max_attempts=3)
+    jobs.create(TARGETS)
+
+    calls = {}
+
+    def scrape(driver, target):
+        calls[target[1]] = calls.get(target[1], 0) + 1
+        if target[1] == 9:
+            raise RuntimeError("page failed")
+        # October only succeeds on its second attempt
+        return target if target[1] != 10 or calls[10] > 1 else None
+
+    failed = jobs.run(stub_pool(), scrape)
+    assert failed == [TARGETS[1]]
+    assert calls == {8: 1, 9: 3, 10: 2}
+
+    task = JobQueue(path).tasks["2025-09"]
+    assert (task['status'], task['attempts'], task['error']) == (FAILED, 3, "page failed")
+
+    # A task given up on does not make the queue resumable
+    jobs = JobQueue(path, max_attempts=3)
+    assert jobs.is_finished()
+    assert not jobs.resume()
+    assert jobs.pending() == []
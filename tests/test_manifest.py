@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from manifest import ScrapeManifest
+
+NOW = datetime(2025, 11, 3, 12, 0)
+
+
+def write_month(path, content="event_id,Date\n1,Fri Oct 17\n"):
+    path.write_text(content)
+    return str(path)
+
+
+def test_previous_month_is_not_final_yet(tmp_path):
+    manifest = ScrapeManifest(str(tmp_path / "manifest.json"))
+    # Late revisions to the end of October still land in the first weeks of November
+    assert not manifest.is_finalized(2025, 11, NOW)
+    assert not manifest.is_finalized(2025, 10, NOW)
+    assert manifest.is_finalized(2025, 9, NOW)
+    assert manifest.is_finalized(2024, 12, NOW)
+
+
+def test_horizon_zero_finalizes_the_previous_month(tmp_path):
+    manifest = ScrapeManifest(str(tmp_path / "manifest.json"), horizon_months=0)
+    assert not manifest.is_finalized(2025, 11, NOW)
+    assert manifest.is_finalized(2025, 10, NOW)
+
+
+def test_should_skip(tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest = ScrapeManifest(manifest_path)
+    september = write_month(tmp_path / "09.csv")
+    october = write_month(tmp_path / "10.csv")
+
+    # Never scraped
+    assert not manifest.should_skip(2025, 9, september, NOW)
+
+    manifest.record(2025, 9, september, drive_id="abc")
+    manifest.record(2025, 10, october)
+    manifest.save()
+
+    manifest = ScrapeManifest(manifest_path)
+    assert manifest.get(2025, 9)['row_count'] == 1
+    assert manifest.get(2025, 9)['drive_id'] == "abc"
+    assert manifest.should_skip(2025, 9, september, NOW)
+    # Within the horizon
+    assert not manifest.should_skip(2025, 10, october, NOW)
+
+    # Changed or missing file
+    write_month(tmp_path / "09.csv", "event_id,Date\n1,Fri Sep 19\n")
+    assert not manifest.should_skip(2025, 9, september, NOW)
+    (tmp_path / "09.csv").unlink()
+    assert not manifest.should_skip(2025, 9, september, NOW)
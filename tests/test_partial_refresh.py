@@ -0,0 +1,73 @@
+from datetime import date
+
+import pandas as pd
+
+from partial_refresh import merge_news_partial
+
+COLUMNS = ['datetime', 'currency', 'impact', 'event']
+
+# Saved in New York time: timed rows in UTC, All Day rows at local midnight
+EXISTING = [
+    ("2025.10.11 00:00:00", "USD", "Holiday", "Saturday Holiday"),
+    ("2025.10.12 00:00:00", "USD", "Holiday", "Removed Holiday"),
+    ("2025.10.14 12:30:00", "USD", "High", "CPI"),
+    ("2025.10.17 14:00:00", "USD", "High", "PPI"),
+    ("2025.10.18 14:00:00", "USD", "High", "Removed Speech"),
+    ("2025.10.19 00:00:00", "USD", "Holiday", "Bank Holiday"),
+    ("2025.10.19 13:00:00", "USD", "High", "Retail Sales"),
+]
+
+
+def save_existing(folder):
+    (folder / "2025").mkdir()
+    pd.DataFrame(EXISTING, columns=COLUMNS).to_csv(folder / "2025" / "10.csv", index=False)
+
+
+def load_rows(folder):
+    return list(pd.read_csv(folder / "2025" / "10.csv").itertuples(index=False, name=None))
+
+
+def day_breakers(*days):
+    return [[f"{weekday} Oct {day}"] for weekday, day in days]
+
+
+def test_day_refresh_keeps_next_day(tmp_path, new_york):
+    save_existing(tmp_path)
+    data = day_breakers(("Sat", 18)) + [["Sat Oct 18", "3:00pm", "USD", "High", "Speech"]]
+
+    merge_news_partial(data, date(2025, 10, 18), str(tmp_path))
+
+    assert load_rows(tmp_path) == EXISTING[:4] + [
+        ("2025.10.18 19:00:00", "USD", "High", "Speech"),
+        ("2025.10.19 00:00:00", "USD", "Holiday", "Bank Holiday"),
+        ("2025.10.19 13:00:00", "USD", "High", "Retail Sales"),
+    ]
+
+
+def test_week_refresh_replaces_all_day_rows_by_date(tmp_path, new_york):
+    save_existing(tmp_path)
+    data = day_breakers(("Sun", 12), ("Mon", 13), ("Tue", 14), ("Wed", 15), ("Thu", 16), ("Fri", 17), ("Sat", 18))
+    data[1:1] = [["Mon Oct 13", "All Day", "USD", "Holiday", "Columbus Day"]]
+    data[3:3] = [["Tue Oct 14", "8:30am", "USD", "High", "CPI"]]
+
+    merge_news_partial(data, date(2025, 10, 14), str(tmp_path))
+
+    assert load_rows(tmp_path) == [
+        ("2025.10.11 00:00:00", "USD", "Holiday", "Saturday Holiday"),
+        ("2025.10.13 00:00:00", "USD", "Holiday", "Columbus Day"),
+        ("2025.10.14 12:30:00", "USD", "High", "CPI"),
+        ("2025.10.19 00:00:00", "USD", "Holiday", "Bank Holiday"),
+        ("2025.10.19 13:00:00", "USD", "High", "Retail Sales"),
+    ]
+
+
+def test_rescraped_rows_are_not_duplicated(tmp_path, new_york):
+    save_existing(tmp_path)
+    # 8pm in New York is midnight UTC, saved like an All Day row of the next day
+    data = day_breakers(("Sat", 18)) + [["Sat Oct 18", "8:00pm", "USD", "High", "Late Speech"]]
+    merge_news_partial(data, date(2025, 10, 18), str(tmp_path))
+    merge_news_partial(data, date(2025, 10, 18), str(tmp_path))
+
+    rows = load_rows(tmp_path)
+    assert rows.count(("2025.10.19 00:00:00", "USD", "High", "Late Speech")) == 1
+    assert ("2025.10.19 00:00:00", "USD", "Holiday", "Bank Holiday") in rows
@@ -0,0 +1,48 @@
+import json
+
+from calendar_parser import extract_calendar_rows_html
+from snapshot_cache import SnapshotCache
+
+URL = "https://www.forexfactory.com/calendar"
+
+
+def test_caches_of_two_scrapers_keep_both_entries(tmp_path):
+    root = str(tmp_path / "snapshots")
+    # Opened at the same time, like scraper.py and scrape_full_data.py running together
+    first, second = SnapshotCache(root), SnapshotCache(root)
+    first.put(f"{URL}?month=oct.2025", "<html>october</html>")
+    second.put(f"{URL}?month=nov.2025", "<html>november</html>")
+    first.put(f"{URL}?day=oct18.2025", "<html>day</html>")
+
+    cache = SnapshotCache(root)
+    assert cache.months() == [(2025, 10), (2025, 11)]
+    assert cache.get_month(2025, 10) == "<html>october</html>"
+    assert cache.get_month(2025, 11) == "<html>november</html>"
+    assert cache.get("http://127.0.0.1:8000/calendar?day=oct18.2025") == "<html>day</html>"
+    assert cache.get_month(2025, 12) is None
+
+
+def test_pages_of_an_older_index_are_read(tmp_path):
+    root = tmp_path / "snapshots"
+    cache = SnapshotCache(str(root))
+    content_hash = cache.put(f"{URL}?month=sep.2025", "<html>september</html>")
+    # A cache written before the entry files, with a single index.json
+    (root / "index").joinpath("month%3Dsep.2025.json").unlink()
+    (root / "index.json").write_text(json.dumps({"month=sep.2025": {"hash": content_hash, "url": URL}}))
+
+    cache = SnapshotCache(str(root))
+    assert cache.months() == [(2025, 9)]
+    assert cache.get_month(2025, 9) == "<html>september</html>"
+
+
+def test_reparsed_text_matches_inner_text():
+    html = (
+        '<table class="calendar__table"><tr class="calendar__row">'
+        '<td class="calendar__cell calendar__date"><span>Sat\n   <span>Oct 18</span></span></td>'
+        '<td class="calendar__cell calendar__time">\n  8:30am\n</td>'
+        '<td class="calendar__cell calendar__currency">USD</td>'
+        '<td class="calendar__cell calendar__impact"><span class="icon icon--ff-impact-red"></span></td>'
+        '<td class="calendar__cell calendar__event event"><span>CPI   m/m</span></td>'
+        '</tr></table>')
+    # What innerText gives once whitespace runs are collapsed
+    assert extract_calendar_rows_html(html) == [["Sat Oct 18", "8:30am", "USD", "High", "CPI m/m"]]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import convert_to_float, parse_numeric_series, convert_to_datetime, convert_to_datetime_series
+
+
+def parse_one(value):
+    return parse_numeric_series(pd.Series([value], dtype=object))[0]
+
+
+@pytest.mark.parametrize("value, magnitude", [
+    ("3.2%", 1), ("-0.5%", 1), ("+3%", 1), ("5 %", 1), (".5%", 1), ("0.0%", 1), (" 4.5 ", 1),
+    ("<0.1", 1), ("<0.1%", 1), ("1,234", 1), ("-12", 1),
+    # convert_to_float drops the magnitude suffixes
+    ("1.2K", 1e3), ("-12.5K", 1e3), ("12.5M", 1e6), ("1,234.5B", 1e9), ("<1.1B", 1e9),
+])
+def test_matches_convert_to_float(value, magnitude):
+    assert parse_one(value) == pytest.approx(convert_to_float(value) * magnitude)
+
+
+@pytest.mark.parametrize("value", ["", None, np.nan, "NaN"])
+def test_blank_values(value):
+    assert convert_to_float(value) is None or np.isnan(convert_to_float(value))
+    assert np.isnan(parse_one(value))
+
+
+@pytest.mark.parametrize("value, expected", [
+    # convert_to_float raises on these
+    ("3.4T", 3.4e12), (">5M", 5e6), (">0.2%", 0.2),
+    ("abc", np.nan), ("1.2.3", np.nan), ("--1", np.nan), ("-", np.nan), ("n/a", np.nan), ("12:30", np.nan),
+])
+def test_values_convert_to_float_rejects(value, expected):
+    with pytest.raises(ValueError):
+        convert_to_float(value)
+    assert parse_one(value) == pytest.approx(expected, nan_ok=True)
+
+
+def test_column_with_repeated_and_numeric_values():
+    values = pd.Series(["1.2K", "", "1.2K", "3.2%", None, "3.2%"], dtype=object)
+    np.testing.assert_array_equal(parse_numeric_series(values), [1200.0, np.nan, 1200.0, 3.2, np.nan, 3.2])
+    np.testing.assert_array_equal(parse_numeric_series(pd.Series([1.23456, 2.0])), [1.2346, 2.0])
+
+
+@pytest.mark.parametrize("date_text, time_text", [
+    # Start of DST: 2:30am does not exist
+    ("Sun Mar 9", "1:30am"), ("Sun Mar 9", "2:30am"), ("Sun Mar 9", "3:30am"),
+    # End of DST: 1:30am happens twice
+    ("Sun Nov 2", "12:30am"), ("Sun Nov 2", "1:30am"), ("Sun Nov 2", "2:30am"),
+    ("Sat Oct 18", "8:30pm"), ("Dec 31", "11:59pm"),
+    ("Mar 9", "All Day"), ("Nov 2", "Tentative"), ("Oct 18", "Day 2"),
+])
+def test_datetime_series_matches_convert_to_datetime(new_york, date_text, time_text):
+    # convert_to_datetime takes the date without the weekday
+    expected = convert_to_datetime(" ".join(date_text.split()[-2:]), time_text, 2025)
+    converted = convert_to_datetime_series(pd.Series([date_text]), pd.Series([time_text]), 2025)
+    assert converted[0] == expected
+
+
+def test_datetime_series_dst_gap(new_york):
+    converted = convert_to_datetime_series(pd.Series(["Mar 9"]), pd.Series(["2:30am"]), 2025)
+    # Read as 1:30am standard time, like convert_to_datetime
+    assert converted[0] == pd.Timestamp("2025-03-09 06:30", tz="UTC")
+
+
+def test_datetime_series_blank_and_unreadable(new_york):
+    converted = convert_to_datetime_series(
+        pd.Series(["Oct 18", "Oct 18", "", "Foo 1"]), pd.Series(["", None, "8:30am", "8:30am"]),
+        pd.Series([2025, 2025, 2025, 2025]))
+    midnight = pd.Timestamp("2025-10-18 04:00", tz="UTC")
+    assert converted[0] == midnight and converted[1] == midnight
+    assert converted[2:].isna().all()
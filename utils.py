@@ -1,14 +1,19 @@
-import os
 import re
 import json
+import argparse
 import pytz
+import numpy as np
 import pandas as pd
 from urllib.parse import urlencode
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 from tzlocal import get_localzone
 
-from config import ALLOWED_IMPACT_COLORS, FOLDER_NAME
+from config import FOLDER_NAME, MONTH_NUM_TO_NAME, REQUEST_URL, FETCHER_BACKEND, NUM_WORKERS
+from event_store import month_file
+from event_stream import NEWS_COLUMNS, NewsEvent, news_event_stream, month_sink, run_stream, format_value
+
+MONTH_NAME_TO_NUM = {name: num for num, name in MONTH_NUM_TO_NAME.items()}
 
 
 def is_good_for_currency(row):
@@ -44,12 +49,158 @@ def convert_to_float(value):
     return round(float(value), 4)
 
 
+# Calendar values look like "3.2%", "<0.1%", "-12.5K", "1,234.5B"
+NUMERIC_PATTERN = r'^\s*[<>]?\s*(?P<number>[-+]?(?:\d+\.?\d*|\.\d+))\s*(?P<suffix>[%KMBT]?)\s*$'
+MAGNITUDES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+
+def parse_numeric_series(values):
+    """
+    Vectorized version of convert_to_float for a whole column.
+
+    Handles %, thousands separators, "<"/">" markers and blanks, and applies the
+    K/M/B/T magnitude suffixes.
+
+    Args:
+        values (pd.Series): The calendar values (strings, or already numeric).
+
+    Returns:
+        np.ndarray: Float values, NaN where the value is blank or not a number.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float).round(4)
+
+    # Calendar values repeat a lot, so only the distinct ones are parsed
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype=object).astype(str).str.replace(',', '', regex=False)
+    parts = text.str.extract(NUMERIC_PATTERN)
+    number = pd.to_numeric(parts['number'], errors='coerce').to_numpy(dtype=float)
+    scale = parts['suffix'].map(MAGNITUDES).fillna(1.0).to_numpy(dtype=float)
+    parsed = (number * scale).round(4)
+
+    result = np.full(len(codes), np.nan)
+    found = codes >= 0
+    result[found] = parsed[codes[found]]
+    return result
+
+
 def construct_url(url: str, **params):
     url = '{}?{}'.format(url, urlencode(params))
 
     return url
 
 
+def date_param(date):
+    """
+    Format a date the way the calendar expects it in ?week= and ?day= URLs.
+
+    Args:
+        date (date): The date.
+
+    Returns:
+        str: The date formatted like "oct18.2025".
+    """
+    return f"{MONTH_NUM_TO_NAME[date.month]}{date.day}.{date.year}"
+
+
+def generate_targets(year, url=REQUEST_URL):
+    """
+    Build the calendar URLs to scrape, newest year first.
+
+    Args:
+        year (int): The current year.
+        url (str): Base calendar URL.
+
+    Returns:
+        list: (year, month, url) tuples.
+    """
+    targets = []
+    for selected_year in range(year, year - 3, -1):
+        for selected_month in range(1, 13):
+            month_param = "{}.{}".format(
+                MONTH_NUM_TO_NAME[selected_month],
+                selected_year)
+            targets.append((selected_year, selected_month, construct_url(
+                url=url,
+                month=month_param
+            )))
+    return targets
+
+
+def parse_scrape_args(description="Scrape the Forex Factory calendar"):
+    """
+    Parse the command line options shared by the scrapers.
+
+    Args:
+        description (str): Help text of the script.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--fetcher", choices=["selenium", "http"], default=FETCHER_BACKEND,
+                        help="How calendar pages are loaded")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help="Number of pages loaded in parallel")
+    parser.add_argument("--url", default=REQUEST_URL,
+                        help="Base calendar URL, e.g. a local stub server")
+    parser.add_argument("--full", action="store_true",
+                        help="Scrape every month, including finalized ones listed in the manifest")
+    parser.add_argument("--no-snapshots", action="store_true",
+                        help="Do not keep the raw HTML of fetched pages in the snapshot cache")
+    parser.add_argument("--reparse", action="store_true",
+                        help="Rebuild the output files from the snapshot cache, without fetching anything")
+    parser.add_argument("--sync", action="store_true",
+                        help="Upload at the end of the run only the month files that differ from Drive (scraper.py)")
+    period = parser.add_mutually_exclusive_group()
+    period.add_argument("--week", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="Only refresh the week of this date and merge it into the month files")
+    period.add_argument("--day", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="Only refresh this day and merge it into the month file")
+    return parser.parse_args()
+
+
+def generate_partial_target(period, date, url=REQUEST_URL):
+    """
+    Build the calendar URL of one week or one day.
+
+    Args:
+        period (str): "week" or "day".
+        date (date): The day, or any day of the week, to scrape.
+        url (str): Base calendar URL.
+
+    Returns:
+        tuple: (period, date, url).
+    """
+    return (period, date, construct_url(url=url, **{period: date_param(date)}))
+
+
+def filter_targets(targets, manifest, folder_name, full=False):
+    """
+    Drop the finalized months whose saved file is unchanged since it was recorded in the manifest.
+
+    Args:
+        targets (list): (year, month, url) tuples as built by generate_targets.
+        manifest (ScrapeManifest): The manifest of the output folder.
+        folder_name (str): Output folder holding {year}/{month} files.
+        full (bool): Keep every target.
+
+    Returns:
+        list: The targets that still need to be scraped.
+    """
+    if full:
+        return list(targets)
+
+    pending = [
+        (selected_year, selected_month, url)
+        for selected_year, selected_month, url in targets
+        if not manifest.should_skip(
+            selected_year, selected_month, month_file(folder_name, selected_year, selected_month))
+    ]
+    print(f"Skipping {len(targets) - len(pending)} finalized months, {len(pending)} left to scrape")
+    return pending
+
+
 def read_json(path):
     """
         Read JSON data from a file.
@@ -151,57 +302,125 @@ def convert_to_datetime(current_date, current_time, year):
     return current_datetime
 
 
+def convert_to_datetime_series(dates, times, years):
+    """
+    Vectorized version of convert_to_datetime for whole columns.
+
+    Clock times ("8:30am") are read in the local timezone and converted to UTC.
+    "All Day", "Tentative" and "Day N" times have no clock time; like in
+    convert_to_datetime they become midnight local time. Blank times, which
+    convert_to_datetime rejects, become midnight local time too.
+
+    Args:
+        dates (pd.Series): Calendar dates, with or without the weekday ("Mon Oct 13" or "Oct 13").
+        times (pd.Series): Calendar times.
+        years (pd.Series or int): The year of every row, or one year for all rows.
+
+    Returns:
+        pd.DatetimeIndex: UTC timestamps, NaT where the date could not be read.
+    """
+    current_timezone = str(get_localzone())
+
+    dates = pd.Series(dates)
+    times = pd.Series(times, index=dates.index)
+    if not isinstance(years, pd.Series):
+        years = pd.Series(years, index=dates.index)
+
+    # The columns only hold a few distinct values, so strings are only parsed once each
+    date_codes, date_uniques = pd.factorize(dates)
+    year_codes, year_uniques = pd.factorize(years.astype(str))
+    day_codes, day_keys = pd.factorize(date_codes * len(year_uniques) + year_codes)
+    day_texts = [
+        "{} {}".format(
+            re.sub(r'^(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+', '', str(date_uniques[key // len(year_uniques)]).strip()),
+            year_uniques[key % len(year_uniques)])
+        if key >= 0 else ""
+        for key in day_keys
+    ]
+    days = pd.to_datetime(pd.Series(day_texts, dtype=object), format='%b %d %Y', errors='coerce')
+    days = days.to_numpy(dtype='datetime64[ns]')
+
+    time_codes, time_uniques = pd.factorize(times)
+    clock_times = pd.to_datetime(
+        pd.Series([str(value).strip().lower() for value in time_uniques], dtype=object),
+        format='%I:%M%p', errors='coerce')
+    time_offsets = (clock_times - clock_times.dt.normalize()).fillna(pd.Timedelta(0))
+    time_offsets = time_offsets.to_numpy(dtype='timedelta64[ns]')
+
+    local_datetimes = np.where(date_codes >= 0, days[day_codes], np.datetime64('NaT'))
+    # Rows without a clock time (blank, NaN) stay at midnight
+    local_datetimes = local_datetimes + np.where(
+        time_codes >= 0, time_offsets[time_codes], np.timedelta64(0, 'ns'))
+
+    # Like the naive astimezone() of convert_to_datetime: ambiguous times at the end of DST
+    # resolve to the first occurrence, and times skipped at the start of DST are read with
+    # the offset after the change, landing an hour earlier (2:30am becomes 1:30am standard
+    # time). This is not the PEP 495 fold=0 mapping of datetime.timestamp(), which reads
+    # them with the offset before the change and lands an hour later.
+    local_datetimes = pd.DatetimeIndex(local_datetimes).tz_localize(
+        current_timezone,
+        ambiguous=np.ones(len(local_datetimes), dtype=bool),
+        nonexistent=pd.Timedelta(hours=-1))
+
+    return local_datetimes.tz_convert('UTC')
+
+
+def infer_year_month(date_text, target_date):
+    """
+    Find the year and month of a calendar date without a year (e.g. "Mon Dec 30").
+
+    Args:
+        date_text (str): The date as shown on the calendar.
+        target_date (date): A date of the scraped week or day, used for the year.
+
+    Returns:
+        tuple: (year, month), or (None, None) if the text has no month.
+    """
+    for token in date_text.split():
+        month = MONTH_NAME_TO_NUM.get(token[:3].lower())
+        if month is not None:
+            break
+    else:
+        return None, None
+
+    # A week can span the turn of the year
+    year = target_date.year
+    if month == 12 and target_date.month == 1:
+        year -= 1
+    elif month == 1 and target_date.month == 12:
+        year += 1
+    return year, month
+
+
+def structure_scraped_data(data, year, target_date=None):
+    """
+    Turn scraped rows into a DataFrame of allowed events.
+
+    Args:
+        data (list): The scraped data as a list of lists.
+        year (int): The year of the scraped page.
+        target_date (date): For week and day pages, a date of the page; lets rows
+            of a week spanning the turn of the year get the right year.
+
+    Returns:
+        pd.DataFrame: Columns date, datetime, currency, impact, event, sorted by datetime.
+    """
+    events = news_event_stream(data, year, target_date)
+    return pd.DataFrame(
+        [tuple(map(format_value, event)) for event in events], columns=list(NewsEvent._fields))
+
+
 def reformat_scraped_data(data, month, year):
     """
-    Reformat scraped data and save it as a DataFrame and a CSV file.
+    Stream scraped data into its month file, without building a DataFrame.
 
     Args:
         data (list): The scraped data as a list of lists.
         month (str): The month for naming the output CSV file.
 
     Returns:
-        pd.DataFrame: The reformatted data as a DataFrame.
+        str: Path of the saved file.
     """
-    current_date = ''
-    current_time = ''
-    structured_rows = []
-
-    for row in data:
-        if len(row) == 1 or len(row) == 5:
-            match, day = contains_day_or_month(row[0])
-            if match:
-                current_date = row[0].replace(day, "").replace("\n", "")
-        if len(row) == 4:
-            current_time = row[0]
-
-        if len(row) == 5:
-            current_time = row[1]
-
-        if len(row) > 1:
-            if row[-2] not in ALLOWED_IMPACT_COLORS or current_date == "" or current_time == "":
-                continue
-
-            current_datetime = convert_to_datetime(
-                current_date, year)
-            current_datetime_str = current_datetime.strftime(
-                '%Y.%m.%d %H:%M:%S')
-
-            event = row[-1]
-            impact = row[-2]
-            currency = row[-3]
-
-            structured_rows.append(
-                [current_datetime, current_datetime_str, currency, impact, event]
-            )
-
-    file_name = f"{FOLDER_NAME}/{year}/{month}.csv"
-    df = pd.DataFrame(
-        structured_rows, columns=['temp_datetime', 'datetime', 'currency', 'impact', 'event'])
-    df = df.loc[df['currency'] != "All", :]
-    df = df.sort_values(['datetime'])
-    df = df.drop(columns=['temp_datetime'])
-
-    os.makedirs(f"{FOLDER_NAME}/{year}", exist_ok=True)
-    df.to_csv(file_name, index=False)
-
-    return file_name
+    sink = month_sink(FOLDER_NAME, year, month, NEWS_COLUMNS)
+    run_stream(news_event_stream(data, year), sink)
+    return sink.path